@@ -0,0 +1,329 @@
+"""
+벤치마크용 로컬 KRX·뉴스 대역
+
+실제 KRX·Naver·Google을 호출하지 않고 서비스 성능을 재기 위한 결정적(deterministic) 대역이다.
+- FakeKRX: pykrx.stock과 같은 이름·반환 형식의 함수를 제공한다 (krx_client.set_backend로 교체)
+- FakeNews: Naver 검색 API·Google News RSS 응답을 돌려주는 httpx.MockTransport를 만든다
+  (http_client.start_http_client(transport=...)로 교체)
+
+시세·구성 종목 등 데이터는 (종목, 날짜) 문자열을 시드로 만들므로 실행마다 같고,
+호출 지연과 실패는 seed로 만든 난수로 주입한다.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+import httpx
+import pandas as pd
+
+# 테마 이름에 쓰는 단어 (이름 검색 벤치마크용)
+_THEME_WORDS = (
+    "2차전지", "반도체", "인공지능", "로봇", "바이오", "원자력", "방위산업", "조선", "게임", "엔터테인먼트",
+    "자율주행", "수소", "태양광", "우주항공", "메타버스", "클라우드", "보안", "5G", "전기차", "제약",
+)
+
+# 전 종목을 한 번에 받는 함수 (응답이 커서 지연을 BULK_LATENCY_FACTOR배로 둔다)
+_BULK_FUNCTIONS = {
+    "get_market_ohlcv_by_ticker",
+    "get_market_cap_by_ticker",
+    "get_market_fundamental_by_ticker",
+    "get_previous_business_days",
+}
+BULK_LATENCY_FACTOR = 10
+
+# pykrx가 내부 캐시로 답하는 함수 (지연·실패 없음)
+_CACHED_FUNCTIONS = {"get_market_ticker_name", "get_index_ticker_name", "get_etf_ticker_name"}
+
+
+def _weekdays(start: str, end: str) -> list[pd.Timestamp]:
+    """start~end 사이의 평일 (휴장일 없이 평일을 모두 거래일로 본다)"""
+    return [day for day in pd.date_range(start, end) if day.weekday() < 5]
+
+
+def _to_date_str(value) -> str:
+    return pd.Timestamp(value).strftime("%Y%m%d")
+
+
+class FakeKRX:
+    """
+    pykrx.stock 대역
+
+    Args:
+        stocks: 종목 수 (10개 중 1개는 ETF 이름)
+        themes: 테마 수
+        theme_size: 테마당 구성 종목 수
+        latency_ms: 호출 1회 기본 지연(ms)
+        jitter_ms: 지연 흔들림(ms, ±)
+        failure_rate: 호출 실패 확률 (0~1, ConnectionError 발생)
+        seed: 지연·실패 난수 시드
+    """
+
+    def __init__(
+        self,
+        stocks: int = 2500,
+        themes: int = 120,
+        theme_size: int = 25,
+        latency_ms: float = 30.0,
+        jitter_ms: float = 10.0,
+        failure_rate: float = 0.0,
+        seed: int = 42,
+    ):
+        self.codes = [f"{index:06d}" for index in range(1, stocks + 1)]
+        self.names = {
+            code: (f"KODEX 테스트{code}" if int(code) % 10 == 0 else f"종목{code}") for code in self.codes
+        }
+        self.theme_codes = [str(5000 + index) for index in range(1, themes + 1)]
+        self.theme_names = {
+            ticker: f"{_THEME_WORDS[index % len(_THEME_WORDS)]} {index // len(_THEME_WORDS) + 1}"
+            for index, ticker in enumerate(self.theme_codes)
+        }
+        self.members = {
+            ticker: random.Random(f"theme{ticker}").sample(self.codes, min(theme_size, stocks))
+            for ticker in self.theme_codes
+        }
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # ============================================
+    # 지연·실패 주입
+    # ============================================
+    def _enter(self, name: str):
+        """호출 1회를 세고 지연·실패를 주입한다"""
+        with self._lock:
+            self.calls[name] += 1
+            if name in _CACHED_FUNCTIONS:
+                return
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            if name in _BULK_FUNCTIONS:
+                delay *= BULK_LATENCY_FACTOR
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self.failures[name] += 1
+        time.sleep(max(0.0, delay) / 1000)
+        if failed:
+            raise ConnectionError(f"FakeKRX 실패 주입: {name}")
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+            self.failures.clear()
+
+    # ============================================
+    # 결정적 데이터
+    # ============================================
+    @staticmethod
+    def _candle(code: str, date_str: str) -> dict:
+        rng = random.Random(f"{code}{date_str}")
+        close = rng.randint(1_000, 200_000)
+        return {
+            "시가": close - rng.randint(0, 500),
+            "고가": close + rng.randint(0, 1_000),
+            "저가": close - rng.randint(0, 1_000),
+            "종가": close,
+            "거래량": rng.randint(0, 5_000_000),
+            "거래대금": close * rng.randint(0, 5_000_000),
+            "등락률": round(rng.uniform(-8.0, 12.0), 2),
+        }
+
+    # ============================================
+    # pykrx.stock 호환 함수
+    # ============================================
+    def get_previous_business_days(self, fromdate=None, todate=None, **kwargs):
+        self._enter("get_previous_business_days")
+        return _weekdays(fromdate, todate)
+
+    def get_market_ticker_list(self, date=None, market="KOSPI"):
+        self._enter("get_market_ticker_list")
+        return list(self.codes)
+
+    def get_market_ticker_name(self, ticker):
+        self._enter("get_market_ticker_name")
+        return self.names.get(ticker, ticker)
+
+    def get_etf_ticker_list(self, date=None):
+        # ETF는 종목 목록에 이름으로 섞여 있으므로 따로 돌려주지 않는다
+        self._enter("get_etf_ticker_list")
+        return []
+
+    def get_etf_ticker_name(self, ticker):
+        self._enter("get_etf_ticker_name")
+        return self.names.get(ticker, ticker)
+
+    def get_market_ohlcv_by_ticker(self, date, market="KOSPI", alternative=False):
+        self._enter("get_market_ohlcv_by_ticker")
+        date_str = _to_date_str(date)
+        rows = [self._candle(code, date_str) for code in self.codes]
+        return pd.DataFrame(rows, index=pd.Index(self.codes, name="티커"))
+
+    def get_market_cap_by_ticker(self, date, market="ALL", **kwargs):
+        self._enter("get_market_cap_by_ticker")
+        date_str = _to_date_str(date)
+        rows = []
+        for code in self.codes:
+            candle = self._candle(code, date_str)
+            shares = random.Random(f"shares{code}").randint(1_000_000, 500_000_000)
+            rows.append({
+                "종가": candle["종가"],
+                "시가총액": candle["종가"] * shares,
+                "거래량": candle["거래량"],
+                "거래대금": candle["거래대금"],
+                "상장주식수": shares,
+            })
+        return pd.DataFrame(rows, index=pd.Index(self.codes, name="티커"))
+
+    def get_market_fundamental_by_ticker(self, date, market="KOSPI", **kwargs):
+        self._enter("get_market_fundamental_by_ticker")
+        rows = []
+        for code in self.codes:
+            rng = random.Random(f"fundamental{code}")
+            rows.append({
+                "BPS": rng.randint(1_000, 100_000),
+                "PER": round(rng.uniform(0, 60), 2),
+                "PBR": round(rng.uniform(0, 8), 2),
+                "EPS": rng.randint(-5_000, 20_000),
+                "DIV": round(rng.uniform(0, 6), 2),
+                "DPS": rng.randint(0, 3_000),
+            })
+        return pd.DataFrame(rows, index=pd.Index(self.codes, name="티커"))
+
+    def get_market_ohlcv_by_date(self, fromdate, todate, ticker, **kwargs):
+        self._enter("get_market_ohlcv_by_date")
+        days = _weekdays(fromdate, todate)
+        rows = [self._candle(ticker, day.strftime("%Y%m%d")) for day in days]
+        return pd.DataFrame(rows, index=pd.DatetimeIndex(days, name="날짜"))
+
+    def get_market_cap_by_date(self, fromdate, todate, ticker, **kwargs):
+        self._enter("get_market_cap_by_date")
+        days = _weekdays(fromdate, todate)
+        shares = random.Random(f"shares{ticker}").randint(1_000_000, 500_000_000)
+        rows = [{"시가총액": self._candle(ticker, day.strftime("%Y%m%d"))["종가"] * shares} for day in days]
+        return pd.DataFrame(rows, index=pd.DatetimeIndex(days, name="날짜"))
+
+    def get_market_fundamental_by_date(self, fromdate, todate, ticker, **kwargs):
+        self._enter("get_market_fundamental_by_date")
+        days = _weekdays(fromdate, todate)
+        rng = random.Random(f"fundamental{ticker}")
+        row = {"PER": round(rng.uniform(0, 60), 2), "PBR": round(rng.uniform(0, 8), 2), "DIV": round(rng.uniform(0, 6), 2)}
+        return pd.DataFrame([row] * len(days), index=pd.DatetimeIndex(days, name="날짜"))
+
+    def get_market_trading_volume_by_investor(self, fromdate, todate, ticker, **kwargs):
+        self._enter("get_market_trading_volume_by_investor")
+        rng = random.Random(f"investor{ticker}{todate}")
+        investors = ["금융투자", "보험", "투신", "사모", "은행", "기타금융", "연기금", "기관합계", "기타법인", "개인", "외국인", "기타외국인", "전체"]
+        rows = []
+        for _ in investors:
+            sell, buy = rng.randint(0, 1_000_000), rng.randint(0, 1_000_000)
+            rows.append({"매도": sell, "매수": buy, "순매수": buy - sell})
+        return pd.DataFrame(rows, index=investors)
+
+    def get_index_ticker_list(self, date=None, market="KOSPI"):
+        self._enter("get_index_ticker_list")
+        return list(self.theme_codes) if market == "테마" else []
+
+    def get_index_ticker_name(self, ticker):
+        self._enter("get_index_ticker_name")
+        return self.theme_names.get(ticker, ticker)
+
+    def get_index_portfolio_deposit_file(self, ticker, date=None, alternative=False):
+        self._enter("get_index_portfolio_deposit_file")
+        return list(self.members.get(ticker, []))
+
+    def get_index_ohlcv_by_date(self, fromdate, todate, ticker, **kwargs):
+        self._enter("get_index_ohlcv_by_date")
+        days = _weekdays(fromdate, todate)
+        rows = []
+        for day in days:
+            rng = random.Random(f"index{ticker}{day:%Y%m%d}")
+            close = rng.randint(500, 5_000)
+            rows.append({"시가": close, "고가": close, "저가": close, "종가": close, "거래량": rng.randint(0, 50_000_000)})
+        return pd.DataFrame(rows, index=pd.DatetimeIndex(days, name="날짜"))
+
+
+class FakeNews:
+    """
+    Naver 검색 API·Google News RSS 대역
+
+    Args:
+        latency_ms: 응답 1회 기본 지연(ms)
+        jitter_ms: 지연 흔들림(ms, ±)
+        failure_rate: 503 응답 확률 (0~1)
+        items: 응답당 뉴스 수
+        seed: 지연·실패 난수 시드
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 80.0,
+        jitter_ms: float = 30.0,
+        failure_rate: float = 0.0,
+        items: int = 10,
+        seed: int = 42,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.items = items
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self._random = random.Random(seed)
+
+    def reset_counts(self):
+        self.calls.clear()
+        self.failures.clear()
+
+    def _articles(self, query: str, count: int) -> list[tuple[str, str, datetime]]:
+        """(제목, 링크, 발행 시각) 리스트 (query 기준으로 결정적)"""
+        base = datetime(2026, 1, 2, 15, 0, 0).astimezone()
+        return [
+            (f"{query} 관련 뉴스 {index + 1}", f"https://news.example.com/{abs(hash(query)) % 10_000}/{index}", base - timedelta(hours=index))
+            for index in range(count)
+        ]
+
+    def _naver(self, request: httpx.Request) -> httpx.Response:
+        query = request.url.params.get("query", "")
+        count = min(int(request.url.params.get("display", self.items)), self.items)
+        items = [
+            {
+                "title": f"<b>{title}</b>",
+                "originallink": link,
+                "link": link,
+                "description": f"{title} 요약",
+                "pubDate": format_datetime(published),
+            }
+            for title, link, published in self._articles(query, count)
+        ]
+        return httpx.Response(200, json={"items": items})
+
+    def _google(self, request: httpx.Request) -> httpx.Response:
+        query = request.url.params.get("q", "")
+        entries = "".join(
+            f"<item><title>{title}</title><link>{link}</link>"
+            f"<description>{title} 요약</description><pubDate>{format_datetime(published)}</pubDate></item>"
+            for title, link, published in self._articles(query, self.items)
+        )
+        body = f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{query}</title>{entries}</channel></rss>'
+        return httpx.Response(200, content=body.encode("utf-8"), headers={"Content-Type": "application/rss+xml"})
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        provider = "naver" if "naver" in request.url.host else "google"
+        self.calls[provider] += 1
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        failed = self._random.random() < self.failure_rate
+        await asyncio.sleep(max(0.0, delay) / 1000)
+        if failed:
+            self.failures[provider] += 1
+            return httpx.Response(503)
+        return self._naver(request) if provider == "naver" else self._google(request)
+
+    def transport(self) -> httpx.MockTransport:
+        """공유 HTTP 클라이언트에 넣을 전송 계층"""
+        return httpx.MockTransport(self._handle)
@@ -0,0 +1,279 @@
+"""
+오프라인 벤치마크 실행기
+
+pykrx와 뉴스 HTTP 호출을 benchmarks.fixtures의 로컬 대역으로 바꾼 뒤
+서비스 함수와 API 라우터를 현실적인 요청 분포로 호출해
+처리량(req/s), 지연 시간 p50/p95/p99, 외부 호출 수를 보고한다.
+네트워크·API 키 없이 실행되고 같은 옵션이면 같은 요청 순서를 재현하므로
+변경 전후(--json으로 저장 → --baseline으로 비교)를 같은 조건에서 비교할 수 있다.
+
+실행 예시 (api/ 디렉터리에서):
+    python -m benchmarks.run
+    python -m benchmarks.run --scenarios api_mix --requests 2000 --concurrency 64
+    python -m benchmarks.run --krx-latency-ms 50 --failure-rate 0.02 --json after.json --baseline before.json
+
+시나리오는 순서대로 같은 프로세스에서 실행되므로 앞 시나리오가 채운 캐시를 뒤 시나리오가 사용한다
+(운영 서버와 같은 조건). 캐시 없는 수치가 필요하면 시나리오를 하나씩 실행한다.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 서비스 모듈은 가져올 때 환경 변수를 읽으므로 import 전에 벤치마크 환경을 만든다
+_WORK_DIR = tempfile.mkdtemp(prefix="tap-bench-")
+os.environ.setdefault("HISTORY_STORE_PATH", os.path.join(_WORK_DIR, "history.sqlite3"))
+os.environ.setdefault("THEME_MEMBERSHIP_PATH", os.path.join(_WORK_DIR, "membership.npz"))
+os.environ.setdefault("MARKET_SNAPSHOT_DIR", os.path.join(_WORK_DIR, "snapshots"))
+os.environ.setdefault("KRX_DISK_CACHE_DIR", os.path.join(_WORK_DIR, "krx_cache"))
+os.environ.setdefault("DATA_STORE_BACKEND", "memory")
+os.environ.setdefault("NAVER_CLIENT_ID", "benchmark")
+os.environ.setdefault("NAVER_CLIENT_SECRET", "benchmark")
+
+import httpx  # noqa: E402
+
+from benchmarks.fixtures import FakeKRX, FakeNews  # noqa: E402
+
+SCENARIOS = ("themes_volume", "themes_surge", "theme_stocks", "stock_detail", "stock_news", "api_mix")
+
+# api_mix 시나리오의 엔드포인트 비중 (프론트엔드 화면 흐름 기준: 메인 → 테마 → 종목 → 뉴스)
+_API_MIX = (
+    ("/api/themes", 30),
+    ("/api/themes?sort=surge", 10),
+    ("/api/themes/{theme}/stocks", 25),
+    ("/api/stocks/{code}", 20),
+    ("/api/stocks/{code}?format=columnar", 5),
+    ("/api/stocks/{code}/news", 7),
+    ("/api/stocks/{code}/themes", 3),
+)
+
+# 조건부 요청(If-None-Match) 비율 — 브라우저가 이전 응답의 ETag를 다시 보내는 재방문 요청
+_REVALIDATE_RATIO = 0.3
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="TAP 오프라인 벤치마크")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"쉼표로 구분한 시나리오 ({', '.join(SCENARIOS)})")
+    parser.add_argument("--requests", type=int, default=500, help="시나리오당 요청 수")
+    parser.add_argument("--concurrency", type=int, default=32, help="동시 요청 수")
+    parser.add_argument("--stocks", type=int, default=2500, help="대역 시장의 종목 수")
+    parser.add_argument("--themes", type=int, default=120, help="대역 시장의 테마 수")
+    parser.add_argument("--krx-latency-ms", type=float, default=30.0, help="pykrx 호출 1회 지연(ms, 전 종목 조회는 10배)")
+    parser.add_argument("--news-latency-ms", type=float, default=80.0, help="뉴스 API 응답 지연(ms)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="외부 호출 실패 확률 (0~1)")
+    parser.add_argument("--krx-rate-limit", type=float, default=1000.0, help="KRX 초당 호출 제한 (운영 기본값은 10)")
+    parser.add_argument("--seed", type=int, default=42, help="요청 순서·지연·실패 난수 시드")
+    parser.add_argument("--json", dest="json_path", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일 경로")
+    return parser.parse_args(argv)
+
+
+def _popular(rng: random.Random, items: list[str], count: int) -> list[str]:
+    """인기 항목에 요청이 몰리도록 1/순위 가중치로 count개를 뽑는다"""
+    weights = [1 / (rank + 1) for rank in range(len(items))]
+    return rng.choices(items, weights=weights, k=count)
+
+
+async def _drive(jobs: list, concurrency: int) -> tuple[list[float], int, float]:
+    """
+    작업(코루틴 함수) 리스트를 동시에 concurrency개씩 실행하는 함수
+
+    Returns:
+        (요청별 소요 시간(초), 실패 수, 전체 경과 시간(초))
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                ok = await job()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if ok is False:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def _service_jobs(name: str, count: int, krx: FakeKRX, rng: random.Random) -> list:
+    """서비스 함수를 직접 호출하는 시나리오의 작업 리스트"""
+    from services.news_service import fetch_stock_news
+    from services.stock_service import fetch_stock_detail, fetch_stocks_by_theme
+    from services.theme_service import fetch_themes_by_surge, fetch_themes_by_volume
+
+    if name == "themes_volume":
+        return [lambda: fetch_themes_by_volume(limit=5)] * count
+    if name == "themes_surge":
+        return [lambda: fetch_themes_by_surge(limit=5)] * count
+    if name == "theme_stocks":
+        return [lambda theme=theme: fetch_stocks_by_theme(theme) for theme in _popular(rng, krx.theme_codes, count)]
+    if name == "stock_detail":
+        periods = rng.choices(("1m", "3m", "1y"), weights=(2, 6, 2), k=count)
+        codes = _popular(rng, krx.codes, count)
+        return [lambda code=code, period=period: fetch_stock_detail(code, period) for code, period in zip(codes, periods)]
+    if name == "stock_news":
+        names = [krx.names[code] for code in _popular(rng, krx.codes, count)]
+        return [lambda stock_name=stock_name: fetch_stock_news(stock_name, limit=5) for stock_name in names]
+    raise ValueError(f"알 수 없는 시나리오: {name}")
+
+
+def _api_mix_jobs(client: httpx.AsyncClient, count: int, krx: FakeKRX, rng: random.Random) -> list:
+    """API 라우터를 요청 분포대로 호출하는 작업 리스트 (ETag 재검증 요청 포함)"""
+    templates, weights = zip(*_API_MIX)
+    paths = rng.choices(templates, weights=weights, k=count)
+    themes = _popular(rng, krx.theme_codes, count)
+    codes = _popular(rng, [code for code in krx.codes if int(code) % 10], count)
+    revalidate = [rng.random() < _REVALIDATE_RATIO for _ in range(count)]
+    etags: dict[str, str] = {}
+
+    def make(path: str, conditional: bool):
+        async def job():
+            headers = {"Accept-Encoding": "gzip"}
+            if conditional and path in etags:
+                headers["If-None-Match"] = etags[path]
+            response = await client.get(path, headers=headers)
+            if "etag" in response.headers:
+                etags[path] = response.headers["etag"]
+            return response.status_code in (200, 304)
+        return job
+
+    return [
+        make(template.format(theme=theme, code=code), conditional)
+        for template, theme, code, conditional in zip(paths, themes, codes, revalidate)
+    ]
+
+
+def _summarize(latencies: list[float], errors: int, elapsed: float, krx_calls: int, news_calls: int) -> dict:
+    millis = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(millis, (50, 95, 99)) if len(millis) else (0.0, 0.0, 0.0)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "krx_calls": krx_calls,
+        "news_calls": news_calls,
+    }
+
+
+def _print_report(results: dict, baseline: dict | None):
+    header = f"{'scenario':<14}{'req':>7}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'krx':>8}{'news':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        print(
+            f"{name:<14}{row['requests']:>7}{row['errors']:>6}{row['rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['krx_calls']:>8}{row['news_calls']:>7}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous:
+            changes = []
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "krx_calls"):
+                before, after = previous.get(key), row[key]
+                if before:
+                    changes.append(f"{key} {(after - before) / before * 100:+.1f}%")
+            print(f"{'':<14}기준 대비: {', '.join(changes)}")
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    # 속도 제한은 모듈 import 시 읽으므로 서비스 모듈보다 먼저 지정한다
+    os.environ.setdefault("KRX_RATE_LIMIT_PER_SECOND", str(args.krx_rate_limit))
+
+    from main import app
+    from services import krx_client
+
+    # 요청마다 찍히는 INFO 로그가 보고서를 가리지 않도록 끈다 (경고·오류는 그대로 출력)
+    logging.disable(logging.INFO)
+    from services.http_client import close_http_client, start_http_client
+    from services.theme_membership import load_theme_membership
+
+    krx = FakeKRX(
+        stocks=args.stocks,
+        themes=args.themes,
+        latency_ms=args.krx_latency_ms,
+        jitter_ms=args.krx_latency_ms / 3,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    news = FakeNews(
+        latency_ms=args.news_latency_ms,
+        jitter_ms=args.news_latency_ms / 3,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    krx_client.set_backend(krx)
+    start_http_client(transport=news.transport())
+
+    rng = random.Random(args.seed)
+    results = {}
+    try:
+        # 테마 구성 색인은 서버 시작 시 만들어지므로 측정에서 뺀다
+        await krx_client.run_blocking(load_theme_membership)
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        async with client:
+            for name in [name.strip() for name in args.scenarios.split(",") if name.strip()]:
+                if name == "api_mix":
+                    jobs = _api_mix_jobs(client, args.requests, krx, rng)
+                else:
+                    jobs = _service_jobs(name, args.requests, krx, rng)
+                krx_before, news_before = sum(krx.calls.values()), sum(news.calls.values())
+                latencies, errors, elapsed = await _drive(jobs, args.concurrency)
+                results[name] = _summarize(
+                    latencies,
+                    errors,
+                    elapsed,
+                    sum(krx.calls.values()) - krx_before,
+                    sum(news.calls.values()) - news_before,
+                )
+    finally:
+        krx_client.set_backend(None)
+        await close_http_client()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    unknown = {name.strip() for name in args.scenarios.split(",") if name.strip()} - set(SCENARIOS)
+    if unknown:
+        print(f"알 수 없는 시나리오: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    results = asyncio.run(_run(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file).get("results")
+    _print_report(results, baseline)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump({"options": vars(args), "results": results}, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
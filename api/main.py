@@ -4,18 +4,33 @@ TAP (Theme Analysis Program) - FastAPI 앱 진입점
 증권 데이터를 수집·가공하여 RESTful API로 제공하는 백엔드 서버이다.
 모든 라우터와 미들웨어를 여기서 등록한다.
 """
+import asyncio
 import os
 import logging
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from contextlib import asynccontextmanager
 
-from routers import themes, stocks, news
+from routers import themes, stocks, news, stream
+from middleware.compression import CompressionMiddleware
 from middleware.error_handler import global_exception_handler
-from scheduler import start_scheduler, stop_scheduler
+from middleware.http_cache import HTTPCacheMiddleware
+from middleware.json_response import FastJSONResponse
+from middleware.metrics import RequestMetricsMiddleware
+from scheduler import get_scheduler_status, start_scheduler, stop_scheduler
+from services import krx_client
+from services.broadcaster import get_broadcaster, publish_refresh_delta
+from services.disk_cache import get_disk_cache_stats
+from services.http_client import start_http_client, close_http_client
+from services.metrics import render_metrics
+from services.news_service import get_news_cache_stats
+from services.refresh_pipeline import add_delta_listener, remove_delta_listener
+from services.singleflight import get_coalesce_stats
+from services.warmup import get_warmup_progress, start_warmup, stop_warmup
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -32,14 +47,26 @@ async def lifespan(app: FastAPI):
     """
     FastAPI 앱의 수명 주기를 관리하는 함수
 
-    시작 시: 백그라운드 스케줄러를 시작한다
-    종료 시: 스케줄러를 안전하게 정리한다
+    시작 시: 공유 HTTP 클라이언트를 만들고, 워밍업(pykrx·거래일 달력·이름 색인·시장 스냅샷·테마 구성 색인)을
+            백그라운드로 시작하고, 갱신 변경분을 SSE 스트림으로 방송하도록 연결한 뒤 백그라운드 스케줄러를 시작한다
+            워밍업을 기다리지 않으므로 서버는 바로 요청을 받는다 (진행 상황은 /api/ready)
+    종료 시: 워밍업, 스케줄러, SSE 스트림, pykrx 전용 스레드 풀, HTTP 연결을 안전하게 정리한다
     """
-    # 서버 시작 시 스케줄러 실행
+    # 서버 시작 시 공유 HTTP 클라이언트 생성, 워밍업 시작, 스케줄러 실행
+    start_http_client()
+    start_warmup()
+    # 스케줄러 스레드의 변경분을 이 이벤트 루프로 넘겨 SSE 구독자에게 전달한다
+    get_broadcaster().attach(asyncio.get_running_loop())
+    add_delta_listener(publish_refresh_delta)
     start_scheduler()
     yield
-    # 서버 종료 시 스케줄러 정리
+    # 서버 종료 시 워밍업·스케줄러 정리
+    await stop_warmup()
     stop_scheduler()
+    remove_delta_listener(publish_refresh_delta)
+    get_broadcaster().close()
+    krx_client.shutdown()
+    await close_http_client()
 
 
 # FastAPI 앱 인스턴스 생성
@@ -48,8 +75,17 @@ app = FastAPI(
     description="Theme Analysis Program - 테마별 종목 분석 API",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# ============================================
+# HTTP 캐시 미들웨어 설정
+# 시장 시간과 다음 갱신 시각으로 Cache-Control을 붙이고,
+# 게시 버전이 바뀌지 않은 조건부 요청은 라우터를 거치지 않고 304로 응답한다
+# (CORS보다 먼저 등록해 CORS 안쪽에 두어야 바로 반환하는 304에도 CORS 헤더가 붙는다)
+# ============================================
+app.add_middleware(HTTPCacheMiddleware)
+
 # ============================================
 # CORS 미들웨어 설정
 # 허용된 도메인만 API에 접근할 수 있도록 제한한다
@@ -65,6 +101,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ============================================
+# 응답 압축 미들웨어 설정
+# COMPRESSION_MIN_SIZE 바이트 이상인 응답을 brotli 또는 gzip으로 압축한다
+# (SSE·NDJSON 스트리밍 응답은 압축하지 않는다)
+# ============================================
+app.add_middleware(CompressionMiddleware)
+
+# ============================================
+# 요청 지표 미들웨어 설정
+# 엔드포인트별 처리 시간·상태 코드와, 요청 중 일어난 외부 호출의 엔드포인트 라벨을 기록한다
+# (가장 바깥에 두어 캐시·압축 처리 시간까지 포함한다)
+# ============================================
+app.add_middleware(RequestMetricsMiddleware)
+
 # ============================================
 # 전역 예외 처리 핸들러 등록
 # 처리되지 않은 모든 예외를 일관된 JSON 형식으로 반환한다
@@ -83,8 +133,35 @@ async def health_check():
 
 @app.get("/api/health")
 async def api_health():
-    """API 상태를 확인하는 엔드포인트"""
-    return {"status": "ok", "version": "1.0.0"}
+    """API 상태와 pykrx 전용 스레드 풀 상태(대기열 깊이 등), pykrx 디스크 캐시, 뉴스 캐시, SSE 스트림, 요청 병합, 스케줄러 역할을 확인하는 엔드포인트"""
+    return {
+        "status": "ok",
+        "version": "1.0.0",
+        "krx_pool": krx_client.get_pool_stats(),
+        "krx_disk_cache": get_disk_cache_stats(),
+        "news_cache": get_news_cache_stats(),
+        "stream": get_broadcaster().stats(),
+        "coalesce": get_coalesce_stats(),
+        "scheduler": get_scheduler_status(),
+    }
+
+
+@app.get("/api/ready")
+async def api_ready():
+    """
+    서버 워밍업 진행 상황을 확인하는 준비 상태 엔드포인트
+
+    워밍업이 끝나면 200, 진행 중이거나 필수 단계(거래일 달력, 시장 스냅샷)가 실패해
+    재시도 중("degraded")이거나 취소됐으면 503을 반환한다 (로드 밸런서 준비 상태 검사용).
+    """
+    progress = get_warmup_progress()
+    return FastJSONResponse(progress, status_code=200 if progress["ready"] else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """외부 호출·엔드포인트·스케줄러 작업 지표를 Prometheus 텍스트 형식으로 반환하는 엔드포인트"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # ============================================
@@ -94,5 +171,6 @@ async def api_health():
 app.include_router(themes.router, prefix="/api", tags=["themes"])
 app.include_router(stocks.router, prefix="/api", tags=["stocks"])
 app.include_router(news.router, prefix="/api", tags=["news"])
+app.include_router(stream.router, prefix="/api", tags=["stream"])
 
 logger.info("TAP API 서버가 초기화되었습니다.")
@@ -0,0 +1,117 @@
+"""
+응답 압축 미들웨어
+
+클라이언트의 Accept-Encoding에 따라 응답 본문을 brotli 또는 gzip으로 압축한다.
+- COMPRESSION_MIN_SIZE 바이트보다 작은 응답은 압축하지 않는다 (압축 비용이 이득보다 큼)
+- 본문을 여러 조각으로 보내는 스트리밍 응답(SSE, NDJSON)은 압축하지 않고 그대로 흘려보낸다
+  (압축기가 조각을 모아 두면 실시간 전달이 늦어진다)
+- brotli 패키지가 없으면 gzip만 사용한다
+"""
+import gzip
+import logging
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli가 설치되지 않은 환경
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 압축할 최소 응답 크기(바이트)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# gzip 압축 수준 (1~9)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+
+# brotli 압축 품질 (0~11, 응답마다 압축하므로 낮은 값 권장)
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    """
+    Accept-Encoding 헤더에서 사용할 압축 방식을 고르는 함수
+
+    Args:
+        accept_encoding: Accept-Encoding 헤더 값 (예: "gzip, deflate, br")
+
+    Returns:
+        "br", "gzip" 또는 None (압축하지 않음)
+    """
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    한 번에 보내는 응답 본문을 압축하는 ASGI 미들웨어
+
+    Args:
+        app: 감쌀 ASGI 앱
+        minimum_size: 압축할 최소 응답 크기(바이트)
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # 본문 첫 조각을 보고 압축 여부를 정할 때까지 헤더 전송을 미룬다
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            initial, start_message = start_message, None
+            headers = MutableHeaders(raw=initial["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and not headers.get("content-type", "").startswith("text/event-stream")
+            )
+            if compressible:
+                body = _compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(initial)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
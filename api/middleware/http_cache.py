@@ -0,0 +1,186 @@
+"""
+HTTP 캐시 미들웨어
+
+테마·종목 데이터는 장중(09:00~15:30)에는 5분마다, 장 마감 후에는 15:40 최종 갱신 이후 바뀌지 않는다.
+이 미들웨어는 시장 시간과 스케줄러의 다음 갱신 시각으로 Cache-Control max-age를 정하고,
+저장소에 게시된 데이터 버전으로 만든 ETag가 If-None-Match와 같으면
+라우터·서비스를 호출하지 않고 바로 304 Not Modified를 반환한다.
+
+- 장중: 짧은 유효 시간 (HTTP_CACHE_INTRADAY_MAX_AGE_SECONDS 이하)
+- 장 마감 후·휴일: 다음 갱신(다음 장 시작)까지
+- 라우터가 Cache-Control을 직접 붙인 응답(수집 실패로 빈 응답의 no-store 등)은 그대로 둔다
+
+CORS 미들웨어 안쪽에 등록해야 바로 반환하는 304에도 CORS 헤더가 붙는다 (main.py 참고).
+"""
+import logging
+import os
+import re
+from datetime import datetime, time, timedelta
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from middleware.json_response import etag_matches
+from scheduler import get_next_refresh_time
+from services.data_store import get_data_store, is_fresh
+
+logger = logging.getLogger(__name__)
+
+# 장중 최대 캐시 유효 시간(초)
+HTTP_CACHE_INTRADAY_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_INTRADAY_MAX_AGE_SECONDS", "60"))
+
+# 장 마감 후 최대 캐시 유효 시간(초) — 주말·연휴를 넘기지 않도록 상한을 둔다
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "259200"))
+
+# 다음 갱신 시각에 더하는 여유 시간(초) — 갱신 작업이 끝나 새 데이터가 게시될 때까지 걸리는 시간
+HTTP_CACHE_REFRESH_MARGIN_SECONDS = int(os.getenv("HTTP_CACHE_REFRESH_MARGIN_SECONDS", "30"))
+
+# 장중 갱신이 도는 시간대 (스케줄러: 평일 09:00~15:55 5분 간격, 15:40 최종 갱신)
+_SESSION_START = time(9, 0)
+_SESSION_END = time(16, 0)
+
+# 테마 급등주 조건 쿼리 (기본값과 다르면 저장소를 거치지 않으므로 버전 ETag를 쓸 수 없다)
+_SURGE_QUERY_PARAMS = ("threshold", "min_volume", "lookback")
+
+
+def version_etag(version: int, epoch: str) -> str:
+    """
+    저장소 게시 버전으로 약한 ETag를 만든다
+
+    버전 번호는 메모리 저장소가 재시작되면 다시 1부터 시작하므로,
+    저장소 세대 식별자를 붙여 이전 프로세스가 발급한 ETag와 겹치지 않게 한다.
+    """
+    return f'W/"{epoch}-v{version}"'
+
+
+def _themes_key(match: re.Match, query: QueryParams) -> str | None:
+    """/api/themes의 게시 키 (급등주 조건을 직접 준 경우 None)"""
+    if any(param in query for param in _SURGE_QUERY_PARAMS):
+        return None
+    return "themes:surge" if query.get("sort") == "surge" else "themes:volume"
+
+
+def _theme_stocks_key(match: re.Match, query: QueryParams) -> str | None:
+    """/api/themes/{theme_code}/stocks의 게시 키"""
+    return f"theme_stocks:{match['theme_code']}"
+
+
+# 캐시 대상 경로, 경로 템플릿, 게시 키 함수 (None이면 Cache-Control만 붙이고 조건부 요청은 라우터가 처리)
+_CACHE_RULES = [
+    (re.compile(r"^/api/themes$"), "/api/themes", _themes_key),
+    (re.compile(r"^/api/themes/search$"), "/api/themes/search", None),
+    (re.compile(r"^/api/themes/(?P<theme_code>[^/]+)/stocks$"), "/api/themes/{theme_code}/stocks", _theme_stocks_key),
+    (re.compile(r"^/api/stocks/[^/]+/themes$"), "/api/stocks/{code}/themes", None),
+    (re.compile(r"^/api/stocks/(?!batch$)[^/]+$"), "/api/stocks/{code}", None),
+]
+
+
+def is_market_session(now: datetime) -> bool:
+    """평일 장중 갱신 시간대인지 확인한다 (휴일은 짧게 캐시될 뿐이므로 평일 기준으로 판단)"""
+    return now.weekday() < 5 and _SESSION_START <= now.time() < _SESSION_END
+
+
+def _next_session_open(now: datetime) -> datetime:
+    """스케줄러가 없을 때의 대체값: 다음 평일 09:00"""
+    candidate = datetime.combine(now.date(), _SESSION_START)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def cache_max_age(now: datetime | None = None) -> int:
+    """
+    현재 시각의 Cache-Control max-age(초)를 계산하는 함수
+
+    Args:
+        now: 기준 시각 (생략 시 현재 시각)
+
+    Returns:
+        장중이면 다음 갱신까지(최대 HTTP_CACHE_INTRADAY_MAX_AGE_SECONDS),
+        장 마감 후면 다음 갱신(다음 장 시작)까지(최대 HTTP_CACHE_MAX_AGE_SECONDS)
+    """
+    now = now or datetime.now()
+    next_refresh = get_next_refresh_time()
+    if next_refresh is not None:
+        until_refresh = next_refresh.timestamp() - now.timestamp()
+    else:
+        until_refresh = (_next_session_open(now) - now).total_seconds()
+    until_refresh += HTTP_CACHE_REFRESH_MARGIN_SECONDS
+
+    limit = HTTP_CACHE_INTRADAY_MAX_AGE_SECONDS if is_market_session(now) else HTTP_CACHE_MAX_AGE_SECONDS
+    return int(max(0, min(until_refresh, limit)))
+
+
+def cache_control_header(now: datetime | None = None) -> str:
+    """현재 시각의 Cache-Control 헤더 값"""
+    return f"public, max-age={cache_max_age(now)}"
+
+
+class HTTPCacheMiddleware:
+    """
+    시장 시간 기반 Cache-Control과 버전 ETag 조건부 요청을 처리하는 ASGI 미들웨어
+
+    저장소에 게시된 데이터를 반환하는 엔드포인트는 게시 버전이 ETag가 되므로,
+    If-None-Match가 현재 버전과 같고 게시 데이터가 아직 유효하면 라우터를 호출하지 않는다.
+    게시 데이터가 오래됐으면(라우터가 다시 계산할 상황) 그대로 라우터에 넘긴다.
+
+    Args:
+        app: 감쌀 ASGI 앱
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.not_modified = 0
+
+    @staticmethod
+    def _match(path: str):
+        for pattern, template, key_func in _CACHE_RULES:
+            match = pattern.match(path)
+            if match is not None:
+                return match, template, key_func
+        return None, None, None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        match, template, key_func = self._match(scope["path"])
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        cache_control = cache_control_header()
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        key = key_func(match, QueryParams(scope["query_string"])) if key_func is not None else None
+
+        if key is not None and if_none_match:
+            store = get_data_store()
+            publication = store.get_publication(key)
+            if publication is not None and is_fresh(publication):
+                etag = version_etag(publication["version"], store.epoch)
+                if etag_matches(if_none_match, etag):
+                    self.not_modified += 1
+                    # 라우팅을 거치지 않으므로 요청 지표에 쓸 경로 템플릿을 남긴다
+                    scope["route_path"] = template
+                    await send({
+                        "type": "http.response.start",
+                        "status": 304,
+                        "headers": [
+                            (b"etag", etag.encode("latin-1")),
+                            (b"cache-control", cache_control.encode("latin-1")),
+                        ],
+                    })
+                    await send({"type": "http.response.body", "body": b""})
+                    return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and message["status"] in (200, 304):
+                headers = MutableHeaders(raw=message["headers"])
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = cache_control
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
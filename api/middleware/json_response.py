@@ -0,0 +1,114 @@
+"""
+빠른 JSON 응답 헬퍼
+
+자주 호출되는 엔드포인트의 응답을 FastAPI 기본 인코더(jsonable_encoder + json.dumps) 대신
+orjson으로 한 번에 바이트로 직렬화한다. orjson이 없으면 표준 json 모듈로 대체한다.
+
+직렬화한 본문의 해시로 ETag를 만들고, 요청의 If-None-Match가 같으면
+본문 없이 304 Not Modified를 반환한다.
+"""
+import hashlib
+import json
+import logging
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # orjson이 설치되지 않은 환경
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value: Any):
+    """표준 json 모듈이 모르는 값(numpy 스칼라·배열 등)을 변환한다"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"JSON으로 직렬화할 수 없는 값: {type(value).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    """
+    응답 데이터를 JSON 바이트로 직렬화하는 함수
+
+    Args:
+        content: 딕셔너리·리스트 등 응답 데이터 (numpy 배열·스칼라 허용)
+
+    Returns:
+        UTF-8 JSON 바이트
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson으로 직렬화하는 JSON 응답 (앱 기본 응답 클래스로 사용)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+def body_etag(body: bytes) -> str:
+    """응답 본문 해시로 약한 ETag를 만든다 (압축 여부와 무관하게 같은 값)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match 헤더 값이 ETag와 일치하는지 확인하는 함수 (약한 비교)
+
+    Args:
+        if_none_match: 요청의 If-None-Match 헤더 값
+        etag: 현재 응답의 ETag
+
+    Returns:
+        일치 여부
+    """
+    if not if_none_match:
+        return False
+    current = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == current:
+            return True
+    return False
+
+
+def json_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    etag: str | None = None,
+    cacheable: bool = True,
+) -> Response:
+    """
+    JSON 응답을 만들고 ETag 조건부 요청을 처리하는 함수
+
+    Args:
+        request: HTTP 요청 (If-None-Match 확인용)
+        content: 응답 데이터
+        status_code: HTTP 상태 코드
+        etag: 사용할 ETag (생략 시 직렬화한 본문 해시)
+        cacheable: False면 Cache-Control: no-store를 붙인다
+            (수집 실패로 비어 있는 응답이 다음 갱신까지 브라우저·CDN에 남지 않도록)
+
+    Returns:
+        본문이 바뀌지 않았으면 304 응답, 아니면 ETag가 붙은 JSON 응답
+    """
+    body = dumps_json(content)
+    etag = etag or body_etag(body)
+    headers = {"ETag": etag}
+    if not cacheable:
+        headers["Cache-Control"] = "no-store"
+    if status_code == 200 and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
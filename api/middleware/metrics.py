@@ -0,0 +1,56 @@
+"""
+API 요청 지표 미들웨어
+
+요청마다 처리 시간과 상태 코드를 경로 템플릿(예: "/api/stocks/{code}") 단위로 기록하고,
+요청 처리 중 일어난 외부 호출(pykrx, 뉴스)에 그 엔드포인트 라벨이 붙도록 문맥을 지정한다.
+SSE 스트림은 연결 시간이 곧 응답 시간이 되므로 기록하지 않는다.
+"""
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    엔드포인트별 요청 처리 시간을 기록하는 ASGI 미들웨어
+
+    Args:
+        app: 감쌀 ASGI 앱
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 라우팅이 끝나면 scope["route"]가 채워지므로, 외부 호출 시점에는 경로 템플릿을 읽을 수 있다
+        token = metrics.set_endpoint(scope)
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.reset_endpoint(token)
+            if not streaming:
+                metrics.observe_request(
+                    scope["method"], metrics.route_label(scope), status, time.perf_counter() - started
+                )
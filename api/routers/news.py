@@ -7,9 +7,9 @@
 """
 from fastapi import APIRouter, HTTPException, Path
 import logging
-from datetime import datetime, timedelta
 
-from pykrx import stock as pykrx_stock
+from services import krx_client
+from services.metadata_index import lookup_stock_name
 from services.news_service import fetch_stock_news
 
 logger = logging.getLogger(__name__)
@@ -22,8 +22,8 @@ def _get_stock_name(code: str) -> str:
     """
     종목 코드로 종목명을 가져오는 헬퍼 함수
 
-    pykrx의 get_market_ticker_name이 장 외 시간에 실패할 수 있으므로
-    OHLCV 데이터에서 종목명을 추출하는 대체 방법을 사용한다.
+    거래일마다 만드는 이름 색인에서 먼저 찾고,
+    색인에 없을 때만 pykrx의 get_market_ticker_name을 호출한다.
 
     Args:
         code: 종목 코드 (예: "005930")
@@ -31,31 +31,20 @@ def _get_stock_name(code: str) -> str:
     Returns:
         종목명 (예: "삼성전자"), 실패 시 종목 코드 그대로 반환
     """
-    # 1순위: 직접 조회
+    # 1순위: 거래일마다 만드는 이름 색인에서 조회 (네트워크 호출 없음)
     try:
-        name = pykrx_stock.get_market_ticker_name(code)
-        # DataFrame이 반환되는 경우(장 외 시간 버그)를 처리
-        if isinstance(name, str) and name:
+        name = lookup_stock_name(code)
+        if name:
             return name
     except Exception:
         pass
 
-    # 2순위: 최근 거래일에서 종목명 찾기
+    # 2순위: 색인에 없는 종목(신규 상장 등)은 직접 조회
     try:
-        today = datetime.today()
-        for offset in range(7):
-            target_date = today - timedelta(days=offset)
-            date_str = target_date.strftime("%Y%m%d")
-            try:
-                # OHLCV 조회로 해당 종목이 존재하는지 확인
-                ohlcv = pykrx_stock.get_market_ohlcv_by_date(date_str, date_str, code)
-                if not ohlcv.empty:
-                    # 티커 이름 재시도
-                    name = pykrx_stock.get_market_ticker_name(code)
-                    if isinstance(name, str) and name:
-                        return name
-            except Exception:
-                continue
+        name = krx_client.call("get_market_ticker_name", code)
+        # DataFrame이 반환되는 경우(장 외 시간 버그)를 처리
+        if isinstance(name, str) and name:
+            return name
     except Exception:
         pass
 
@@ -80,8 +69,8 @@ async def get_stock_news(code: str = Path(..., description="종목 코드 (예:
         뉴스 5건 리스트 (제목, 링크, 설명, 발행일, 출처)
     """
     try:
-        # 종목 코드로 종목명 가져오기 (뉴스 검색에 사용)
-        stock_name = _get_stock_name(code)
+        # 종목 코드로 종목명 가져오기 (뉴스 검색에 사용, pykrx 호출은 이벤트 루프 밖에서 실행)
+        stock_name = await krx_client.run_blocking(_get_stock_name, code)
 
         # 종목명으로 뉴스 검색
         news = await fetch_stock_news(stock_name, limit=5)
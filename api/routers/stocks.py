@@ -5,38 +5,140 @@
 
 참조: docs/08_AgentSkillDesign.md — Skill 2-2
 """
-from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 import logging
+import os
 
-from services.stock_service import fetch_stocks_by_theme, fetch_stock_detail
+from middleware.http_cache import version_etag
+from middleware.json_response import dumps_json, json_response
+from services.stock_service import (
+    HISTORY_FORMAT_COLUMNAR,
+    HISTORY_FORMAT_RECORDS,
+    PERIOD_TRADING_DAYS,
+    STOCK_DETAIL_ERROR,
+    fetch_stocks_by_theme,
+    fetch_stock_detail,
+    fetch_stock_details_batch,
+    iter_stock_details,
+)
+from services.sort_service import NULLS_FIRST, NULLS_LAST, select_stocks
+from services.theme_service import fetch_themes_of_stock
+from services.data_store import get_data_store, is_fresh
 
 logger = logging.getLogger(__name__)
 
+# 배치 상세 조회 1회에 요청할 수 있는 최대 종목 수
+STOCK_BATCH_MAX_CODES = int(os.getenv("STOCK_BATCH_MAX_CODES", "50"))
+
+# NDJSON 스트리밍 응답 형식
+_NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 배치 조회에서 지원하는 차트 기간 ('1d', '1w', '1m', '3m', '6m', '1y', '3y', '5y' 외에는 422)
+_PERIOD_PATTERN = f"^({'|'.join(PERIOD_TRADING_DAYS)})$"
+
+# 테마별 종목 목록에서 정렬 기준으로 쓸 수 있는 컬럼
+_SORTABLE_COLUMNS = ("trading_volume", "price", "market_cap", "name", "code")
+
+
+class StockBatchRequest(BaseModel):
+    """배치 상세 조회 요청 본문"""
+
+    codes: list[str] = Field(..., min_length=1, max_length=STOCK_BATCH_MAX_CODES, description="종목 코드 리스트")
+    period: str = Field("3m", pattern=_PERIOD_PATTERN, description="차트 기간: '1d', '1w', '1m', '3m', '6m', '1y', '3y', '5y'")
+
 # 종목 라우터 인스턴스 생성
 router = APIRouter()
 
 
+def _split_param(value: str | None) -> list[str]:
+    """쉼표로 구분한 쿼리 파라미터를 리스트로 나눈다"""
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+
 @router.get("/themes/{theme_code}/stocks")
-async def get_theme_stocks(theme_code: str = Path(..., description="테마 코드 (pykrx 티커)")):
+async def get_theme_stocks(
+    request: Request,
+    theme_code: str = Path(..., description="테마 코드 (pykrx 티커)"),
+    sort_by: str | None = Query(None, description="정렬 기준 컬럼 (쉼표 구분, 예: 'trading_volume,price')"),
+    order: str | None = Query(None, description="컬럼별 정렬 방향 (쉼표 구분, 'asc'/'desc', 모자라면 'desc')"),
+    nulls: str = Query(NULLS_LAST, pattern=f"^({NULLS_FIRST}|{NULLS_LAST})$", description="값이 없는 종목 위치"),
+    stock_type: str | None = Query(None, alias="type", pattern="^(stock|ETF)$", description="종목 타입 필터"),
+    min_price: float | None = Query(None, ge=0, description="최소 가격"),
+    max_price: float | None = Query(None, ge=0, description="최대 가격"),
+    min_volume: float | None = Query(None, ge=0, description="최소 거래량"),
+    max_volume: float | None = Query(None, ge=0, description="최대 거래량"),
+    min_market_cap: float | None = Query(None, ge=0, description="최소 시가총액"),
+    max_market_cap: float | None = Query(None, ge=0, description="최대 시가총액"),
+    limit: int | None = Query(None, ge=1, le=100, description="목록별 최대 종목 수"),
+):
     """
     테마별 종목 목록 API
 
     선택한 테마의 대장주 5개와 관련 ETF 3개를 반환한다.
+    스케줄러가 게시한 데이터가 유효하면 저장소에서 바로 반환한다.
+    sort_by·order로 다중 컬럼 정렬을, type과 가격·거래량·시가총액 범위(min_*/max_*, 경계 포함)로
+    필터를 적용할 수 있고, limit으로 목록별 개수를 줄일 수 있다 (기본값: 거래량 순).
+    응답은 orjson으로 직렬화하고 게시 버전(없으면 본문 해시)으로 ETag를 붙이며,
+    If-None-Match가 같으면 304를 반환한다.
     응답 시간 목표: 5초 이내
 
     Args:
+        request: HTTP 요청 (If-None-Match 확인용)
         theme_code: 조회할 테마의 코드
+        sort_by: 정렬 기준 컬럼 (예: "trading_volume,price")
+        order: 컬럼별 정렬 방향 (예: "desc,asc")
+        nulls: 값이 없는 종목 위치 ('first' 또는 'last')
+        stock_type: 종목 타입 ('stock' 또는 'ETF')
+        min_price, max_price: 가격 범위
+        min_volume, max_volume: 거래량 범위
+        min_market_cap, max_market_cap: 시가총액 범위
+        limit: 목록(대장주, ETF)별 최대 종목 수
 
     Returns:
-        대장주 5개 + ETF 3개
+        대장주 5개 + ETF 3개 + 데이터 기준 시각(updated_at)
     """
+    sort_columns = _split_param(sort_by)
+    sort_order = _split_param(order)
+    invalid = [column for column in sort_columns if column not in _SORTABLE_COLUMNS]
+    invalid += [direction for direction in sort_order if direction not in ("asc", "desc")]
+    if invalid:
+        raise HTTPException(
+            status_code=422,
+            detail=f"지원하지 않는 정렬 조건입니다: {', '.join(invalid)}"
+        )
+
+    ranges = {
+        "price": (min_price, max_price),
+        "trading_volume": (min_volume, max_volume),
+        "market_cap": (min_market_cap, max_market_cap),
+    }
+
+    def arrange(items: list[dict]) -> list[dict]:
+        return select_stocks(items, sort_columns, sort_order, nulls, stock_type, ranges, limit)
+
     try:
-        result = await fetch_stocks_by_theme(theme_code)
-        return {
+        store = get_data_store()
+
+        stored = store.get_theme_stocks(theme_code)
+        if not is_fresh(stored):
+            result = await fetch_stocks_by_theme(theme_code)
+            if result["stocks"] or result["etfs"]:
+                store.publish_theme_stocks(theme_code, result)
+                stored = store.get_theme_stocks(theme_code)
+            elif stored is None:
+                # 새로 계산한 결과도, 이전에 게시된 결과도 없으면 빈 결과를 그대로 반환
+                stored = {**result, "updated_at": None, "version": None}
+
+        version = stored["version"]
+        return json_response(request, {
             "theme_code": theme_code,
-            "stocks": result["stocks"],
-            "etfs": result["etfs"],
-        }
+            "stocks": arrange(stored["stocks"]),
+            "etfs": arrange(stored["etfs"]),
+            "updated_at": stored["updated_at"],
+            "version": version,
+        }, etag=version_etag(version, store.epoch) if version is not None else None, cacheable=version is not None)
     except Exception as e:
         logger.error(f"테마별 종목 조회 실패 (theme_code={theme_code}): {e}")
         raise HTTPException(
@@ -45,31 +147,107 @@ async def get_theme_stocks(theme_code: str = Path(..., description="테마 코
         )
 
 
+@router.post("/stocks/batch")
+async def get_stock_details_batch(body: StockBatchRequest, request: Request):
+    """
+    종목 상세 정보 배치 API
+
+    여러 종목의 상세 지표와 OHLCV 히스토리를 한 번의 요청으로 반환한다.
+    시장 스냅샷 등 공통 데이터는 한 번만 조회해 모든 종목이 공유한다.
+    Accept 헤더가 application/x-ndjson이면 수집이 끝난 종목부터 한 줄씩 스트리밍한다.
+
+    Args:
+        body: {"codes": [...], "period": "3m"} (최대 STOCK_BATCH_MAX_CODES개)
+
+    Returns:
+        {"period", "results": [{"code", "detail", "history"}]} 또는 NDJSON 스트림
+        (수집에 실패한 종목은 {"code", "error"}, 스트림이 중간에 실패하면 마지막 줄에 {"error"})
+    """
+    if _NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        async def stream():
+            try:
+                async for result in iter_stock_details(body.codes, body.period):
+                    yield dumps_json(result) + b"\n"
+            except Exception as e:
+                # 이미 200 응답을 보냈으므로 상태 코드 대신 마지막 줄로 실패를 알린다
+                logger.error(f"종목 상세 배치 스트리밍 실패: {e}")
+                yield dumps_json({"error": STOCK_DETAIL_ERROR}) + b"\n"
+
+        return StreamingResponse(stream(), media_type=_NDJSON_MEDIA_TYPE)
+
+    try:
+        results = await fetch_stock_details_batch(body.codes, body.period)
+        return {"period": body.period, "results": results}
+    except Exception as e:
+        logger.error(f"종목 상세 배치 조회 실패 ({len(body.codes)}개): {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="종목 상세 정보를 불러오는 데 실패했습니다."
+        )
+
+
+@router.get("/stocks/{code}/themes")
+async def get_stock_themes(code: str = Path(..., description="종목 코드 (예: '005930')")):
+    """
+    종목 소속 테마 API
+
+    종목이 속한 모든 테마와 테마별 거래량·급등주 수를 반환한다.
+    테마 구성 색인과 시장 스냅샷을 사용하므로 테마마다 KRX를 조회하지 않는다.
+
+    Args:
+        code: 종목 코드 (예: "005930" = 삼성전자)
+
+    Returns:
+        {"code", "name", "date", "themes": [...]} (거래량 내림차순)
+    """
+    try:
+        result = await fetch_themes_of_stock(code)
+        return {"code": code, **result}
+    except Exception as e:
+        logger.error(f"종목 소속 테마 조회 실패 (code={code}): {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="종목 소속 테마를 불러오는 데 실패했습니다."
+        )
+
+
 @router.get("/stocks/{code}")
 async def get_stock_detail_endpoint(
+    request: Request,
     code: str = Path(..., description="종목 코드 (예: '005930')"),
-    period: str = Query("3m", description="차트 기간: '1d', '1w', '1m', '3m'"),
+    period: str = Query("3m", description="차트 기간: '1d', '1w', '1m', '3m', '6m', '1y', '3y', '5y'"),
+    history_format: str = Query(
+        HISTORY_FORMAT_RECORDS,
+        alias="format",
+        pattern=f"^({HISTORY_FORMAT_RECORDS}|{HISTORY_FORMAT_COLUMNAR})$",
+        description="히스토리 형식: 'records'(봉별 객체 리스트) 또는 'columnar'(컬럼별 병렬 배열)",
+    ),
 ):
     """
     종목 상세 정보 API
 
     개별 종목의 상세 지표와 OHLCV 히스토리 데이터를 반환한다.
+    format=columnar면 히스토리를 {"date": [...], "open": [...], ...} 병렬 배열로 반환해
+    봉마다 키 이름을 반복하지 않는다.
+    응답은 orjson으로 직렬화하고 ETag를 붙이며, If-None-Match가 같으면 304를 반환한다.
     응답 시간 목표: 2초 이내
 
     Args:
+        request: HTTP 요청 (If-None-Match 확인용)
         code: 종목 코드 (예: "005930" = 삼성전자)
         period: 차트 기간 (기본값: '3m' = 3개월)
+        history_format: 히스토리 형식 (기본값: 'records')
 
     Returns:
         종목 상세 정보 (11개 지표 + OHLCV 히스토리)
     """
     try:
-        result = await fetch_stock_detail(code, period)
-        return {
+        result = await fetch_stock_detail(code, period, history_format)
+        return json_response(request, {
             "code": code,
             "detail": result["detail"],
             "history": result["history"],
-        }
+        }, cacheable=result["detail"] is not None)
     except Exception as e:
         logger.error(f"종목 상세 조회 실패 (code={code}): {e}")
         raise HTTPException(
@@ -0,0 +1,96 @@
+"""
+실시간 스트림 API 라우터 (SSE)
+
+스케줄러 갱신 결과를 Server-Sent Events로 밀어 주는 엔드포인트를 제공한다.
+프론트엔드는 REST 엔드포인트를 주기적으로 호출하는 대신 스트림을 한 번 열어 두면 된다.
+"""
+from fastapi import APIRouter, Path, Request
+from fastapi.responses import StreamingResponse
+import logging
+import os
+
+from services.broadcaster import THEMES_TOPIC, format_sse, get_broadcaster, stock_topic
+from services.data_store import get_data_store
+
+logger = logging.getLogger(__name__)
+
+# 이벤트가 없을 때 연결 유지용 주석을 보내는 간격(초)
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+# SSE 응답 헤더 (프록시 버퍼링 방지)
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+# 스트림 라우터 인스턴스 생성
+router = APIRouter()
+
+
+async def _event_stream(request: Request, topic: str, initial: bytes | None = None):
+    """
+    구독 큐의 이벤트를 SSE 응답으로 내보내는 비동기 제너레이터
+
+    클라이언트 연결이 끊기거나 서버가 종료되면 구독을 해제하고 끝난다.
+    """
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(topic)
+    try:
+        if initial:
+            yield initial
+        while True:
+            payload = await subscription.next(STREAM_HEARTBEAT_SECONDS)
+            if payload is None:
+                break
+            if await request.is_disconnected():
+                break
+            # 시간 초과면 하트비트 주석을 보낸다
+            yield payload or b": ping\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream/themes")
+async def stream_themes(request: Request):
+    """
+    테마 실시간 스트림 API
+
+    연결 직후 현재 게시된 순위를 "snapshot" 이벤트로 보내고,
+    이후 스케줄러가 갱신할 때마다 바뀐 순위와 테마별 종목 목록을 "themes" 이벤트로 보낸다.
+
+    Returns:
+        text/event-stream 응답
+    """
+    store = get_data_store()
+    rankings = {}
+    for sort in ("volume", "surge"):
+        stored = store.get_themes(sort)
+        if stored is not None:
+            rankings[sort] = stored["themes"][:5]
+    initial = format_sse("snapshot", {"rankings": rankings, "version": store.version}) if rankings else None
+
+    return StreamingResponse(
+        _event_stream(request, THEMES_TOPIC, initial),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
+@router.get("/stream/stocks/{code}")
+async def stream_stock(request: Request, code: str = Path(..., description="종목 코드 (예: '005930')")):
+    """
+    종목 시세 실시간 스트림 API
+
+    장중 갱신에서 종목의 시세(현재가, 거래량, 등락률)가 바뀔 때마다 "quote" 이벤트를 보낸다.
+
+    Args:
+        code: 종목 코드
+
+    Returns:
+        text/event-stream 응답
+    """
+    return StreamingResponse(
+        _event_stream(request, stock_topic(code)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
@@ -5,14 +5,18 @@
 
 참조: docs/08_AgentSkillDesign.md — Skill 2-1
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 import logging
 
+from middleware.http_cache import version_etag
+from middleware.json_response import json_response
 from services.theme_service import (
     fetch_themes_by_volume,
     fetch_themes_by_surge,
     search_themes as search_themes_service,
 )
+from services.data_store import get_data_store, is_fresh
+from services.surge_engine import SURGE_CHANGE_RATE_THRESHOLD, SURGE_LOOKBACK_DAYS, SURGE_MIN_VOLUME
 
 logger = logging.getLogger(__name__)
 
@@ -21,26 +25,74 @@ router = APIRouter()
 
 
 @router.get("/themes")
-async def get_themes(sort: str = Query("volume", description="정렬 기준: 'volume'(거래량) 또는 'surge'(급등주)")):
+async def get_themes(
+    request: Request,
+    sort: str = Query("volume", description="정렬 기준: 'volume'(거래량) 또는 'surge'(급등주)"),
+    threshold: float = Query(SURGE_CHANGE_RATE_THRESHOLD, description="급등주 기준 등락률(%) (sort=surge)"),
+    min_volume: int = Query(SURGE_MIN_VOLUME, ge=0, description="급등주로 셀 최소 거래량 (sort=surge)"),
+    lookback: int = Query(SURGE_LOOKBACK_DAYS, ge=1, le=60, description="비교 기간(거래일), 1 = 전일 대비 (sort=surge)"),
+):
     """
     테마 추천 API
 
     거래량 또는 급등주 기준으로 상위 5개 테마를 반환한다.
+    스케줄러가 게시한 데이터가 유효하면 저장소에서 바로 반환하고,
+    없거나 오래된 경우에만 pykrx로 다시 계산한 뒤 저장소에 게시한다.
+    급등주 조건(threshold, min_volume, lookback)을 기본값과 다르게 주면
+    저장소를 거치지 않고 전 종목 스냅샷에서 바로 계산한다.
+    응답은 orjson으로 직렬화하고 게시 버전(없으면 본문 해시)으로 ETag를 붙이며,
+    If-None-Match가 같으면 304를 반환한다.
     응답 시간 목표: 3초 이내
 
     Args:
+        request: HTTP 요청 (If-None-Match 확인용)
         sort: 정렬 기준 ('volume' = 거래량, 'surge' = 급등주)
+        threshold: 급등주 기준 등락률(%)
+        min_volume: 급등주로 셀 최소 거래량
+        lookback: 비교 기간(거래일)
 
     Returns:
-        상위 5개 테마 리스트
+        상위 5개 테마 리스트 + 데이터 기준 시각(updated_at)
     """
     try:
-        if sort == "surge":
-            themes = await fetch_themes_by_surge(limit=5)
-        else:
-            themes = await fetch_themes_by_volume(limit=5)
+        sort = "surge" if sort == "surge" else "volume"
 
-        return {"themes": themes, "sort": sort}
+        custom_surge = (threshold, min_volume, lookback) != (
+            SURGE_CHANGE_RATE_THRESHOLD, SURGE_MIN_VOLUME, SURGE_LOOKBACK_DAYS
+        )
+        if sort == "surge" and custom_surge:
+            themes = await fetch_themes_by_surge(
+                limit=5, threshold=threshold, min_volume=min_volume, lookback=lookback
+            )
+            return json_response(request, {
+                "themes": themes,
+                "sort": sort,
+                "updated_at": themes[0]["updated_at"] if themes else None,
+                "version": None,
+            }, cacheable=bool(themes))
+
+        store = get_data_store()
+
+        stored = store.get_themes(sort)
+        if not is_fresh(stored):
+            if sort == "surge":
+                themes = await fetch_themes_by_surge(limit=5)
+            else:
+                themes = await fetch_themes_by_volume(limit=5)
+            if themes:
+                store.publish_themes(sort, themes)
+                stored = store.get_themes(sort)
+            elif stored is None:
+                # 새로 계산한 결과도, 이전에 게시된 결과도 없으면 빈 결과를 그대로 반환
+                stored = {"themes": themes, "updated_at": None, "version": None}
+
+        version = stored["version"]
+        return json_response(request, {
+            "themes": stored["themes"][:5],
+            "sort": sort,
+            "updated_at": stored["updated_at"],
+            "version": version,
+        }, etag=version_etag(version, store.epoch) if version is not None else None, cacheable=version is not None)
 
     except Exception as e:
         logger.error(f"테마 조회 실패: {e}")
@@ -51,21 +103,26 @@ async def get_themes(sort: str = Query("volume", description="정렬 기준: 'vo
 
 
 @router.get("/themes/search")
-async def search_themes(q: str = Query(..., description="검색할 테마 이름")):
+async def search_themes(
+    q: str = Query(..., description="검색할 테마 이름 (초성 검색 가능, 예: 'ㅂㄷㅊ')"),
+    limit: int = Query(20, ge=1, le=100, description="최대 결과 수"),
+):
     """
     테마 검색 API
 
     사용자가 입력한 키워드로 테마를 검색한다.
-    응답 시간 목표: 2초 이내
+    정확히 일치 → 접두어 → 부분 문자열 → 초성 일치 순으로 정렬된다.
+    응답 시간 목표: 5ms 이내 (이름 색인 생성 후)
 
     Args:
-        q: 검색 키워드 (테마명)
+        q: 검색 키워드 (테마명 또는 초성)
+        limit: 최대 결과 수
 
     Returns:
         검색 결과 테마 리스트
     """
     try:
-        themes = await search_themes_service(q)
+        themes = await search_themes_service(q, limit)
         return {"themes": themes, "query": q}
     except Exception as e:
         logger.error(f"테마 검색 실패: {e}")
@@ -4,24 +4,48 @@
 Skill 4-1: 장중 5분 간격 데이터 갱신 + 장마감 후 1회 최종 업데이트
 Skill 4-2: 만료 보고서 자동 삭제는 Supabase Function(pg_cron)에서 처리
 
+여러 워커로 실행하면 모든 워커가 스케줄러를 띄우지만, 리더 임대(잠금 파일)를 가진 워커만
+갱신 작업을 실행한다. 나머지 워커는 임대를 주기적으로 다시 시도하고(리더가 죽으면 이어받음),
+그동안 리더가 공유 저장소에 게시한 갱신을 자기 SSE 구독자에게 중계한다.
+
 참조: docs/08_AgentSkillDesign.md Agent 4 섹션
 """
-import asyncio
 import logging
+import os
 from datetime import datetime
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
-from services.theme_service import fetch_themes_by_volume, fetch_themes_by_surge
-from services.stock_service import fetch_stocks_by_theme
+from services.leader_lease import LeaderLease
+from services.metrics import track_job
+from services.refresh_pipeline import RefreshPipeline, SharedUpdateRelay
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
+# 리더 임대 잠금 파일 경로 (빈 문자열이면 임대 없이 항상 갱신 작업 실행)
+SCHEDULER_LEASE_PATH = os.getenv("SCHEDULER_LEASE_PATH", "tap_scheduler.lock")
+
+# 리더가 아닌 워커가 임대를 다시 시도하는 간격(초)
+SCHEDULER_LEASE_RETRY_SECONDS = int(os.getenv("SCHEDULER_LEASE_RETRY_SECONDS", "30"))
+
+# 리더가 아닌 워커가 공유 저장소의 새 게시를 확인하는 간격(초)
+SCHEDULER_RELAY_SECONDS = int(os.getenv("SCHEDULER_RELAY_SECONDS", "5"))
+
+# 데이터 갱신 작업 id (다음 갱신 시각 계산 대상)
+_REFRESH_JOB_IDS = ("market_data_refresh", "final_data_refresh")
+
 # 스케줄러 전역 인스턴스
 scheduler: BackgroundScheduler | None = None
 
+# 갱신 작업 실행 권한 (워커 프로세스 중 하나만 보유)
+_lease = LeaderLease(SCHEDULER_LEASE_PATH)
+
+# 리더가 아닐 때 리더의 게시를 중계하는 중계기
+_relay = SharedUpdateRelay()
+
 
 def start_scheduler():
     """
@@ -32,9 +56,12 @@ def start_scheduler():
     2. 장마감 후 (15:40, 월~금): 최종 데이터 일괄 업데이트
 
     스케줄러는 별도 스레드에서 실행되므로 API 응답에 영향을 주지 않는다.
+    갱신 작업은 리더 임대를 가진 워커에서만 실행되고,
+    나머지 워커에서는 임대 재시도와 게시 중계 작업만 실제로 동작한다.
     """
     global scheduler
 
+    _lease.try_acquire()
     scheduler = BackgroundScheduler()
 
     # ============================================
@@ -69,8 +96,27 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    # ============================================
+    # 리더 임대 재시도 + 리더 게시 중계 (리더가 아닌 워커)
+    # ============================================
+    scheduler.add_job(
+        renew_leader_lease,
+        IntervalTrigger(seconds=SCHEDULER_LEASE_RETRY_SECONDS),
+        id='leader_lease',
+        name='스케줄러 리더 임대 재시도',
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        relay_shared_updates,
+        IntervalTrigger(seconds=SCHEDULER_RELAY_SECONDS),
+        id='shared_update_relay',
+        name='리더 게시 중계',
+        replace_existing=True,
+    )
+
     scheduler.start()
-    logger.info("스케줄러가 성공적으로 시작되었습니다. (장중 5분 갱신 + 15:40 최종 갱신)")
+    role = "리더" if _lease.held else "대기 (다른 워커가 갱신 담당)"
+    logger.info(f"스케줄러가 성공적으로 시작되었습니다. (장중 5분 갱신 + 15:40 최종 갱신, 역할: {role})")
 
 
 def stop_scheduler():
@@ -83,32 +129,77 @@ def stop_scheduler():
     if scheduler and scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("스케줄러가 종료되었습니다.")
+    _lease.release()
+
+
+def get_scheduler_status() -> dict:
+    """
+    스케줄러 역할 상태를 반환하는 함수 (헬스 체크용)
+
+    Returns:
+        {"running", "leader", "pid", "leader_pid"}
+    """
+    return {
+        "running": bool(scheduler and scheduler.running),
+        "leader": _lease.held,
+        "pid": os.getpid(),
+        "leader_pid": _lease.holder(),
+    }
+
+
+def renew_leader_lease():
+    """리더가 아니면 임대를 다시 시도한다 (이전 리더가 종료됐으면 이어받는다)"""
+    if not _lease.held and _lease.try_acquire():
+        logger.info("이전 리더가 종료되어 이 워커가 갱신 작업을 이어받습니다.")
+
+
+def relay_shared_updates():
+    """리더가 아니면 리더가 공유 저장소에 게시한 갱신을 이 워커의 구독자에게 전달한다"""
+    if _lease.held:
+        return
+    try:
+        _relay.poll()
+    except Exception as error:
+        logger.warning(f"리더 게시 중계 실패: {error}")
+
+
+def get_next_refresh_time() -> datetime | None:
+    """
+    다음 데이터 갱신 예정 시각을 반환하는 함수
+
+    HTTP 캐시 유효 시간(Cache-Control max-age) 계산에 사용한다.
+
+    Returns:
+        장중 갱신과 최종 갱신 중 가장 가까운 실행 시각 (스케줄러가 실행 중이 아니면 None)
+    """
+    if scheduler is None or not scheduler.running:
+        return None
+    run_times = [
+        job.next_run_time
+        for job in scheduler.get_jobs()
+        if job.id in _REFRESH_JOB_IDS and job.next_run_time is not None
+    ]
+    return min(run_times) if run_times else None
 
 
 def refresh_market_data():
     """
     장중 데이터를 갱신하는 함수
 
-    테마별 거래량 상위 5개를 조회한 뒤,
-    각 테마의 종목 데이터(현재가, 거래량, 시가총액)를 업데이트한다.
-    5분 간격으로 호출된다.
+    모든 테마의 거래량 순위를 계산한 뒤,
+    거래량 상위 테마의 종목 데이터(현재가, 거래량, 시가총액)를 업데이트한다.
+    수집은 갱신 파이프라인의 스레드 풀에서 병렬로 처리되고,
+    결과는 데이터 저장소에 게시되어 API 응답에 그대로 사용된다.
+    5분 간격으로 호출된다. 리더가 아닌 워커에서는 아무것도 하지 않는다.
     """
+    if not _lease.held:
+        return
     try:
         now = datetime.now()
         logger.info(f"[{now.strftime('%H:%M')}] 장중 데이터 갱신 시작")
 
-        # 거래량 기준 상위 테마 조회 (async 함수이므로 asyncio.run으로 실행)
-        themes = asyncio.run(fetch_themes_by_volume())
-        logger.info(f"테마 {len(themes)}개 갱신 완료")
-
-        # 각 테마별 종목 데이터 갱신
-        for theme in themes[:5]:
-            theme_code = theme.get("code", "")
-            if theme_code:
-                asyncio.run(fetch_stocks_by_theme(theme_code))
-                logger.info(f"테마 '{theme.get('name', '')}' 종목 갱신 완료")
-
-        logger.info("장중 데이터 갱신 완료")
+        with track_job("market_data_refresh"):
+            RefreshPipeline().run_intraday()
 
     except Exception as error:
         logger.error(f"장중 데이터 갱신 실패: {error}")
@@ -118,34 +209,18 @@ def refresh_final_data():
     """
     장마감 후 최종 데이터를 갱신하는 함수
 
+    모든 테마의 거래량·급등주 순위와 종목 목록, 그리고
     PER, PBR, 배당수익률, 투자자별 거래량 등
-    장 마감 후에만 확정되는 데이터를 업데이트한다.
-    매일 15:40에 1회 호출된다.
+    장 마감 후에만 확정되는 데이터를 업데이트하고 데이터 저장소에 게시한다.
+    매일 15:40에 1회 호출된다. 리더가 아닌 워커에서는 아무것도 하지 않는다.
     """
+    if not _lease.held:
+        return
     try:
         logger.info("장마감 후 최종 데이터 갱신 시작")
 
-        # 거래량 + 급등주 기준 모두 갱신 (async 함수이므로 asyncio.run으로 실행)
-        volume_themes = asyncio.run(fetch_themes_by_volume())
-        surge_themes = asyncio.run(fetch_themes_by_surge())
-
-        # 중복 제거를 위해 코드 기준으로 합치기
-        all_theme_codes = set()
-        all_themes = []
-
-        for theme in volume_themes + surge_themes:
-            code = theme.get("code", "")
-            if code and code not in all_theme_codes:
-                all_theme_codes.add(code)
-                all_themes.append(theme)
-
-        # 각 테마의 종목 데이터 전체 갱신 (상세 지표 포함)
-        for theme in all_themes:
-            theme_code = theme.get("code", "")
-            if theme_code:
-                asyncio.run(fetch_stocks_by_theme(theme_code))
-
-        logger.info(f"장마감 후 최종 데이터 갱신 완료 (테마 {len(all_themes)}개)")
+        with track_job("final_data_refresh"):
+            RefreshPipeline().run_final()
 
     except Exception as error:
         logger.error(f"장마감 후 최종 데이터 갱신 실패: {error}")
@@ -0,0 +1,214 @@
+"""
+실시간 갱신 방송 서비스 (SSE)
+
+스케줄러가 갱신을 게시할 때마다 변경분을 SSE 구독자에게 밀어 준다.
+- 변경분은 주제(topic)별로 한 번만 직렬화하고, 같은 바이트를 모든 구독자에게 전달한다
+- 구독자마다 크기가 제한된 큐를 두고, 느린 구독자의 큐가 가득 차면 가장 오래된 이벤트를 버린다
+  (최신 순위·시세만 의미가 있으므로 밀린 이벤트를 쌓아 둘 필요가 없다)
+- 스케줄러는 별도 스레드에서 실행되므로, 큐 전달은 call_soon_threadsafe로 이벤트 루프에 넘긴다
+
+주제:
+- "themes": 테마 순위와 테마별 종목 목록 변경분
+- "stock:{종목 코드}": 종목 시세 변경분
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 구독자별 대기 이벤트 최대 수
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+
+# 테마 주제 이름
+THEMES_TOPIC = "themes"
+
+
+def stock_topic(code: str) -> str:
+    """종목 시세 주제 이름"""
+    return f"stock:{code}"
+
+
+def format_sse(event: str, data: dict, event_id: int | None = None) -> bytes:
+    """
+    SSE 메시지 한 건을 바이트로 직렬화하는 함수
+
+    Args:
+        event: 이벤트 이름 (예: "ranking")
+        data: JSON으로 보낼 데이터
+        event_id: 이벤트 번호 (재연결 시 Last-Event-ID로 돌아온다)
+
+    Returns:
+        "event: ...\\nid: ...\\ndata: ...\\n\\n" 형식 바이트
+    """
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class Subscription:
+    """
+    구독자 한 명의 이벤트 큐
+
+    Args:
+        topic: 구독 주제
+        queue_size: 큐 최대 크기
+    """
+
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.dropped = 0
+
+    def offer(self, payload: bytes | None):
+        """이벤트를 큐에 넣는다 (가득 차면 가장 오래된 이벤트를 버림, 이벤트 루프에서 호출)"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(payload)
+
+    async def next(self, timeout: float) -> bytes | None:
+        """
+        다음 이벤트를 기다리는 함수
+
+        Args:
+            timeout: 최대 대기 시간(초)
+
+        Returns:
+            이벤트 바이트, 시간 초과 시 b"" (하트비트용), 방송 종료 시 None
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return b""
+
+
+class Broadcaster:
+    """
+    주제별 구독자에게 이벤트를 한 번 직렬화해 나눠 주는 방송기
+
+    Args:
+        queue_size: 구독자별 큐 크기
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._event_id = 0
+        self.published = 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """이벤트를 전달할 이벤트 루프를 지정한다 (서버 시작 시 호출)"""
+        self._loop = loop
+
+    def subscribe(self, topic: str) -> Subscription:
+        """주제를 구독한다 (이벤트 루프에서 호출)"""
+        subscription = Subscription(topic, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """구독을 해제한다"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        """주제에 구독자가 있는지 확인한다 (없으면 직렬화를 건너뛸 수 있다)"""
+        return topic in self._subscribers
+
+    def _deliver(self, topic: str, payload: bytes | None):
+        """직렬화된 이벤트를 주제의 모든 구독자 큐에 넣는다 (이벤트 루프에서 실행)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription.offer(payload)
+
+    def publish(self, topic: str, event: str, data: dict):
+        """
+        주제에 이벤트를 방송하는 함수 (어느 스레드에서든 호출 가능)
+
+        구독자가 없으면 아무것도 하지 않고, 있으면 한 번만 직렬화한다.
+
+        Args:
+            topic: 주제 이름
+            event: SSE 이벤트 이름
+            data: 보낼 데이터
+        """
+        if self._loop is None or not self.has_subscribers(topic):
+            return
+        with self._lock:
+            self._event_id += 1
+            event_id = self._event_id
+        payload = format_sse(event, data, event_id)
+        self.published += 1
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, topic, payload)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힌 경우 (서버 종료 중)
+            pass
+
+    def close(self):
+        """모든 구독자에게 종료를 알린다 (서버 종료 시 이벤트 루프에서 호출)"""
+        with self._lock:
+            topics = list(self._subscribers)
+        for topic in topics:
+            self._deliver(topic, None)
+
+    def stats(self) -> dict:
+        """주제 수, 구독자 수, 방송 수, 느린 구독자 때문에 버린 이벤트 수를 반환한다"""
+        with self._lock:
+            subscriptions = [s for subscribers in self._subscribers.values() for s in subscribers]
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": len(subscriptions),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscriptions),
+        }
+
+
+# 앱 전체가 공유하는 방송기
+_broadcaster = Broadcaster()
+
+
+def get_broadcaster() -> Broadcaster:
+    """공유 방송기 인스턴스를 반환한다"""
+    return _broadcaster
+
+
+def publish_refresh_delta(delta: dict):
+    """
+    갱신 파이프라인의 변경분을 주제별 SSE 이벤트로 나눠 방송하는 함수
+
+    refresh_pipeline.add_delta_listener에 등록되어 스케줄러 스레드에서 호출된다.
+
+    Args:
+        delta: {"mode", "date", "themes", "theme_stocks", "quotes"}
+    """
+    broadcaster = get_broadcaster()
+
+    if delta["themes"] or delta["theme_stocks"]:
+        broadcaster.publish(THEMES_TOPIC, "themes", {
+            "mode": delta["mode"],
+            "date": delta["date"],
+            "rankings": delta["themes"],
+            "theme_stocks": delta["theme_stocks"],
+        })
+
+    for code, quote in delta["quotes"].items():
+        topic = stock_topic(code)
+        if broadcaster.has_subscribers(topic):
+            broadcaster.publish(topic, "quote", {"code": code, "date": delta["date"], **quote})
@@ -0,0 +1,519 @@
+"""
+사전 계산 데이터 저장소 (Agent 4 결과 보관)
+
+스케줄러가 계산한 테마 순위, 테마별 종목 목록, 종목 상세 지표를 버전과 함께 저장하고,
+API 라우터는 pykrx를 다시 호출하는 대신 이 저장소의 데이터를 그대로 반환한다.
+
+저장 형식은 supabase/migrations/001_create_tables.sql의
+themes / stocks / stock_details 테이블 컬럼을 그대로 따른다.
+- memory: 프로세스 메모리 (단일 워커 기본값, 테스트용)
+- sqlite: 로컬 SQLite 파일 (DATA_STORE_PATH, 여러 워커가 같은 파일을 공유하므로 WEB_CONCURRENCY > 1이면 기본값)
+
+참조: docs/08_AgentSkillDesign.md — Agent 4 섹션
+"""
+import copy
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+from datetime import datetime, time, timedelta
+
+logger = logging.getLogger(__name__)
+
+# uvicorn 워커 수 (uvicorn --workers의 기본값으로도 쓰이는 환경 변수)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# 저장소 백엔드 선택 (memory 또는 sqlite)
+# 워커가 여럿이면 스케줄러 리더가 게시한 데이터를 모든 워커가 읽어야 하므로 sqlite를 기본값으로 한다
+DATA_STORE_BACKEND = os.getenv("DATA_STORE_BACKEND", "sqlite" if WEB_CONCURRENCY > 1 else "memory")
+DATA_STORE_PATH = os.getenv("DATA_STORE_PATH", "tap_store.sqlite3")
+
+# 장중에 저장된 데이터를 그대로 반환할 수 있는 최대 경과 시간(초)
+# 스케줄러 갱신 주기(5분)보다 넉넉하게 잡는다
+DATA_STORE_MAX_AGE_SECONDS = int(os.getenv("DATA_STORE_MAX_AGE_SECONDS", "600"))
+
+# 스케줄러 갱신 시간대 (평일 09:00~15:55 5분 간격, 15:40 최종 갱신)
+# 마지막 갱신 이후 게시된 데이터는 다음 장 시작까지 바뀌지 않는다
+_REFRESH_START = time(9, 0)
+_LAST_REFRESH = time(15, 55)
+
+# themes / stocks / stock_details 테이블 컬럼 (Supabase 스키마와 동일)
+THEME_COLUMNS = ("id", "name", "code", "trading_volume", "surge_stock_count", "updated_at")
+STOCK_COLUMNS = ("code", "theme_id", "name", "price", "trading_volume", "market_cap", "type", "updated_at")
+STOCK_DETAIL_COLUMNS = (
+    "stock_code",
+    "foreign_trading",
+    "institution_trading",
+    "individual_trading",
+    "per",
+    "pbr",
+    "industry_per",
+    "dividend_yield",
+    "updated_at",
+)
+
+
+def _pick(row: dict, columns: tuple) -> dict:
+    """테이블 컬럼에 해당하는 값만 골라낸다"""
+    return {column: row.get(column) for column in columns}
+
+
+def _theme_id(theme_code: str) -> int:
+    """테마 코드로 themes.id 값을 만든다 (theme_service와 동일한 규칙)"""
+    return int(theme_code) if theme_code.isdigit() else hash(theme_code) % 100000
+
+
+def _last_session_refresh(now: datetime) -> datetime:
+    """now 이전 가장 최근 평일의 마지막 갱신 시각"""
+    candidate = datetime.combine(now.date(), _LAST_REFRESH)
+    if candidate > now:
+        candidate -= timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate -= timedelta(days=1)
+    return candidate
+
+
+def is_fresh(
+    entry: dict | None,
+    max_age_seconds: int = DATA_STORE_MAX_AGE_SECONDS,
+    now: datetime | None = None,
+) -> bool:
+    """
+    저장된 항목이 아직 유효한지 확인하는 함수
+
+    장중에는 게시 후 max_age_seconds 동안 유효하고, 장 마감 후·주말에는
+    그날 마지막 갱신 이후 게시된 항목이 다음 장 시작까지 유효하다
+    (HTTP 캐시의 Cache-Control과 같은 기준).
+
+    Args:
+        entry: 저장소 조회 결과 (게시 시각 updated_at 포함)
+        max_age_seconds: 장중 허용 경과 시간(초)
+        now: 기준 시각 (생략 시 현재 시각)
+
+    Returns:
+        유효하면 True
+    """
+    if not entry:
+        return False
+    now = now or datetime.now()
+    published_at = datetime.fromisoformat(entry["updated_at"])
+    if (now - published_at).total_seconds() < max_age_seconds:
+        return True
+    in_session = now.weekday() < 5 and _REFRESH_START <= now.time() <= _LAST_REFRESH
+    return not in_session and published_at >= _last_session_refresh(now)
+
+
+class InMemoryDataStore:
+    """
+    프로세스 메모리 기반 저장소
+
+    테스트와 단일 프로세스 배포에서 사용한다.
+    반환값은 복사본이므로 호출자가 수정해도 저장된 데이터는 바뀌지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 재시작하면 버전 번호가 0부터 다시 시작하므로, 이전 프로세스의 버전과 구분하는 값
+        self._epoch = secrets.token_hex(4)
+        self._version = 0
+        self._publications: dict[str, dict] = {}
+        self._rankings: dict[str, dict] = {}
+        self._theme_stocks: dict[str, dict] = {}
+        self._stock_details: dict[str, dict] = {}
+
+    @property
+    def version(self) -> int:
+        """마지막으로 게시된 데이터 버전"""
+        return self._version
+
+    @property
+    def epoch(self) -> str:
+        """저장소 세대 식별자 (프로세스마다 새로 만든다)"""
+        return self._epoch
+
+    def _next_version(self, key: str) -> tuple[int, str]:
+        """버전을 1 올리고 게시 기록을 남긴다 (잠금 안에서 호출)"""
+        self._version += 1
+        published_at = datetime.now().isoformat()
+        self._publications[key] = {"version": self._version, "updated_at": published_at}
+        return self._version, published_at
+
+    def get_publication(self, key: str) -> dict | None:
+        """
+        게시 키의 버전과 게시 시각만 조회한다 (데이터 행은 읽지 않음)
+
+        Args:
+            key: 게시 키 ("themes:{정렬 기준}", "theme_stocks:{테마 티커}", "stock_details")
+
+        Returns:
+            {"version", "updated_at"} 또는 None
+        """
+        with self._lock:
+            publication = self._publications.get(key)
+            return dict(publication) if publication else None
+
+    def get_publications_since(self, version: int) -> dict[str, dict]:
+        """
+        주어진 버전 이후에 게시된 키를 조회한다
+
+        Args:
+            version: 기준 버전 (이 버전보다 큰 게시만 반환)
+
+        Returns:
+            {게시 키: {"version", "updated_at"}}
+        """
+        with self._lock:
+            return {
+                key: dict(publication)
+                for key, publication in self._publications.items()
+                if publication["version"] > version
+            }
+
+    def publish_themes(self, sort: str, themes: list[dict]) -> int:
+        """정렬 기준별 테마 순위를 저장하고 새 버전을 반환한다"""
+        rows = [_pick(theme, THEME_COLUMNS) for theme in themes]
+        with self._lock:
+            version, published_at = self._next_version(f"themes:{sort}")
+            self._rankings[sort] = {"themes": rows, "version": version, "updated_at": published_at}
+            return version
+
+    def get_themes(self, sort: str) -> dict | None:
+        """정렬 기준별 테마 순위를 조회한다 ({"themes", "version", "updated_at"})"""
+        with self._lock:
+            return copy.deepcopy(self._rankings.get(sort))
+
+    def publish_theme_stocks(self, theme_code: str, result: dict) -> int:
+        """테마별 대장주/ETF 목록을 저장하고 새 버전을 반환한다"""
+        theme_id = _theme_id(theme_code)
+        stocks = [_pick({**row, "theme_id": theme_id}, STOCK_COLUMNS) for row in result.get("stocks", [])]
+        etfs = [_pick({**row, "theme_id": theme_id}, STOCK_COLUMNS) for row in result.get("etfs", [])]
+        with self._lock:
+            version, published_at = self._next_version(f"theme_stocks:{theme_code}")
+            self._theme_stocks[theme_code] = {
+                "stocks": stocks,
+                "etfs": etfs,
+                "version": version,
+                "updated_at": published_at,
+            }
+            return version
+
+    def get_theme_stocks(self, theme_code: str) -> dict | None:
+        """테마별 종목 목록을 조회한다 ({"stocks", "etfs", "version", "updated_at"})"""
+        with self._lock:
+            return copy.deepcopy(self._theme_stocks.get(theme_code))
+
+    def publish_stock_details(self, details: list[dict]) -> int:
+        """종목 상세 지표(stock_details 행)를 저장하고 새 버전을 반환한다"""
+        rows = [_pick(detail, STOCK_DETAIL_COLUMNS) for detail in details]
+        with self._lock:
+            version, published_at = self._next_version("stock_details")
+            for row in rows:
+                self._stock_details[row["stock_code"]] = {**row, "version": version, "published_at": published_at}
+            return version
+
+    def get_stock_detail(self, stock_code: str) -> dict | None:
+        """종목 상세 지표 한 행을 조회한다"""
+        with self._lock:
+            return copy.deepcopy(self._stock_details.get(stock_code))
+
+
+class SQLiteDataStore:
+    """
+    SQLite 파일 기반 저장소
+
+    Supabase 테이블과 같은 컬럼을 사용한다.
+    단, 한 종목이 여러 테마에 속할 수 있으므로 stocks 테이블의 기본 키는
+    (theme_code, code) 복합 키로 두고, 순위(rank)와 게시 정보를 위한 보조 테이블을 둔다.
+    거래량·급등주 순위는 같은 테마를 서로 다른 시점의 값으로 게시하므로,
+    순위별로 달라지는 값(trading_volume, surge_stock_count, updated_at)은 theme_rankings 행에 둔다.
+    """
+
+    # 이전 스키마 파일에 추가할 theme_rankings 컬럼
+    _RANKING_COLUMNS = (
+        ("trading_volume", "INTEGER DEFAULT 0"),
+        ("surge_stock_count", "INTEGER DEFAULT 0"),
+        ("updated_at", "TEXT"),
+    )
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS store_meta (
+      key TEXT PRIMARY KEY,
+      value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS themes (
+      id INTEGER,
+      name TEXT NOT NULL,
+      code TEXT PRIMARY KEY,
+      trading_volume INTEGER DEFAULT 0,
+      surge_stock_count INTEGER DEFAULT 0,
+      updated_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS theme_rankings (
+      sort TEXT NOT NULL,
+      rank INTEGER NOT NULL,
+      theme_code TEXT NOT NULL,
+      trading_volume INTEGER DEFAULT 0,
+      surge_stock_count INTEGER DEFAULT 0,
+      updated_at TEXT,
+      PRIMARY KEY (sort, rank)
+    );
+    CREATE TABLE IF NOT EXISTS stocks (
+      code TEXT NOT NULL,
+      theme_id INTEGER,
+      theme_code TEXT NOT NULL,
+      name TEXT NOT NULL,
+      price REAL NOT NULL DEFAULT 0,
+      trading_volume INTEGER DEFAULT 0,
+      market_cap INTEGER DEFAULT 0,
+      type TEXT DEFAULT 'stock' CHECK (type IN ('stock', 'ETF')),
+      rank INTEGER NOT NULL,
+      updated_at TEXT,
+      PRIMARY KEY (theme_code, code)
+    );
+    CREATE TABLE IF NOT EXISTS stock_details (
+      stock_code TEXT PRIMARY KEY,
+      foreign_trading INTEGER DEFAULT 0,
+      institution_trading INTEGER DEFAULT 0,
+      individual_trading INTEGER DEFAULT 0,
+      per REAL,
+      pbr REAL,
+      industry_per REAL,
+      dividend_yield REAL,
+      updated_at TEXT,
+      version INTEGER NOT NULL,
+      published_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS publications (
+      key TEXT PRIMARY KEY,
+      version INTEGER NOT NULL,
+      published_at TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = DATA_STORE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            # 읽기와 쓰기가 서로를 막지 않도록 WAL 모드 사용
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(theme_rankings)")}
+        for column, definition in self._RANKING_COLUMNS:
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE theme_rankings ADD COLUMN {column} {definition}")
+        # 파일을 처음 만든 워커가 세대 식별자를 정하고, 같은 파일을 쓰는 워커는 그 값을 공유한다
+        self._conn.execute(
+            "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('epoch', ?)", (secrets.token_hex(4),)
+        )
+        self._conn.commit()
+        self._epoch = self._conn.execute("SELECT value FROM store_meta WHERE key = 'epoch'").fetchone()["value"]
+
+    @property
+    def version(self) -> int:
+        """마지막으로 게시된 데이터 버전"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+        return int(row["value"]) if row else 0
+
+    @property
+    def epoch(self) -> str:
+        """저장소 세대 식별자 (파일을 새로 만들면 바뀐다)"""
+        return self._epoch
+
+    def _next_version(self, key: str) -> tuple[int, str]:
+        """버전을 1 올리고 게시 기록을 남긴다 (잠금과 트랜잭션 안에서 호출)"""
+        # 다른 워커 프로세스와 버전 번호가 겹치지 않도록 읽기 전에 쓰기 잠금을 잡는다
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+        version = (int(row["value"]) if row else 0) + 1
+        published_at = datetime.now().isoformat()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('version', ?)", (str(version),)
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO publications (key, version, published_at) VALUES (?, ?, ?)",
+            (key, version, published_at),
+        )
+        return version, published_at
+
+    def _publication(self, key: str):
+        return self._conn.execute(
+            "SELECT version, published_at FROM publications WHERE key = ?", (key,)
+        ).fetchone()
+
+    def get_publication(self, key: str) -> dict | None:
+        """
+        게시 키의 버전과 게시 시각만 조회한다 (데이터 행은 읽지 않음)
+
+        Args:
+            key: 게시 키 ("themes:{정렬 기준}", "theme_stocks:{테마 티커}", "stock_details")
+
+        Returns:
+            {"version", "updated_at"} 또는 None
+        """
+        with self._lock:
+            publication = self._publication(key)
+        if publication is None:
+            return None
+        return {"version": publication["version"], "updated_at": publication["published_at"]}
+
+    def get_publications_since(self, version: int) -> dict[str, dict]:
+        """
+        주어진 버전 이후에 게시된 키를 조회한다 (다른 워커가 게시한 것 포함)
+
+        Args:
+            version: 기준 버전 (이 버전보다 큰 게시만 반환)
+
+        Returns:
+            {게시 키: {"version", "updated_at"}}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, version, published_at FROM publications WHERE version > ?", (version,)
+            ).fetchall()
+        return {row["key"]: {"version": row["version"], "updated_at": row["published_at"]} for row in rows}
+
+    def publish_themes(self, sort: str, themes: list[dict]) -> int:
+        """정렬 기준별 테마 순위를 저장하고 새 버전을 반환한다"""
+        rows = [_pick(theme, THEME_COLUMNS) for theme in themes]
+        with self._lock, self._conn:
+            version, _ = self._next_version(f"themes:{sort}")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO themes (id, name, code, trading_volume, surge_stock_count, updated_at) "
+                "VALUES (:id, :name, :code, :trading_volume, :surge_stock_count, :updated_at)",
+                rows,
+            )
+            self._conn.execute("DELETE FROM theme_rankings WHERE sort = ?", (sort,))
+            self._conn.executemany(
+                "INSERT INTO theme_rankings (sort, rank, theme_code, trading_volume, surge_stock_count, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (sort, rank, row["code"], row["trading_volume"], row["surge_stock_count"], row["updated_at"])
+                    for rank, row in enumerate(rows)
+                ],
+            )
+            return version
+
+    def get_themes(self, sort: str) -> dict | None:
+        """정렬 기준별 테마 순위를 조회한다 ({"themes", "version", "updated_at"})"""
+        with self._lock:
+            publication = self._publication(f"themes:{sort}")
+            if publication is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT t.id, t.name, t.code, r.trading_volume, r.surge_stock_count, r.updated_at "
+                "FROM theme_rankings r JOIN themes t ON t.code = r.theme_code "
+                "WHERE r.sort = ? ORDER BY r.rank",
+                (sort,),
+            ).fetchall()
+        return {
+            "themes": [dict(row) for row in rows],
+            "version": publication["version"],
+            "updated_at": publication["published_at"],
+        }
+
+    def publish_theme_stocks(self, theme_code: str, result: dict) -> int:
+        """테마별 대장주/ETF 목록을 저장하고 새 버전을 반환한다"""
+        theme_id = _theme_id(theme_code)
+        rows = []
+        for rank, row in enumerate(result.get("stocks", []) + result.get("etfs", [])):
+            values = _pick({**row, "theme_id": theme_id}, STOCK_COLUMNS)
+            values.update({"theme_code": theme_code, "rank": rank})
+            rows.append(values)
+
+        with self._lock, self._conn:
+            version, _ = self._next_version(f"theme_stocks:{theme_code}")
+            self._conn.execute("DELETE FROM stocks WHERE theme_code = ?", (theme_code,))
+            self._conn.executemany(
+                "INSERT INTO stocks (code, theme_id, theme_code, name, price, trading_volume, market_cap, type, rank, updated_at) "
+                "VALUES (:code, :theme_id, :theme_code, :name, :price, :trading_volume, :market_cap, :type, :rank, :updated_at)",
+                rows,
+            )
+            return version
+
+    def get_theme_stocks(self, theme_code: str) -> dict | None:
+        """테마별 종목 목록을 조회한다 ({"stocks", "etfs", "version", "updated_at"})"""
+        with self._lock:
+            publication = self._publication(f"theme_stocks:{theme_code}")
+            if publication is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT code, theme_id, name, price, trading_volume, market_cap, type, updated_at "
+                "FROM stocks WHERE theme_code = ? ORDER BY rank",
+                (theme_code,),
+            ).fetchall()
+
+        stocks = [dict(row) for row in rows]
+        for row in stocks:
+            # SQLite REAL로 저장된 가격을 원래 정수 형태로 되돌린다
+            if isinstance(row["price"], float) and row["price"].is_integer():
+                row["price"] = int(row["price"])
+        return {
+            "stocks": [row for row in stocks if row["type"] == "stock"],
+            "etfs": [row for row in stocks if row["type"] == "ETF"],
+            "version": publication["version"],
+            "updated_at": publication["published_at"],
+        }
+
+    def publish_stock_details(self, details: list[dict]) -> int:
+        """종목 상세 지표(stock_details 행)를 저장하고 새 버전을 반환한다"""
+        rows = [_pick(detail, STOCK_DETAIL_COLUMNS) for detail in details]
+        with self._lock, self._conn:
+            version, published_at = self._next_version("stock_details")
+            for row in rows:
+                row.update({"version": version, "published_at": published_at})
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO stock_details (stock_code, foreign_trading, institution_trading, "
+                "individual_trading, per, pbr, industry_per, dividend_yield, updated_at, version, published_at) "
+                "VALUES (:stock_code, :foreign_trading, :institution_trading, :individual_trading, :per, :pbr, "
+                ":industry_per, :dividend_yield, :updated_at, :version, :published_at)",
+                rows,
+            )
+            return version
+
+    def get_stock_detail(self, stock_code: str) -> dict | None:
+        """종목 상세 지표 한 행을 조회한다"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM stock_details WHERE stock_code = ?", (stock_code,)
+            ).fetchone()
+        return dict(row) if row else None
+
+
+# 저장소 전역 인스턴스 (최초 사용 시 생성)
+_data_store: InMemoryDataStore | SQLiteDataStore | None = None
+_data_store_lock = threading.Lock()
+
+
+def get_data_store() -> InMemoryDataStore | SQLiteDataStore:
+    """
+    설정된 백엔드의 저장소 인스턴스를 반환하는 함수
+
+    Returns:
+        DATA_STORE_BACKEND 설정에 따른 저장소 (기본값: 메모리)
+    """
+    global _data_store
+    if _data_store is None:
+        with _data_store_lock:
+            if _data_store is None:
+                if DATA_STORE_BACKEND == "sqlite":
+                    _data_store = SQLiteDataStore(DATA_STORE_PATH)
+                else:
+                    _data_store = InMemoryDataStore()
+                logger.info(f"데이터 저장소 초기화 완료 (백엔드: {DATA_STORE_BACKEND})")
+    return _data_store
+
+
+def set_data_store(store: InMemoryDataStore | SQLiteDataStore | None):
+    """
+    저장소 인스턴스를 교체하는 함수 (테스트에서 사용)
+
+    Args:
+        store: 사용할 저장소 (None이면 다음 호출 시 설정값으로 다시 생성)
+    """
+    global _data_store
+    with _data_store_lock:
+        _data_store = store
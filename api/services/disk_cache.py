@@ -0,0 +1,348 @@
+"""
+pykrx 응답 디스크 캐시
+
+마감된 거래일의 KRX 데이터는 바뀌지 않으므로, pykrx 호출 결과를 (함수 이름, 인자) 해시를 파일 이름으로
+KRX_DISK_CACHE_DIR에 저장해 두고 같은 호출은 네트워크 대신 디스크에서 돌려준다.
+서버를 다시 시작해도(여러 워커가 같은 디렉터리를 써도) 그대로 재사용된다.
+
+- 인자의 날짜(YYYYMMDD)가 모두 오늘 이전이면 만료 없이 보관한다
+- 오늘 날짜가 있거나 날짜 인자가 없으면(당일 세션) KRX_DISK_CACHE_SESSION_TTL_SECONDS 동안만 유효하다
+- 값은 컬럼별 numpy 배열로 npz 파일에 저장한다 (pickle 없음)
+- 전체 크기가 KRX_DISK_CACHE_MAX_MB를 넘으면 가장 오래 쓰지 않은 파일부터 지운다 (LRU)
+- 빈 결과와 저장할 수 없는 형식(문자열·숫자 외 객체 컬럼 등)은 저장하지 않는다
+
+krx_client._invoke가 전용 풀의 작업 스레드에서 호출하므로 파일 입출력이 이벤트 루프를 막지 않는다.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 캐시 파일 디렉터리 (빈 문자열이면 사용하지 않음)
+KRX_DISK_CACHE_DIR = os.getenv("KRX_DISK_CACHE_DIR", "tap_krx_cache")
+
+# 캐시 전체 최대 크기(MB)
+KRX_DISK_CACHE_MAX_MB = float(os.getenv("KRX_DISK_CACHE_MAX_MB", "256"))
+
+# 당일 세션 데이터의 유효 시간(초)
+KRX_DISK_CACHE_SESSION_TTL_SECONDS = float(os.getenv("KRX_DISK_CACHE_SESSION_TTL_SECONDS", "60"))
+
+# 캐시에 없음을 나타내는 표식 (None도 저장 가능한 값과 구분)
+MISS = object()
+
+# 날짜 인자 형식 (종목 코드는 6자리, 테마 티커는 4자리이므로 8자리 숫자만 날짜로 본다)
+_DATE_PATTERN = re.compile(r"^\d{8}$")
+
+
+class UnsupportedValue(Exception):
+    """npz로 저장할 수 없는 값"""
+
+
+def _cache_key(func_name: str, args: tuple, kwargs: dict) -> str:
+    """함수 이름과 인자로 캐시 키(파일 이름)를 만든다"""
+    text = repr((func_name, args, sorted(kwargs.items())))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _date_arguments(args: tuple, kwargs: dict) -> list[str]:
+    """인자 중 날짜(YYYYMMDD 문자열, date·datetime·Timestamp)를 모은다"""
+    dates = []
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, str) and _DATE_PATTERN.match(value):
+            dates.append(value)
+        elif isinstance(value, (date, datetime)):
+            dates.append(value.strftime("%Y%m%d"))
+    return dates
+
+
+def expires_at(args: tuple, kwargs: dict, now: float | None = None) -> float:
+    """
+    호출 결과의 만료 시각을 계산하는 함수
+
+    Args:
+        args, kwargs: pykrx 함수 인자
+        now: 기준 시각(epoch 초, 생략 시 현재)
+
+    Returns:
+        만료 시각(epoch 초), 만료 없음이면 0
+    """
+    now = time.time() if now is None else now
+    today = datetime.fromtimestamp(now).strftime("%Y%m%d")
+    dates = _date_arguments(args, kwargs)
+    if dates and max(dates) < today:
+        return 0.0
+    return now + KRX_DISK_CACHE_SESSION_TTL_SECONDS
+
+
+def _column_array(values) -> np.ndarray:
+    """pandas 컬럼·인덱스 값을 pickle 없이 저장할 수 있는 배열로 바꾼다"""
+    array = np.asarray(values)
+    if array.dtype != object:
+        return array
+    if all(isinstance(item, str) for item in array.tolist()):
+        return array.astype(str)
+    raise UnsupportedValue(f"저장할 수 없는 객체 컬럼: {type(array.tolist()[0]).__name__}")
+
+
+def _encode(value) -> dict[str, np.ndarray] | None:
+    """
+    pykrx 반환값을 npz 배열 묶음으로 바꾸는 함수
+
+    Returns:
+        {배열 이름: 배열} (빈 결과면 None)
+
+    Raises:
+        UnsupportedValue: 저장할 수 없는 형식
+    """
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        if value.empty:
+            return None
+        arrays = {
+            "kind": np.array("frame"),
+            "index": _column_array(value.index),
+            "index_name": np.array(value.index.name or ""),
+            "columns": _column_array([str(column) for column in value.columns]),
+        }
+        for position, column in enumerate(value.columns):
+            arrays[f"column_{position}"] = _column_array(value[column].to_numpy())
+        return arrays
+    if isinstance(value, pd.Series):
+        if value.empty:
+            return None
+        return {
+            "kind": np.array("series"),
+            "index": _column_array(value.index),
+            "index_name": np.array(value.index.name or ""),
+            "name": np.array("" if value.name is None else str(value.name)),
+            "values": _column_array(value.to_numpy()),
+        }
+    if isinstance(value, list):
+        if not value:
+            return None
+        if all(isinstance(item, str) for item in value):
+            return {"kind": np.array("list"), "values": np.array(value, dtype=str)}
+        if all(isinstance(item, pd.Timestamp) for item in value):
+            return {"kind": np.array("timestamps"), "values": pd.DatetimeIndex(value).to_numpy()}
+    raise UnsupportedValue(f"저장할 수 없는 반환 형식: {type(value).__name__}")
+
+
+def _index(values: np.ndarray, name: str):
+    import pandas as pd
+
+    return pd.Index(values, name=name or None)
+
+
+def _decode(data) -> object:
+    """npz 배열 묶음을 pykrx 반환값으로 되돌린다"""
+    import pandas as pd
+
+    kind = str(data["kind"])
+    if kind == "frame":
+        columns = data["columns"].tolist()
+        return pd.DataFrame(
+            {column: data[f"column_{position}"] for position, column in enumerate(columns)},
+            index=_index(data["index"], str(data["index_name"])),
+            columns=columns,
+        )
+    if kind == "series":
+        name = str(data["name"]) or None
+        return pd.Series(data["values"], index=_index(data["index"], str(data["index_name"])), name=name)
+    if kind == "list":
+        return data["values"].tolist()
+    if kind == "timestamps":
+        return list(pd.DatetimeIndex(data["values"]))
+    raise UnsupportedValue(f"알 수 없는 캐시 형식: {kind}")
+
+
+class DiskCache:
+    """
+    크기 제한과 LRU 제거를 적용한 npz 파일 캐시
+
+    Args:
+        directory: 캐시 파일 디렉터리 (빈 문자열이면 사용하지 않음)
+        max_bytes: 전체 최대 크기(바이트)
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # 키 → 파일 크기 (앞쪽이 가장 오래 쓰지 않은 항목)
+        self._entries: OrderedDict[str, int] | None = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0, "skipped": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _load_entries(self):
+        """디렉터리의 파일을 마지막 사용 시각(mtime) 순으로 색인한다 (잠금 안에서 최초 1회)"""
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        if not os.path.isdir(self.directory):
+            return
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name.removesuffix(".npz"), stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _forget(self, key: str):
+        """색인과 파일에서 항목을 지운다 (잠금 안에서 호출)"""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, func_name: str, args: tuple, kwargs: dict):
+        """
+        저장된 호출 결과를 찾는 함수
+
+        Returns:
+            저장된 값, 없거나 만료됐으면 MISS
+        """
+        if not self.enabled:
+            return MISS
+        key = _cache_key(func_name, args, kwargs)
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                expires = float(data["expires_at"])
+                if expires and expires < time.time():
+                    value = MISS
+                else:
+                    value = _decode(data)
+        except FileNotFoundError:
+            value = None
+        except Exception as e:
+            logger.warning(f"KRX 디스크 캐시 읽기 실패 ({func_name}): {e}")
+            value = MISS
+
+        with self._lock:
+            self._load_entries()
+            if value is None:
+                # 다른 워커가 지웠거나 아직 저장하지 않은 항목
+                self._entries.pop(key, None)
+                self._stats["misses"] += 1
+                return MISS
+            if value is MISS:
+                self._forget(key)
+                self._stats["expired"] += 1
+                return MISS
+            self._stats["hits"] += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            # 다시 시작해도 사용 순서를 알 수 있도록 파일 시각을 갱신한다
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, func_name: str, args: tuple, kwargs: dict, value):
+        """
+        호출 결과를 저장하는 함수 (빈 결과·저장할 수 없는 형식은 건너뜀)
+
+        Args:
+            func_name: pykrx 함수 이름
+            args, kwargs: pykrx 함수 인자
+            value: pykrx 반환값
+        """
+        if not self.enabled:
+            return
+        try:
+            arrays = _encode(value)
+        except UnsupportedValue as e:
+            logger.debug(f"KRX 디스크 캐시 저장 건너뜀 ({func_name}): {e}")
+            arrays = None
+        if arrays is None:
+            with self._lock:
+                self._stats["skipped"] += 1
+            return
+
+        key = _cache_key(func_name, args, kwargs)
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as file:
+                np.savez(file, expires_at=np.array(expires_at(args, kwargs)), **arrays)
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logger.warning(f"KRX 디스크 캐시 저장 실패 ({func_name}): {e}")
+            return
+
+        with self._lock:
+            self._load_entries()
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[key] = size
+            self._total_bytes += size
+            self._stats["writes"] += 1
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._forget(oldest)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """모든 캐시 파일을 지운다"""
+        with self._lock:
+            self._load_entries()
+            for key in list(self._entries):
+                self._forget(key)
+
+    def stats(self) -> dict:
+        """
+        캐시 지표를 반환하는 함수
+
+        Returns:
+            {"enabled", "entries", "bytes", "max_bytes", "hits", "misses", "expired", "writes", "evictions", "skipped"}
+        """
+        with self._lock:
+            if self.enabled:
+                self._load_entries()
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries or ()),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                **self._stats,
+            }
+
+
+# pykrx 응답 캐시 전역 인스턴스
+_disk_cache = DiskCache(KRX_DISK_CACHE_DIR, int(KRX_DISK_CACHE_MAX_MB * 1024 * 1024))
+
+
+def get_disk_cache() -> DiskCache:
+    """pykrx 응답 디스크 캐시 인스턴스를 반환한다"""
+    return _disk_cache
+
+
+def get_disk_cache_stats() -> dict:
+    """pykrx 응답 디스크 캐시 지표 (/api/health)"""
+    return _disk_cache.stats()
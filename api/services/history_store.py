@@ -0,0 +1,300 @@
+"""
+종목 OHLCV 히스토리 저장소
+
+차트용 일봉 데이터를 로컬 SQLite 파일(HISTORY_STORE_PATH)에 종목별로 쌓아 두고,
+요청 기간 중 저장소에 없는 구간만 pykrx에서 가져와 덧붙인다.
+이미 지난 거래일의 일봉은 바뀌지 않으므로 한 번 받은 구간은 다시 받지 않는다.
+(장 마감 전에 받은 마지막 일봉은 장중 값이므로, 마감 후 확정될 때까지 HISTORY_INTRADAY_REFRESH_SECONDS마다 다시 받는다)
+
+조회 결과는 컬럼별 배열로 반환하고, 응답용 딕셔너리 변환도 행 반복(iterrows) 없이 처리한다.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as clock_time, timedelta
+
+import numpy as np
+
+from services import krx_client
+from services.trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+# 히스토리 저장소 파일 경로
+HISTORY_STORE_PATH = os.getenv("HISTORY_STORE_PATH", "tap_history.sqlite3")
+
+# 당일 일봉을 다시 받는 최소 간격(초) — 스케줄러 갱신 주기(5분)와 맞춘다
+HISTORY_INTRADAY_REFRESH_SECONDS = int(os.getenv("HISTORY_INTRADAY_REFRESH_SECONDS", "300"))
+
+# 이 시각 이후에 받은 일봉은 확정 데이터로 본다 (market_snapshot과 같은 기준)
+_FINAL_AFTER = clock_time(15, 40)
+
+# 히스토리 컬럼 (응답 키 순서와 동일)
+HISTORY_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# pykrx 컬럼명 → 히스토리 컬럼명
+_OHLCV_SOURCE_COLUMNS = ["시가", "고가", "저가", "종가", "거래량"]
+
+# 같은 종목을 동시에 동기화하지 않도록 종목 코드별로 나눠 쓰는 잠금 수
+_SYNC_LOCK_STRIPES = 64
+
+
+def _iso_date(date_str: str) -> str:
+    """YYYYMMDD → YYYY-MM-DD"""
+    return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+
+
+def _previous_day(date_str: str) -> str:
+    """YYYYMMDD 기준 하루 전 날짜"""
+    return (datetime.strptime(date_str, "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
+
+
+def _final_timestamp(date_str: str) -> float:
+    """YYYYMMDD 거래일의 일봉이 확정되는 시각 (epoch 초)"""
+    return datetime.combine(datetime.strptime(date_str, "%Y%m%d").date(), _FINAL_AFTER).timestamp()
+
+
+def empty_history() -> dict:
+    """빈 히스토리 컬럼 딕셔너리"""
+    history = {"date": []}
+    history.update({column: np.zeros(0, dtype=np.int64) for column in HISTORY_COLUMNS})
+    return history
+
+
+def history_to_records(history: dict) -> list[dict]:
+    """
+    컬럼별 히스토리를 응답용 딕셔너리 리스트로 변환하는 함수
+
+    numpy 배열을 tolist()로 한 번에 파이썬 정수 리스트로 바꾼 뒤 묶는다.
+
+    Args:
+        history: {"date": [...], "open": ndarray, ...}
+
+    Returns:
+        [{"date", "open", "high", "low", "close", "volume"}] 리스트
+    """
+    columns = [history[column].tolist() for column in HISTORY_COLUMNS]
+    return [
+        {"date": date, "open": o, "high": h, "low": low, "close": c, "volume": v}
+        for date, o, h, low, c, v in zip(history["date"], *columns)
+    ]
+
+
+def history_to_columns(history: dict) -> dict:
+    """
+    컬럼별 히스토리를 응답용 병렬 배열 딕셔너리로 변환하는 함수
+
+    봉마다 키 이름을 반복하지 않으므로 긴 기간의 응답 크기가 크게 줄어든다.
+
+    Args:
+        history: {"date": [...], "open": ndarray, ...}
+
+    Returns:
+        {"date": [...], "open": [...], "high": [...], "low": [...], "close": [...], "volume": [...]}
+    """
+    columns = {"date": list(history["date"])}
+    columns.update({column: history[column].tolist() for column in HISTORY_COLUMNS})
+    return columns
+
+
+class HistoryStore:
+    """
+    SQLite 기반 종목 일봉 저장소
+
+    ohlcv 테이블에 (종목, 날짜) 단위 일봉을 보관하고,
+    history_coverage 테이블에 종목별로 이미 받아 둔 기간을 기록한다.
+    (신규 상장 종목처럼 요청 시작일 이전 데이터가 없는 경우에도 같은 구간을 다시 받지 않기 위해)
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ohlcv (
+      code TEXT NOT NULL,
+      date TEXT NOT NULL,
+      open INTEGER NOT NULL,
+      high INTEGER NOT NULL,
+      low INTEGER NOT NULL,
+      close INTEGER NOT NULL,
+      volume INTEGER NOT NULL,
+      PRIMARY KEY (code, date)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS history_coverage (
+      code TEXT PRIMARY KEY,
+      covered_from TEXT NOT NULL,
+      covered_to TEXT NOT NULL,
+      synced_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = HISTORY_STORE_PATH):
+        self._lock = threading.Lock()
+        self._sync_locks = [threading.Lock() for _ in range(_SYNC_LOCK_STRIPES)]
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # 읽기와 쓰기가 서로를 막지 않도록 WAL 모드 사용
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.commit()
+
+    def _coverage(self, code: str) -> tuple[str, str, float] | None:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT covered_from, covered_to, synced_at FROM history_coverage WHERE code = ?", (code,)
+            ).fetchone()
+
+    def _missing_ranges(self, code: str, start: str, end: str) -> list[tuple[str, str]]:
+        """
+        요청 기간 중 pykrx에서 받아야 하는 구간을 계산하는 함수
+
+        Args:
+            code: 종목 코드
+            start: 요청 시작일 (YYYYMMDD)
+            end: 요청 종료일 (YYYYMMDD, 보통 최근 거래일)
+
+        Returns:
+            (시작일, 종료일) 구간 리스트
+        """
+        coverage = self._coverage(code)
+        if coverage is None:
+            return [(start, end)]
+
+        covered_from, covered_to, synced_at = coverage
+        ranges = []
+        if start < covered_from:
+            ranges.append((start, _previous_day(covered_from)))
+        if end > covered_to:
+            # 마지막으로 받은 날은 장중 데이터였을 수 있으므로 다시 받는다
+            ranges.append((covered_to, end))
+        elif end == covered_to and synced_at < _final_timestamp(end):
+            # 마지막 일봉을 장 마감 전에 받았다면(당일 장중, 또는 장중에 받은 뒤 날이 바뀐 경우) 확정될 때까지 다시 받는다
+            if time.time() - synced_at >= HISTORY_INTRADAY_REFRESH_SECONDS:
+                ranges.append((end, end))
+        return ranges
+
+    def _fetch_and_store(self, code: str, start: str, end: str):
+        """
+        pykrx에서 구간 일봉을 받아 저장한다 (배열 단위 변환)
+
+        받은 구간은 일봉이 있을 때, 또는 달력으로 구간에 영업일이 없음이 확인될 때만 수집 완료로 기록한다.
+        (일시적 장애로 빈 결과가 오면 다음 요청에서 다시 받는다)
+        """
+        frame = krx_client.call("get_market_ohlcv_by_date", start, end, code)
+
+        if frame is None or frame.empty:
+            if not get_trading_calendar().has_no_trading_days(start, end):
+                logger.warning(f"종목 {code} 히스토리가 비어 있어 수집 구간으로 기록하지 않습니다 ({start}~{end})")
+                return
+            rows = []
+        else:
+            dates = frame.index.strftime("%Y-%m-%d").tolist()
+            values = frame.reindex(columns=_OHLCV_SOURCE_COLUMNS).fillna(0).to_numpy(dtype=np.int64)
+            rows = list(zip(dates, *(values[:, i].tolist() for i in range(values.shape[1]))))
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ohlcv (code, date, open, high, low, close, volume) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(code, *row) for row in rows],
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO history_coverage (code, covered_from, covered_to, synced_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(code) DO UPDATE SET
+                      covered_from = MIN(covered_from, excluded.covered_from),
+                      covered_to = MAX(covered_to, excluded.covered_to),
+                      synced_at = excluded.synced_at
+                    """,
+                    (code, start, end, time.time()),
+                )
+
+    def sync(self, code: str, start: str, end: str):
+        """
+        요청 기간 중 저장소에 없는 구간만 pykrx에서 받아 오는 함수
+
+        받아 오기에 실패하면 경고만 남기고 저장된 데이터로 응답하도록 한다.
+
+        Args:
+            code: 종목 코드
+            start: 시작일 (YYYYMMDD)
+            end: 종료일 (YYYYMMDD)
+        """
+        with self._sync_locks[hash(code) % _SYNC_LOCK_STRIPES]:
+            for range_start, range_end in self._missing_ranges(code, start, end):
+                try:
+                    self._fetch_and_store(code, range_start, range_end)
+                except Exception as e:
+                    logger.warning(f"종목 {code} 히스토리 수집 실패 ({range_start}~{range_end}): {e}")
+
+    def read(self, code: str, start: str, end: str) -> dict:
+        """
+        저장된 일봉을 컬럼별 배열로 읽는 함수 (네트워크 호출 없음)
+
+        Args:
+            code: 종목 코드
+            start: 시작일 (YYYYMMDD)
+            end: 종료일 (YYYYMMDD)
+
+        Returns:
+            {"date": [YYYY-MM-DD...], "open": ndarray, "high", "low", "close", "volume"}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close, volume FROM ohlcv "
+                "WHERE code = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (code, _iso_date(start), _iso_date(end)),
+            ).fetchall()
+
+        if not rows:
+            return empty_history()
+
+        dates, *columns = zip(*rows)
+        history = {"date": list(dates)}
+        for column, values in zip(HISTORY_COLUMNS, columns):
+            history[column] = np.fromiter(values, dtype=np.int64, count=len(rows))
+        return history
+
+    def get_history(self, code: str, start: str, end: str) -> dict:
+        """
+        빠진 구간을 채운 뒤 기간 일봉을 컬럼별 배열로 반환하는 함수
+
+        Args:
+            code: 종목 코드
+            start: 시작일 (YYYYMMDD)
+            end: 종료일 (YYYYMMDD)
+
+        Returns:
+            {"date": [...], "open": ndarray, "high", "low", "close", "volume"}
+        """
+        self.sync(code, start, end)
+        return self.read(code, start, end)
+
+
+# 앱 전체가 공유하는 히스토리 저장소 (첫 사용 시 생성)
+_history_store: HistoryStore | None = None
+_history_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """공유 히스토리 저장소 인스턴스를 반환한다"""
+    global _history_store
+    if _history_store is None:
+        with _history_store_lock:
+            if _history_store is None:
+                _history_store = HistoryStore(HISTORY_STORE_PATH)
+                logger.info(f"히스토리 저장소 초기화 완료 ({HISTORY_STORE_PATH})")
+    return _history_store
+
+
+def set_history_store(store: HistoryStore | None):
+    """
+    히스토리 저장소 인스턴스를 교체하는 함수 (테스트에서 사용)
+
+    Args:
+        store: 사용할 저장소 (None이면 다음 호출 시 설정값으로 다시 생성)
+    """
+    global _history_store
+    with _history_store_lock:
+        _history_store = store
@@ -0,0 +1,87 @@
+"""
+공유 HTTP 클라이언트
+
+외부 API(Naver 검색, Google News RSS) 호출에 쓰는 httpx.AsyncClient를 앱 수명 동안 하나만 유지한다.
+요청마다 클라이언트를 새로 만들지 않으므로 TCP/TLS 연결을 재사용(keep-alive)하고,
+h2 패키지가 설치되어 있으면 HTTP/2로 여러 요청을 한 연결에 다중화한다.
+
+사용 예시:
+    client = get_http_client()
+    response = await client.get(url, params=params)
+"""
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 연결 풀 크기 (동시 연결 수, 유지할 유휴 연결 수)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+
+# 요청 1회의 기본 시간 제한(초) — 호출하는 쪽에서 timeout 인자로 덮어쓸 수 있다
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "5"))
+
+# 앱 전체가 공유하는 클라이언트 (start_http_client에서 생성)
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 지원 패키지(h2) 설치 여부"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _create_client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    """연결 풀 설정을 적용한 AsyncClient를 만든다 (transport를 주면 실제 네트워크 대신 사용)"""
+    http2 = transport is None and _http2_available()
+    if transport is None and not http2:
+        logger.info("h2 패키지가 없어 HTTP/1.1 연결 풀을 사용합니다.")
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        follow_redirects=True,
+        transport=transport,
+    )
+
+
+def start_http_client(transport: httpx.AsyncBaseTransport | None = None):
+    """
+    공유 클라이언트를 생성한다 (서버 시작 시 호출)
+
+    Args:
+        transport: 요청을 처리할 httpx 전송 계층 (벤치마크의 httpx.MockTransport 등, 생략 시 실제 네트워크)
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client(transport)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    공유 HTTP 클라이언트를 반환하는 함수
+
+    서버 수명 주기 밖(스크립트 등)에서 호출되면 그 자리에서 생성한다.
+
+    Returns:
+        httpx.AsyncClient
+    """
+    if _client is None or _client.is_closed:
+        start_http_client()
+    return _client
+
+
+async def close_http_client():
+    """공유 클라이언트의 연결을 모두 닫는다 (서버 종료 시 호출)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
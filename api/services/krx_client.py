@@ -0,0 +1,254 @@
+"""
+KRX 데이터 접근 계층
+
+모든 pykrx 호출은 이 모듈을 거친다.
+pykrx 함수는 동기(blocking) 네트워크 호출이므로 전용 스레드 풀에서 실행하고,
+호출마다 시간 제한(timeout)과 KRX 속도 제한을 적용한다.
+FastAPI 이벤트 루프는 pykrx 호출을 직접 실행하지 않으므로
+느린 요청이 있어도 /api/health 같은 가벼운 요청이 막히지 않는다.
+pykrx는 pandas·matplotlib까지 불러와 import만 1초 가까이 걸리므로 첫 호출 때(또는 워밍업 때) 불러온다.
+호출 결과는 disk_cache에 저장해 마감된 거래일 데이터는 다시 내려받지 않는다.
+
+사용 예시:
+    # 동기 코드 (스케줄러, 갱신 파이프라인, run_blocking 안)
+    tickers = krx_client.call("get_index_ticker_list", date_str, market="테마")
+
+    # 비동기 코드 (라우터, 서비스)
+    result = await krx_client.run_blocking(collect_stocks_by_theme, theme_code)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from services import metrics
+from services.disk_cache import MISS, get_disk_cache
+from services.rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# pykrx 전용 스레드 풀 크기
+KRX_MAX_WORKERS = int(os.getenv("KRX_MAX_WORKERS", "8"))
+
+# pykrx 호출 1회의 기본 시간 제한(초)
+KRX_CALL_TIMEOUT_SECONDS = float(os.getenv("KRX_CALL_TIMEOUT_SECONDS", "15"))
+
+# pykrx가 내부에 캐시한 티커 목록에서 이름만 찾는 함수들
+# 최초 1회 이후에는 네트워크를 쓰지 않으므로 풀과 속도 제한 없이 바로 실행한다
+_CACHED_LOOKUPS = {"get_market_ticker_name", "get_index_ticker_name", "get_etf_ticker_name"}
+
+# pykrx 함수를 제공하는 객체 (None이면 첫 호출 때 pykrx.stock을 불러온다, 벤치마크에서는 로컬 대역으로 교체)
+_backend = None
+_backend_lock = threading.Lock()
+
+# pykrx 전용 스레드 풀 (앱 수명 동안 유지)
+_executor = ThreadPoolExecutor(max_workers=KRX_MAX_WORKERS, thread_name_prefix="krx")
+
+# 현재 스레드가 pykrx 전용 풀의 작업 스레드인지 표시한다
+_worker_state = threading.local()
+
+# 스레드 풀 상태 지표
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0,           # 제출되었지만 아직 시작하지 않은 호출 수 (대기열 깊이)
+    "running": 0,          # 실행 중인 호출 수
+    "max_queued": 0,       # 관측된 최대 대기열 깊이
+    "completed": 0,        # 성공한 호출 수
+    "failed": 0,           # 예외로 끝난 호출 수
+    "timeouts": 0,         # 시간 제한을 넘긴 호출 수
+}
+
+
+def _update_stats(**deltas):
+    """상태 지표를 원자적으로 갱신한다"""
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+
+
+def _invoke(func_name: str, args: tuple, kwargs: dict, endpoint: str | None = None):
+    """
+    pykrx 함수를 실제로 실행하는 함수 (전용 풀의 작업 스레드에서 실행)
+
+    디스크 캐시에 유효한 결과가 있으면 KRX를 호출하지 않고 돌려준다.
+    없으면 KRX 속도 제한 토큰을 얻은 뒤 pykrx 함수를 호출하고,
+    속도 제한 대기를 뺀 호출 시간을 지표로 기록한 뒤 결과를 디스크 캐시에 저장한다.
+    """
+    disk_cache = get_disk_cache()
+    cached = disk_cache.get(func_name, args, kwargs)
+    if cached is not MISS:
+        return cached
+
+    get_rate_limiter("krx").acquire()
+    func = getattr(load_backend(), func_name)
+    started = time.perf_counter()
+    failed = True
+    try:
+        result = func(*args, **kwargs)
+        failed = False
+    finally:
+        metrics.observe_upstream("krx", func_name, time.perf_counter() - started, failed, endpoint)
+    disk_cache.put(func_name, args, kwargs, result)
+    return result
+
+
+def _run_in_worker(func_name: str, args: tuple, kwargs: dict, endpoint: str):
+    """풀에 제출된 호출의 실행 래퍼 (대기열/실행 지표 기록)"""
+    _update_stats(queued=-1, running=1)
+    _worker_state.active = True
+    _worker_state.endpoint = endpoint
+    try:
+        result = _invoke(func_name, args, kwargs, endpoint)
+        _update_stats(completed=1)
+        return result
+    except Exception:
+        _update_stats(failed=1)
+        raise
+    finally:
+        _worker_state.active = False
+        _worker_state.endpoint = None
+        _update_stats(running=-1)
+
+
+def _submit(func_name: str, args: tuple, kwargs: dict):
+    """pykrx 호출을 전용 풀에 제출하고 Future를 반환한다 (호출한 엔드포인트를 함께 넘긴다)"""
+    _update_stats(queued=1)
+    future = _executor.submit(_run_in_worker, func_name, args, kwargs, metrics.current_endpoint())
+    return future
+
+
+def _on_timeout(func_name: str, future, timeout: float) -> TimeoutError:
+    """시간 초과 처리: 아직 시작하지 않은 호출은 취소하고 예외를 만든다"""
+    if future.cancel():
+        # 시작 전에 취소되었으므로 대기열 지표를 되돌린다
+        _update_stats(queued=-1)
+    _update_stats(timeouts=1)
+    metrics.count_upstream_error("krx", func_name)
+    logger.warning(f"KRX 호출 시간 초과 ({timeout:.0f}초): {func_name}")
+    return TimeoutError(f"KRX 호출 시간 초과: {func_name}")
+
+
+def call(func_name: str, *args, timeout: float | None = None, **kwargs):
+    """
+    pykrx 함수를 동기적으로 호출하는 함수
+
+    스케줄러·갱신 파이프라인·run_blocking 안의 동기 코드에서 사용한다.
+    호출은 전용 풀에서 실행되고, 호출 스레드는 timeout초까지 결과를 기다린다.
+    (이미 전용 풀의 작업 스레드라면 교착을 피하기 위해 그 자리에서 실행한다)
+
+    Args:
+        func_name: pykrx.stock 함수 이름 (예: "get_market_ohlcv_by_date")
+        *args: pykrx 함수 위치 인자
+        timeout: 시간 제한(초), 생략 시 KRX_CALL_TIMEOUT_SECONDS
+        **kwargs: pykrx 함수 키워드 인자
+
+    Returns:
+        pykrx 함수의 반환값
+
+    Raises:
+        TimeoutError: 시간 제한 초과
+    """
+    if func_name in _CACHED_LOOKUPS:
+        with metrics.track_upstream("krx", func_name):
+            return getattr(load_backend(), func_name)(*args, **kwargs)
+    if getattr(_worker_state, "active", False):
+        return _invoke(func_name, args, kwargs, _worker_state.endpoint)
+
+    timeout = timeout or KRX_CALL_TIMEOUT_SECONDS
+    future = _submit(func_name, args, kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise _on_timeout(func_name, future, timeout) from None
+
+
+async def acall(func_name: str, *args, timeout: float | None = None, **kwargs):
+    """
+    pykrx 함수를 비동기로 호출하는 함수
+
+    이벤트 루프를 막지 않고 전용 풀의 결과를 기다린다.
+
+    Args:
+        func_name: pykrx.stock 함수 이름
+        *args: pykrx 함수 위치 인자
+        timeout: 시간 제한(초), 생략 시 KRX_CALL_TIMEOUT_SECONDS
+        **kwargs: pykrx 함수 키워드 인자
+
+    Returns:
+        pykrx 함수의 반환값
+
+    Raises:
+        TimeoutError: 시간 제한 초과
+    """
+    timeout = timeout or KRX_CALL_TIMEOUT_SECONDS
+    future = _submit(func_name, args, kwargs)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        raise _on_timeout(func_name, future, timeout) from None
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    pykrx 호출을 여러 번 하는 동기 서비스 함수를 이벤트 루프 밖에서 실행하는 함수
+
+    func는 별도 스레드에서 실행되고, 그 안의 call()은 전용 풀로 전달되어
+    호출마다 시간 제한이 적용된다.
+
+    Args:
+        func: 실행할 동기 함수
+        *args, **kwargs: func 인자
+
+    Returns:
+        func의 반환값
+    """
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+def load_backend():
+    """
+    pykrx 함수를 제공하는 객체를 반환하는 함수 (처음 호출할 때 pykrx를 불러온다)
+
+    Returns:
+        set_backend로 지정한 객체, 없으면 pykrx.stock
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                started = time.perf_counter()
+                from pykrx import stock
+                _backend = stock
+                logger.info(f"pykrx 불러오기 완료 ({time.perf_counter() - started:.2f}초)")
+    return _backend
+
+
+def set_backend(backend=None):
+    """
+    pykrx.stock 대신 호출할 객체를 지정하는 함수 (벤치마크·오프라인 실행용)
+
+    Args:
+        backend: pykrx.stock과 같은 이름의 함수를 가진 객체 (None이면 pykrx.stock으로 되돌림)
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get_pool_stats() -> dict:
+    """
+    pykrx 전용 스레드 풀의 상태 지표를 반환하는 함수
+
+    Returns:
+        {"max_workers", "queued", "running", "max_queued", "completed", "failed", "timeouts"}
+    """
+    with _stats_lock:
+        return {"max_workers": KRX_MAX_WORKERS, **_stats}
+
+
+def shutdown():
+    """전용 스레드 풀을 정리한다 (서버 종료 시 호출)"""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,98 @@
+"""
+스케줄러 리더 임대(lease) 서비스
+
+uvicorn을 여러 워커로 실행하면 lifespan이 워커마다 실행되므로,
+잠금 파일 하나에 배타적 파일 잠금(fcntl.flock)을 건 프로세스만 리더가 되어 갱신 작업을 실행한다.
+잠금은 프로세스가 종료되면(비정상 종료 포함) 운영체제가 풀어 주므로 만료 시각을 따로 관리하지 않고,
+나머지 워커는 주기적으로 잠금을 다시 시도해 리더가 사라지면 이어받는다.
+
+fcntl이 없는 환경(Windows)에서는 항상 리더로 동작한다 (단일 워커 전제).
+"""
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """
+    잠금 파일 기반 리더 임대
+
+    Args:
+        path: 잠금 파일 경로 (빈 문자열이면 잠금 없이 항상 리더)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        """이 프로세스가 리더인지 여부"""
+        return self._file is not None or not self._enabled
+
+    @property
+    def _enabled(self) -> bool:
+        return bool(self.path) and fcntl is not None
+
+    def try_acquire(self) -> bool:
+        """
+        잠금을 기다리지 않고 한 번 시도하는 함수
+
+        Returns:
+            리더가 되었거나 이미 리더면 True
+        """
+        if self.held:
+            return True
+        with self._lock:
+            if self._file is not None:
+                return True
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file = open(self.path, "a+")
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # 다른 프로세스가 리더
+                file.close()
+                return False
+
+            # 진단용으로 리더 프로세스 번호를 남긴다
+            file.seek(0)
+            file.truncate()
+            file.write(str(os.getpid()))
+            file.flush()
+            self._file = file
+        logger.info(f"스케줄러 리더 임대 획득 (pid {os.getpid()}, {self.path})")
+        return True
+
+    def release(self):
+        """잠금을 풀어 다른 프로세스가 리더가 될 수 있게 한다"""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+        logger.info(f"스케줄러 리더 임대 해제 (pid {os.getpid()})")
+
+    def holder(self) -> int | None:
+        """잠금 파일에 기록된 리더 프로세스 번호 (알 수 없으면 None)"""
+        if not self._enabled:
+            return os.getpid()
+        try:
+            with open(self.path) as file:
+                content = file.read().strip()
+        except OSError:
+            return None
+        return int(content) if content.isdigit() else None
@@ -0,0 +1,469 @@
+"""
+시장 스냅샷 서비스
+
+거래일 단위로 전 종목의 시세(OHLCV, 등락률), 시가총액, 기본적 지표(PER/PBR/DIV)를
+pykrx 전 종목 일괄 조회 API로 한 번에 가져와, 종목 코드로 색인된 컬럼 배열로 보관한다.
+테마·종목 서비스는 종목마다 KRX를 호출하는 대신 이 스냅샷에서 O(1)로 값을 조회한다.
+
+만든 스냅샷은 MARKET_SNAPSHOT_DIR에 거래일별 npz 파일로 저장해,
+여러 워커로 실행할 때 다른 워커(스케줄러 리더)가 만든 스냅샷을 KRX 호출 없이 불러오고
+서버를 다시 시작해도 마감된 거래일의 스냅샷은 다시 받지 않는다.
+
+참조: docs/08_AgentSkillDesign.md — Skill 2-1, Skill 2-2
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, time as clock_time
+
+import numpy as np
+
+from services import krx_client
+from services.metadata_index import get_metadata_index
+
+logger = logging.getLogger(__name__)
+
+# 당일 스냅샷 재사용 시간(초) — 스케줄러 갱신 주기(5분)와 맞춘다
+SNAPSHOT_MAX_AGE_SECONDS = 300
+
+# 전 종목 일괄 조회 1회의 시간 제한(초) — 종목별 조회보다 응답이 크다
+BULK_CALL_TIMEOUT_SECONDS = 60
+
+# 메모리에 보관할 최대 거래일 수 (당일 + 비교용 과거 거래일)
+MAX_CACHED_DATES = 3
+
+# 스냅샷 파일 저장 디렉터리 (빈 문자열이면 파일로 공유하지 않음)
+MARKET_SNAPSHOT_DIR = os.getenv("MARKET_SNAPSHOT_DIR", "tap_snapshots")
+
+# 디스크에 보관할 최대 거래일 수
+MAX_SAVED_DATES = 10
+
+# 이 시각 이후에 만든 스냅샷을 그 거래일의 확정 데이터로 본다 (스케줄러 최종 갱신 시각)
+_FINAL_AFTER = clock_time(15, 40)
+
+# pykrx 컬럼명 → 스냅샷 컬럼명 매핑
+_OHLCV_COLUMNS = {
+    "시가": "open",
+    "고가": "high",
+    "저가": "low",
+    "종가": "close",
+    "거래량": "volume",
+    "거래대금": "trading_value",
+    "등락률": "change_rate",
+}
+_MARKET_CAP_COLUMNS = {
+    "시가총액": "market_cap",
+    "상장주식수": "listed_shares",
+}
+_FUNDAMENTAL_COLUMNS = {
+    "PER": "per",
+    "PBR": "pbr",
+    "DIV": "dividend_yield",
+}
+
+# 실수형으로 보관하는 컬럼 (나머지는 정수형)
+_FLOAT_COLUMNS = {"change_rate", "per", "pbr", "dividend_yield"}
+
+
+class MarketSnapshot:
+    """
+    특정 거래일의 전 종목 데이터를 컬럼 배열로 보관하는 스냅샷
+
+    종목 코드 → 행 번호 색인(dict)과 컬럼별 numpy 배열로 구성된다.
+    정수형 컬럼의 결측값은 0, 실수형 컬럼의 결측값은 NaN으로 채운다.
+    """
+
+    __slots__ = ("date", "codes", "names", "index", "columns", "created_at")
+
+    def __init__(
+        self,
+        date: str,
+        codes: list[str],
+        names: list[str],
+        columns: dict[str, np.ndarray],
+        created_at: datetime | None = None,
+    ):
+        self.date = date
+        self.codes = codes
+        self.names = names
+        self.index = {code: position for position, code in enumerate(codes)}
+        self.columns = columns
+        self.created_at = created_at or datetime.now()
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.index
+
+    def position(self, code: str) -> int | None:
+        """종목 코드의 행 번호를 반환한다 (없으면 None)"""
+        return self.index.get(code)
+
+    def column(self, name: str) -> np.ndarray:
+        """컬럼 배열 전체를 반환한다 (벡터 연산용)"""
+        return self.columns[name]
+
+    def value(self, code: str, column: str, default=None):
+        """
+        종목 하나의 컬럼 값을 조회하는 함수
+
+        Args:
+            code: 종목 코드
+            column: 스냅샷 컬럼명 (예: "close", "market_cap")
+            default: 종목이 없거나 값이 결측일 때 반환할 값
+
+        Returns:
+            파이썬 기본 타입(int/float) 값 또는 default
+        """
+        position = self.index.get(code)
+        if position is None or column not in self.columns:
+            return default
+        value = self.columns[column][position]
+        if column in _FLOAT_COLUMNS:
+            return default if np.isnan(value) else float(value)
+        return int(value)
+
+    def name(self, code: str) -> str | None:
+        """종목명을 반환한다 (없으면 None)"""
+        position = self.index.get(code)
+        return self.names[position] if position is not None else None
+
+    def row(self, code: str) -> dict | None:
+        """
+        종목 하나의 전체 컬럼을 딕셔너리로 반환하는 함수
+
+        Args:
+            code: 종목 코드
+
+        Returns:
+            {"code", "name", <컬럼명>...} 딕셔너리 또는 None
+        """
+        position = self.index.get(code)
+        if position is None:
+            return None
+        row = {"code": code, "name": self.names[position]}
+        for column, values in self.columns.items():
+            value = values[position]
+            if column in _FLOAT_COLUMNS:
+                row[column] = None if np.isnan(value) else float(value)
+            else:
+                row[column] = int(value)
+        return row
+
+    def save(self, path: str):
+        """스냅샷을 npz 파일로 저장한다 (임시 파일에 쓴 뒤 교체)"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez(
+                file,
+                date=np.array(self.date),
+                created_at=np.array(self.created_at.isoformat()),
+                codes=np.array(self.codes, dtype=str),
+                names=np.array(self.names, dtype=str),
+                **{f"column_{name}": values for name, values in self.columns.items()},
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MarketSnapshot":
+        """npz 파일에서 스냅샷을 불러온다"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                str(data["date"]),
+                data["codes"].tolist(),
+                data["names"].tolist(),
+                {key.removeprefix("column_"): data[key] for key in data.files if key.startswith("column_")},
+                created_at=datetime.fromisoformat(str(data["created_at"])),
+            )
+
+
+# 거래일 → 스냅샷 캐시 (삽입 순서 = 오래된 순)
+_snapshots: dict[str, MarketSnapshot] = {}
+_snapshot_lock = threading.Lock()
+
+
+def _frame_to_columns(frame, codes: list[str], mapping: dict[str, str]) -> dict[str, np.ndarray]:
+    """
+    pykrx DataFrame을 기준 종목 순서에 맞춘 컬럼 배열로 변환하는 헬퍼 함수
+
+    Args:
+        frame: 티커를 인덱스로 하는 pykrx DataFrame (None 허용)
+        codes: 기준 종목 코드 순서
+        mapping: pykrx 컬럼명 → 스냅샷 컬럼명
+
+    Returns:
+        스냅샷 컬럼명 → numpy 배열
+    """
+    columns = {}
+    aligned = None
+    if frame is not None and not frame.empty:
+        aligned = frame.reindex(codes)
+
+    for source, target in mapping.items():
+        if target in _FLOAT_COLUMNS:
+            if aligned is not None and source in aligned.columns:
+                columns[target] = aligned[source].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                columns[target] = np.full(len(codes), np.nan, dtype=np.float64)
+        else:
+            if aligned is not None and source in aligned.columns:
+                columns[target] = aligned[source].fillna(0).to_numpy(dtype=np.int64)
+            else:
+                columns[target] = np.zeros(len(codes), dtype=np.int64)
+    return columns
+
+
+def _load_names(codes: list[str]) -> list[str]:
+    """
+    종목명을 이름 색인(거래일마다 1회 생성)에서 가져오는 함수
+
+    스냅샷을 만들 때마다 종목 수만큼 get_market_ticker_name을 호출하지 않도록
+    이름 색인을 재사용하고, 색인에 없는 종목(신규 상장 등)만 pykrx로 조회한다.
+
+    Args:
+        codes: 종목 코드 리스트
+
+    Returns:
+        종목명 리스트 (조회하지 못한 종목은 종목 코드)
+    """
+    try:
+        index = get_metadata_index().stocks
+    except Exception as e:
+        logger.warning(f"이름 색인을 불러오지 못해 종목명을 개별 조회합니다: {e}")
+        index = None
+
+    names = []
+    for code in codes:
+        name = index.name_of(code) if index is not None else None
+        if name is None:
+            try:
+                name = krx_client.call("get_market_ticker_name", code)
+            except Exception:
+                name = code
+        names.append(name)
+    return names
+
+
+def _remove_file(path: str):
+    """파일을 지운다 (다른 워커가 먼저 지웠으면 무시)"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _build_snapshot(date_str: str) -> MarketSnapshot:
+    """
+    전 종목 일괄 조회 API 3회로 스냅샷을 생성하는 함수
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD)
+
+    Returns:
+        생성된 MarketSnapshot
+
+    Raises:
+        RuntimeError: 전 종목 OHLCV 조회 결과가 비어 있음 (빈 스냅샷은 캐시하거나 저장하지 않는다)
+    """
+    started = time.perf_counter()
+
+    # 1) 전 종목 OHLCV + 등락률 (종목 목록의 기준)
+    ohlcv = krx_client.call("get_market_ohlcv_by_ticker", date_str, market="ALL", timeout=BULK_CALL_TIMEOUT_SECONDS)
+    if ohlcv is None or ohlcv.empty:
+        raise RuntimeError(f"{date_str} 전 종목 OHLCV 조회 결과가 비어 있음")
+    codes = [str(code) for code in ohlcv.index]
+
+    # 2) 전 종목 시가총액
+    try:
+        market_cap = krx_client.call("get_market_cap_by_ticker", date_str, market="ALL", timeout=BULK_CALL_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"{date_str} 전 종목 시가총액 조회 실패: {e}")
+        market_cap = None
+
+    # 3) 전 종목 기본적 지표 (PER, PBR, 배당수익률)
+    try:
+        fundamental = krx_client.call("get_market_fundamental_by_ticker", date_str, market="ALL", timeout=BULK_CALL_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"{date_str} 전 종목 펀더멘탈 조회 실패: {e}")
+        fundamental = None
+
+    columns = {}
+    columns.update(_frame_to_columns(ohlcv, codes, _OHLCV_COLUMNS))
+    columns.update(_frame_to_columns(market_cap, codes, _MARKET_CAP_COLUMNS))
+    columns.update(_frame_to_columns(fundamental, codes, _FUNDAMENTAL_COLUMNS))
+
+    snapshot = MarketSnapshot(date_str, codes, _load_names(codes), columns)
+    elapsed = time.perf_counter() - started
+    logger.info(f"{date_str} 시장 스냅샷 생성 완료 (종목 {len(codes)}개, {elapsed:.2f}초)")
+    return snapshot
+
+
+def _is_fresh(snapshot: MarketSnapshot, max_age_seconds: float) -> bool:
+    """
+    캐시된 스냅샷을 그대로 사용할 수 있는지 확인하는 헬퍼 함수
+
+    과거 거래일 데이터는 바뀌지 않으므로 그 거래일 마감 후에 만든 스냅샷이면 항상 유효하고,
+    당일 데이터(또는 장중에 만든 과거 거래일 스냅샷)는 max_age_seconds 이내에 생성된 경우에만 유효하다.
+    """
+    if snapshot.date != datetime.today().strftime("%Y%m%d"):
+        closed_at = datetime.combine(datetime.strptime(snapshot.date, "%Y%m%d").date(), _FINAL_AFTER)
+        if snapshot.created_at >= closed_at:
+            return True
+    age = (datetime.now() - snapshot.created_at).total_seconds()
+    return age < max_age_seconds
+
+
+def _snapshot_path(date_str: str) -> str:
+    return os.path.join(MARKET_SNAPSHOT_DIR, f"market_{date_str}.npz")
+
+
+def _load_from_disk(date_str: str) -> MarketSnapshot | None:
+    """저장된 스냅샷 파일을 불러온다 (파일이 없거나 읽을 수 없으면 None)"""
+    if not MARKET_SNAPSHOT_DIR:
+        return None
+    path = _snapshot_path(date_str)
+    if not os.path.exists(path):
+        return None
+    try:
+        return MarketSnapshot.load(path)
+    except Exception as e:
+        logger.warning(f"{date_str} 시장 스냅샷 파일 읽기 실패: {e}")
+        return None
+
+
+def _save_to_disk(snapshot: MarketSnapshot):
+    """스냅샷을 파일로 저장하고 오래된 거래일 파일을 지운다"""
+    if not MARKET_SNAPSHOT_DIR:
+        return
+    try:
+        os.makedirs(MARKET_SNAPSHOT_DIR, exist_ok=True)
+        snapshot.save(_snapshot_path(snapshot.date))
+        saved = sorted(name for name in os.listdir(MARKET_SNAPSHOT_DIR) if name.startswith("market_") and name.endswith(".npz"))
+        for name in saved[:-MAX_SAVED_DATES]:
+            _remove_file(os.path.join(MARKET_SNAPSHOT_DIR, name))
+    except OSError as e:
+        logger.warning(f"{snapshot.date} 시장 스냅샷 파일 저장 실패: {e}")
+
+
+def _install(snapshot: MarketSnapshot):
+    """스냅샷을 메모리 캐시에 넣는다 (잠금 안에서 호출)"""
+    _snapshots.pop(snapshot.date, None)
+    _snapshots[snapshot.date] = snapshot
+
+    # 오래된 거래일부터 제거
+    while len(_snapshots) > MAX_CACHED_DATES:
+        oldest = next(iter(_snapshots))
+        del _snapshots[oldest]
+
+
+def get_market_snapshot(date_str: str, max_age_seconds: float = SNAPSHOT_MAX_AGE_SECONDS) -> MarketSnapshot:
+    """
+    거래일의 시장 스냅샷을 반환하는 함수 (캐시 우선)
+
+    메모리 → 스냅샷 파일(다른 워커가 만든 것 포함) → KRX 조회 순으로 찾고, 새로 만든 스냅샷은 파일로 저장한다.
+    같은 거래일에 대한 동시 요청은 한 번만 KRX를 호출하도록 잠금으로 보호한다.
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD)
+        max_age_seconds: 당일 스냅샷 재사용 허용 시간(초)
+
+    Returns:
+        MarketSnapshot
+    """
+    snapshot = _snapshots.get(date_str)
+    if snapshot is not None and _is_fresh(snapshot, max_age_seconds):
+        return snapshot
+
+    with _snapshot_lock:
+        # 잠금 대기 중 다른 스레드가 이미 갱신했을 수 있으므로 다시 확인
+        snapshot = _snapshots.get(date_str)
+        if snapshot is not None and _is_fresh(snapshot, max_age_seconds):
+            return snapshot
+
+        snapshot = _load_from_disk(date_str)
+        if snapshot is not None and _is_fresh(snapshot, max_age_seconds):
+            _install(snapshot)
+            return snapshot
+
+        snapshot = _build_snapshot(date_str)
+        _install(snapshot)
+        _save_to_disk(snapshot)
+        return snapshot
+
+
+def load_shared_snapshot(date_str: str) -> MarketSnapshot | None:
+    """
+    다른 워커가 저장한 스냅샷 파일이 메모리의 것보다 새로우면 불러오는 함수 (KRX 호출 없음)
+
+    스케줄러 리더가 아닌 워커가 리더의 갱신 결과를 따라갈 때 사용한다.
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD)
+
+    Returns:
+        메모리에 있는 최신 스냅샷 (파일도 메모리도 없으면 None)
+    """
+    snapshot = _load_from_disk(date_str)
+    with _snapshot_lock:
+        current = _snapshots.get(date_str)
+        if snapshot is not None and (current is None or snapshot.created_at > current.created_at):
+            _install(snapshot)
+            return snapshot
+        return current
+
+
+def invalidate_snapshot(date_str: str | None = None):
+    """
+    캐시된 스냅샷을 무효화하는 함수 (저장된 파일도 지운다)
+
+    Args:
+        date_str: 무효화할 거래일 (None이면 전체)
+    """
+    with _snapshot_lock:
+        if date_str is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(date_str, None)
+
+        if not MARKET_SNAPSHOT_DIR or not os.path.isdir(MARKET_SNAPSHOT_DIR):
+            return
+        for name in os.listdir(MARKET_SNAPSHOT_DIR):
+            if name == f"market_{date_str}.npz" or (date_str is None and name.startswith("market_")):
+                _remove_file(os.path.join(MARKET_SNAPSHOT_DIR, name))
+
+
+def diff_snapshots(previous: MarketSnapshot, current: MarketSnapshot, columns: tuple[str, ...] = ("close", "volume")) -> list[str]:
+    """
+    두 스냅샷 사이에 값이 바뀐 종목 코드를 찾는 함수
+
+    현재 스냅샷 기준으로 이전 스냅샷의 행을 맞춘 뒤 컬럼 배열을 한 번에 비교한다.
+    이전 스냅샷에 없던 종목(신규 상장 등)도 바뀐 것으로 본다.
+
+    Args:
+        previous: 이전 스냅샷
+        current: 현재 스냅샷
+        columns: 비교할 컬럼 (기본값: 종가, 거래량)
+
+    Returns:
+        바뀐 종목 코드 리스트 (현재 스냅샷 순서)
+    """
+    if not len(previous):
+        # 비교할 이전 행이 없으면 모든 종목이 바뀐 것으로 본다
+        return list(current.codes)
+
+    rows = np.fromiter((previous.index.get(code, -1) for code in current.codes), dtype=np.int64, count=len(current))
+    missing = rows < 0
+    safe_rows = np.where(missing, 0, rows)
+
+    changed = missing.copy()
+    for column in columns:
+        before = previous.column(column)[safe_rows]
+        after = current.column(column)
+        if column in _FLOAT_COLUMNS:
+            # NaN끼리는 같은 값으로 본다
+            changed |= ~((before == after) | (np.isnan(before) & np.isnan(after)))
+        else:
+            changed |= before != after
+    return [current.codes[i] for i in np.flatnonzero(changed).tolist()]
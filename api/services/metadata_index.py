@@ -0,0 +1,302 @@
+"""
+테마·종목 이름 색인 서비스
+
+테마 이름과 종목 이름을 거래일마다 한 번만 불러와 메모리 색인으로 보관한다.
+검색어마다 pykrx를 호출하지 않고 색인에서 바로 찾으므로
+/api/themes/search 응답이 수 밀리초 안에 끝난다.
+
+지원하는 검색 방식:
+- 접두어 검색: "반도" → "반도체"
+- 부분 문자열 검색: "전지" → "2차전지"
+- 초성 검색: "ㅂㄷㅊ" → "반도체"
+
+색인 구조: 이름(정규화)과 초성 문자열의 1-gram/2-gram → 항목 번호 역색인
+
+조회가 일부 실패한 색인은 _RETRY_SECONDS 뒤에 다시 만들고,
+테마나 종목이 하나도 없는 색인은 보관하지 않는다.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from services import krx_client
+from services.trading_calendar import get_recent_trading_date
+
+logger = logging.getLogger(__name__)
+
+# 한글 초성 목록 (유니코드 조합 순서)
+_CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSUNG_SET = set(_CHOSUNG)
+_HANGUL_START = 0xAC00
+_HANGUL_END = 0xD7A3
+
+# 검색 결과 점수 (작을수록 앞에 표시)
+_SCORE_EXACT = 0
+_SCORE_PREFIX = 1
+_SCORE_SUBSTRING = 2
+_SCORE_CHOSUNG_PREFIX = 3
+_SCORE_CHOSUNG_SUBSTRING = 4
+
+# 색인이 비었거나 일부만 만들어졌을 때 다시 만들기까지의 간격(초)
+_RETRY_SECONDS = 60
+
+
+def _normalize(text: str) -> str:
+    """검색용 정규화: 소문자 변환 + 공백 제거"""
+    return "".join(text.lower().split())
+
+
+def to_chosung(text: str) -> str:
+    """
+    한글 음절을 초성으로 바꾸는 함수 (한글 외 문자는 그대로 둔다)
+
+    Args:
+        text: 변환할 문자열 (예: "반도체")
+
+    Returns:
+        초성 문자열 (예: "ㅂㄷㅊ")
+    """
+    result = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_START <= code <= _HANGUL_END:
+            result.append(_CHOSUNG[(code - _HANGUL_START) // 588])
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+def _grams(text: str) -> set[str]:
+    """문자열의 1-gram과 2-gram 집합"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class NameIndex:
+    """
+    이름 검색용 n-gram 역색인
+
+    Args:
+        entries: (코드, 이름) 리스트
+    """
+
+    def __init__(self, entries: list[tuple[str, str]]):
+        self.codes = [code for code, _ in entries]
+        self.names = [name for _, name in entries]
+        self._positions = {code: position for position, code in enumerate(self.codes)}
+        self._normalized = [_normalize(name) for name in self.names]
+        self._chosung = [to_chosung(name) for name in self._normalized]
+
+        self._name_grams: dict[str, list[int]] = {}
+        self._chosung_grams: dict[str, list[int]] = {}
+        for position, (normalized, chosung) in enumerate(zip(self._normalized, self._chosung)):
+            for gram in _grams(normalized):
+                self._name_grams.setdefault(gram, []).append(position)
+            for gram in _grams(chosung):
+                self._chosung_grams.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def name_of(self, code: str) -> str | None:
+        """코드에 해당하는 이름을 반환한다 (없으면 None)"""
+        position = self._positions.get(code)
+        return self.names[position] if position is not None else None
+
+    @staticmethod
+    def _candidates(grams_index: dict[str, list[int]], query: str) -> set[int]:
+        """검색어의 n-gram을 모두 포함하는 항목 번호 집합 (후보)"""
+        query_grams = sorted(_grams(query), key=len, reverse=True)
+        # 2-gram이 있으면 2-gram만으로 충분히 좁혀진다
+        query_grams = [gram for gram in query_grams if len(gram) == len(query_grams[0])]
+
+        candidates: set[int] | None = None
+        for gram in sorted(query_grams, key=lambda g: len(grams_index.get(g, ()))):
+            postings = grams_index.get(gram)
+            if not postings:
+                return set()
+            candidates = set(postings) if candidates is None else candidates.intersection(postings)
+            if not candidates:
+                break
+        return candidates or set()
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[str, str]]:
+        """
+        이름을 검색하는 함수
+
+        정확히 일치 → 접두어 → 부분 문자열 → 초성 접두어 → 초성 부분 문자열 순으로
+        정렬하고, 같은 순위에서는 짧은 이름을 먼저 보여준다.
+
+        Args:
+            query: 검색어
+            limit: 최대 결과 수
+
+        Returns:
+            (코드, 이름) 리스트
+        """
+        normalized = _normalize(query)
+        if not normalized:
+            return []
+
+        scored: dict[int, tuple] = {}
+        for position in self._candidates(self._name_grams, normalized):
+            name = self._normalized[position]
+            offset = name.find(normalized)
+            if offset < 0:
+                continue
+            if name == normalized:
+                score = _SCORE_EXACT
+            elif offset == 0:
+                score = _SCORE_PREFIX
+            else:
+                score = _SCORE_SUBSTRING
+            scored[position] = (score, offset, len(name), self.names[position])
+
+        # 검색어가 초성으로만 이루어져 있으면 초성 색인도 찾는다
+        if all(char in _CHOSUNG_SET for char in normalized):
+            for position in self._candidates(self._chosung_grams, normalized):
+                if position in scored:
+                    continue
+                chosung = self._chosung[position]
+                offset = chosung.find(normalized)
+                if offset < 0:
+                    continue
+                score = _SCORE_CHOSUNG_PREFIX if offset == 0 else _SCORE_CHOSUNG_SUBSTRING
+                scored[position] = (score, offset, len(chosung), self.names[position])
+
+        ranked = sorted(scored.items(), key=lambda item: item[1])[:limit]
+        return [(self.codes[position], self.names[position]) for position, _ in ranked]
+
+
+class MetadataIndex:
+    """
+    하루 동안 유지되는 테마·종목 이름 색인
+
+    Attributes:
+        trading_date: 색인을 만든 기준 거래일
+        themes: 테마 이름 색인
+        stocks: 종목(주식 + ETF) 이름 색인
+        complete: 모든 목록과 이름을 빠짐없이 불러왔는지 여부
+    """
+
+    def __init__(self, trading_date: str, themes: NameIndex, stocks: NameIndex, complete: bool = True):
+        self.trading_date = trading_date
+        self.themes = themes
+        self.stocks = stocks
+        self.complete = complete
+        self.created_at = datetime.now()
+
+    @property
+    def is_empty(self) -> bool:
+        """테마나 종목 이름이 하나도 없는지 여부"""
+        return len(self.themes) == 0 or len(self.stocks) == 0
+
+
+def _load_names(codes: list[str], name_function: str) -> list[tuple[str, str]]:
+    """코드 목록의 이름을 pykrx 내부 티커 캐시에서 가져온다"""
+    entries = []
+    for code in codes:
+        try:
+            name = krx_client.call(name_function, code)
+            if isinstance(name, str) and name:
+                entries.append((code, name))
+        except Exception:
+            continue
+    return entries
+
+
+def _build_metadata_index(date_str: str) -> MetadataIndex:
+    """
+    기준 거래일의 테마·종목 이름을 불러와 색인을 만드는 함수
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD)
+
+    Returns:
+        MetadataIndex (이름 조회가 하나라도 실패하면 complete=False)
+    """
+    theme_tickers = list(krx_client.call("get_index_ticker_list", date_str, market="테마") or [])
+    theme_entries = _load_names(theme_tickers, "get_index_ticker_name")
+    themes = NameIndex(theme_entries)
+    complete = len(theme_entries) == len(theme_tickers)
+
+    stock_codes = list(krx_client.call("get_market_ticker_list", date_str, market="ALL") or [])
+    stock_entries = _load_names(stock_codes, "get_market_ticker_name")
+    complete = complete and len(stock_entries) == len(stock_codes)
+    try:
+        etf_codes = list(krx_client.call("get_etf_ticker_list", date_str) or [])
+        etf_entries = _load_names(etf_codes, "get_etf_ticker_name")
+        complete = complete and len(etf_entries) == len(etf_codes)
+        stock_entries += etf_entries
+    except Exception as e:
+        logger.warning(f"ETF 티커 목록 조회 실패: {e}")
+        complete = False
+    stocks = NameIndex(stock_entries)
+
+    logger.info(
+        f"{date_str} 이름 색인 생성 완료 (테마 {len(themes)}개, 종목 {len(stocks)}개"
+        f"{'' if complete else ', 일부 조회 실패'})"
+    )
+    return MetadataIndex(date_str, themes, stocks, complete)
+
+
+# 현재 이름 색인 (거래일이 바뀌면 다시 만든다)
+_index: MetadataIndex | None = None
+_index_lock = threading.Lock()
+
+# 마지막 색인 생성 시도 (재시도 간격 계산용, 시각은 monotonic)
+_attempted_date: str | None = None
+_attempted_at = 0.0
+
+
+def _retry_pending(date_str: str) -> bool:
+    """같은 거래일의 직전 생성 시도 후 재시도 간격이 아직 지나지 않았는지 확인한다"""
+    return _attempted_date == date_str and time.monotonic() - _attempted_at < _RETRY_SECONDS
+
+
+def get_metadata_index() -> MetadataIndex:
+    """
+    최근 거래일 기준의 이름 색인을 반환하는 함수 (거래일마다 1회 생성)
+
+    빈 색인은 보관하지 않고 이전 색인을 유지하며, 빈 색인이나 일부만 만들어진 색인은
+    _RETRY_SECONDS가 지난 뒤 호출될 때 다시 만든다.
+
+    Returns:
+        MetadataIndex
+    """
+    global _index, _attempted_date, _attempted_at
+    date_str = get_recent_trading_date()
+    current = _index
+    if current is not None and current.trading_date == date_str and (current.complete or _retry_pending(date_str)):
+        return current
+
+    with _index_lock:
+        current = _index
+        if current is not None and current.trading_date == date_str and current.complete:
+            return current
+        if _retry_pending(date_str):
+            # 직전 생성이 실패했거나 일부만 만들어졌다면 재시도 간격 동안 기존 색인을 그대로 쓴다
+            return current if current is not None else MetadataIndex(date_str, NameIndex([]), NameIndex([]), False)
+
+        _attempted_date, _attempted_at = date_str, time.monotonic()
+        index = _build_metadata_index(date_str)
+        if index.is_empty:
+            logger.warning(f"{date_str} 이름 색인이 비어 있어 이전 색인을 유지합니다 ({_RETRY_SECONDS}초 후 재시도).")
+            return current or index
+        _index = index
+        return index
+
+
+def lookup_stock_name(code: str) -> str | None:
+    """
+    종목 코드로 종목명을 찾는 함수 (색인에 없으면 None)
+
+    Args:
+        code: 종목 코드 (예: "005930")
+
+    Returns:
+        종목명 또는 None
+    """
+    return get_metadata_index().stocks.name_of(code)
@@ -0,0 +1,313 @@
+"""
+성능 지표 수집 서비스
+
+pykrx·Naver·Google 호출, API 엔드포인트, 스케줄러 작업의 소요 시간과 호출·실패 수를 모아
+Prometheus 텍스트 형식(/metrics)으로 내보낸다.
+
+- 히스토그램은 고정 구간(bucket) 카운터 배열로 보관하므로 관측 1회 비용은 잠금 + 이진 탐색뿐이다
+- 외부 호출은 (upstream, function, endpoint) 라벨로 기록한다
+  endpoint는 그 호출을 일으킨 API 경로 템플릿(예: "/api/stocks/{code}") 또는 스케줄러 작업 이름이다
+- 외부 라이브러리(prometheus_client) 없이 동작한다
+
+사용 예시:
+    with track_upstream("naver", "search_news") as tracker:
+        response = await client.get(...)
+        if response.status_code != 200:
+            tracker.failed = True
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# 외부 호출·API 응답 시간 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 스케줄러 작업 시간 구간(초)
+JOB_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# 엔드포인트를 알 수 없는 호출(갱신 파이프라인 작업 스레드 등)의 라벨
+BACKGROUND_ENDPOINT = "background"
+
+# 현재 호출을 일으킨 엔드포인트 (ASGI scope 또는 작업 이름 문자열)
+_endpoint: ContextVar = ContextVar("metrics_endpoint", default=None)
+
+
+def _escape(value: str) -> str:
+    """Prometheus 라벨 값 이스케이프"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """
+    라벨별 누적 카운터
+
+    Args:
+        name: 지표 이름 (_total로 끝나도록 짓는다)
+        help_text: 지표 설명
+        label_names: 라벨 이름 튜플
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    라벨별 고정 구간 히스토그램
+
+    Args:
+        name: 지표 이름 (단위 접미사 포함, 예: "_seconds")
+        help_text: 지표 설명
+        label_names: 라벨 이름 튜플
+        buckets: 구간 상한 튜플 (오름차순)
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # 라벨 → [구간별 개수..., +Inf 개수], 합계
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[position] += 1
+            self._sums[labels] += value
+
+    def count(self, *labels) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items())
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.label_names, labels, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[-1]
+            le = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+# ============================================
+# 지표 정의
+# ============================================
+UPSTREAM_LATENCY = Histogram(
+    "tap_upstream_call_seconds",
+    "외부 호출(pykrx, Naver, Google) 소요 시간",
+    ("upstream", "function", "endpoint"),
+    LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "tap_upstream_call_errors_total",
+    "외부 호출 실패(예외, 시간 초과, 오류 응답) 수",
+    ("upstream", "function", "endpoint"),
+)
+HTTP_LATENCY = Histogram(
+    "tap_http_request_seconds",
+    "API 요청 처리 시간",
+    ("method", "endpoint", "status"),
+    LATENCY_BUCKETS,
+)
+JOB_LATENCY = Histogram(
+    "tap_scheduler_job_seconds",
+    "스케줄러 작업 소요 시간",
+    ("job",),
+    JOB_BUCKETS,
+)
+JOB_ERRORS = Counter(
+    "tap_scheduler_job_errors_total",
+    "실패한 스케줄러 작업 수",
+    ("job",),
+)
+
+_METRICS = (UPSTREAM_LATENCY, UPSTREAM_ERRORS, HTTP_LATENCY, JOB_LATENCY, JOB_ERRORS)
+
+
+# ============================================
+# 엔드포인트 문맥
+# ============================================
+def set_endpoint(value):
+    """
+    현재 문맥의 엔드포인트를 지정하는 함수
+
+    Args:
+        value: ASGI scope(라우팅 후 경로 템플릿을 읽는다) 또는 라벨 문자열
+
+    Returns:
+        reset_endpoint에 넘길 토큰
+    """
+    return _endpoint.set(value)
+
+
+def reset_endpoint(token):
+    """set_endpoint 이전 상태로 되돌린다"""
+    _endpoint.reset(token)
+
+
+def route_label(scope: dict) -> str:
+    """
+    ASGI scope에서 경로 템플릿을 꺼낸다
+
+    라우팅 전에 응답한 미들웨어(HTTP 캐시의 304 등)는 scope["route_path"]에 템플릿을 남긴다.
+    둘 다 없으면(일치하는 경로 없음) "unmatched"
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("route_path") or "unmatched"
+
+
+def current_endpoint() -> str:
+    """현재 문맥의 엔드포인트 라벨"""
+    value = _endpoint.get()
+    if value is None:
+        return BACKGROUND_ENDPOINT
+    if isinstance(value, str):
+        return value
+    return route_label(value)
+
+
+# ============================================
+# 기록 함수
+# ============================================
+def observe_upstream(upstream: str, function: str, seconds: float, failed: bool = False, endpoint: str | None = None):
+    """
+    외부 호출 1회를 기록하는 함수
+
+    Args:
+        upstream: 호출 대상 ("krx", "naver", "google")
+        function: 호출 함수·API 이름 (예: "get_market_ohlcv_by_date")
+        seconds: 소요 시간(초)
+        failed: 실패 여부
+        endpoint: 엔드포인트 라벨 (생략 시 현재 문맥)
+    """
+    endpoint = endpoint or current_endpoint()
+    UPSTREAM_LATENCY.observe(seconds, upstream, function, endpoint)
+    if failed:
+        UPSTREAM_ERRORS.inc(upstream, function, endpoint)
+
+
+def count_upstream_error(upstream: str, function: str, endpoint: str | None = None):
+    """소요 시간 없이 외부 호출 실패만 기록한다 (호출 측 시간 초과 등)"""
+    UPSTREAM_ERRORS.inc(upstream, function, endpoint or current_endpoint())
+
+
+class _UpstreamTracker:
+    """track_upstream이 넘겨주는 객체 (오류 응답이면 failed를 True로 바꾼다)"""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+@contextmanager
+def track_upstream(upstream: str, function: str):
+    """
+    with 블록의 소요 시간을 외부 호출 1회로 기록하는 컨텍스트 매니저
+
+    블록에서 예외가 나거나 tracker.failed가 True면 실패로 센다.
+
+    Args:
+        upstream: 호출 대상 ("krx", "naver", "google")
+        function: 호출 함수·API 이름
+    """
+    tracker = _UpstreamTracker()
+    started = time.perf_counter()
+    try:
+        yield tracker
+    except BaseException:
+        tracker.failed = True
+        raise
+    finally:
+        observe_upstream(upstream, function, time.perf_counter() - started, tracker.failed)
+
+
+@contextmanager
+def track_job(job: str):
+    """
+    스케줄러 작업 1회의 소요 시간을 기록하는 컨텍스트 매니저
+
+    블록 안의 외부 호출은 endpoint 라벨이 "scheduler:{job}"으로 기록된다.
+    블록에서 예외가 나면 실패로 센다.
+
+    Args:
+        job: 작업 이름 (스케줄러 job id)
+    """
+    token = set_endpoint(f"scheduler:{job}")
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        JOB_ERRORS.inc(job)
+        raise
+    finally:
+        JOB_LATENCY.observe(time.perf_counter() - started, job)
+        reset_endpoint(token)
+
+
+def observe_request(method: str, endpoint: str, status: int, seconds: float):
+    """API 요청 1회를 기록한다"""
+    HTTP_LATENCY.observe(seconds, method, endpoint, str(status))
+
+
+def render_metrics() -> str:
+    """
+    모든 지표를 Prometheus 텍스트 형식으로 만드는 함수
+
+    Returns:
+        text/plain; version=0.0.4 형식 문자열
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -4,15 +4,30 @@
 종목별 최신 뉴스를 Naver 검색 API 또는 Google News RSS에서 수집한다.
 1순위: Naver 검색 API, 2순위: Google News RSS (대체)
 
+두 공급자는 공유 HTTP 클라이언트(services.http_client)로 동시에 요청하고,
+전체 응답 시간은 NEWS_DEADLINE_SECONDS 안으로 제한한다.
+
+조회 결과는 (종목명, 건수) 단위로 메모리 캐시(LRU + TTL)에 보관한다.
+- TTL 이내: 캐시에서 바로 응답
+- TTL 경과 후 NEWS_CACHE_STALE_SECONDS 이내: 이전 결과로 응답하고 백그라운드에서 갱신
+- 캐시 없음: 같은 종목의 동시 요청을 한 번의 외부 호출로 병합
+
 참조: docs/08_AgentSkillDesign.md — Skill 2-3
 """
+import asyncio
 import os
 import logging
 import re
-from datetime import datetime
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import httpx
-import feedparser
+
+from services.http_client import get_http_client
+from services.metrics import track_upstream
+from services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +35,114 @@ logger = logging.getLogger(__name__)
 NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID", "")
 NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET", "")
 
+# 공급자별 요청 시간 제한(초)
+NEWS_PROVIDER_TIMEOUT_SECONDS = float(os.getenv("NEWS_PROVIDER_TIMEOUT_SECONDS", "5"))
+
+# 뉴스 조회 전체 마감 시간(초) — /stocks/{code}/news 응답 목표(3초)보다 짧게 둔다
+NEWS_DEADLINE_SECONDS = float(os.getenv("NEWS_DEADLINE_SECONDS", "2.5"))
+
+# 공급자 결과 결합 방식
+# - prefer: Naver 결과가 있으면 Naver만, 없으면 Google 결과 사용
+# - merge: 두 공급자 결과를 합쳐 최신순으로 정렬
+NEWS_FETCH_STRATEGY = os.getenv("NEWS_FETCH_STRATEGY", "prefer")
+
+# Google News RSS 주소
+_GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search"
+
+# 뉴스 캐시 설정
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "512"))        # 최대 보관 키 수 (LRU)
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", "300"))      # 새 결과로 보는 시간
+NEWS_CACHE_STALE_SECONDS = float(os.getenv("NEWS_CACHE_STALE_SECONDS", "1800")) # TTL 이후 이전 결과로 응답하는 시간
+NEWS_CACHE_EMPTY_TTL_SECONDS = float(os.getenv("NEWS_CACHE_EMPTY_TTL_SECONDS", "30"))  # 빈 결과 보관 시간
+
+
+class NewsCache:
+    """
+    TTL과 stale-while-revalidate를 지원하는 LRU 뉴스 캐시
+
+    항목마다 (뉴스 리스트, 만료 시각, stale 허용 시각)을 보관한다 (시각은 time.monotonic 기준).
+
+    Args:
+        max_entries: 최대 보관 키 수 (넘으면 가장 오래 쓰지 않은 키부터 제거)
+        ttl_seconds: 새 결과로 취급하는 시간(초)
+        stale_seconds: TTL 이후 이전 결과로 응답할 수 있는 시간(초)
+        empty_ttl_seconds: 빈 결과(뉴스 없음·조회 실패)를 보관하는 시간(초)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = NEWS_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = NEWS_CACHE_TTL_SECONDS,
+        stale_seconds: float = NEWS_CACHE_STALE_SECONDS,
+        empty_ttl_seconds: float = NEWS_CACHE_EMPTY_TTL_SECONDS,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.empty_ttl_seconds = empty_ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, key) -> tuple[list[dict] | None, bool]:
+        """
+        캐시된 뉴스를 조회하는 함수 (지표도 함께 기록)
+
+        Args:
+            key: 캐시 키
+
+        Returns:
+            (뉴스 리스트 또는 None, 갱신이 필요한지 여부)
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or now >= entry[2]:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None, True
+
+        self._entries.move_to_end(key)
+        news, expires_at, _ = entry
+        if now < expires_at:
+            self.hits += 1
+            return news, False
+        self.stale += 1
+        return news, True
+
+    def set(self, key, news: list[dict]):
+        """뉴스를 캐시에 저장한다 (빈 결과는 짧게 보관하고 stale 응답에 쓰지 않는다)"""
+        now = time.monotonic()
+        if news:
+            expires_at = now + self.ttl_seconds
+            stale_until = expires_at + self.stale_seconds
+        else:
+            expires_at = stale_until = now + self.empty_ttl_seconds
+
+        self._entries[key] = (news, expires_at, stale_until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """캐시를 비운다"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """적중·미스·stale 응답 횟수와 보관 중인 키 수를 반환한다"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+        }
+
+
+# 앱 전체가 공유하는 뉴스 캐시와 요청 병합기
+_news_cache = NewsCache()
+_news_flight = SingleFlight()
+
 
 def _strip_html_tags(text: str) -> str:
     """
@@ -57,8 +180,9 @@ async def fetch_news_from_naver(stock_name: str, limit: int = 5) -> list[dict]:
     logger.info(f"Naver 뉴스 검색 요청: '{stock_name}' (최대 {limit}건)")
 
     try:
-        # Naver 검색 API 호출
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        # Naver 검색 API 호출 (공유 클라이언트로 연결 재사용)
+        client = get_http_client()
+        with track_upstream("naver", "search_news") as tracker:
             response = await client.get(
                 "https://openapi.naver.com/v1/search/news.json",
                 headers={
@@ -70,29 +194,31 @@ async def fetch_news_from_naver(stock_name: str, limit: int = 5) -> list[dict]:
                     "display": limit,
                     "sort": "date",  # 최신순 정렬
                 },
+                timeout=NEWS_PROVIDER_TIMEOUT_SECONDS,
             )
+            tracker.failed = response.status_code != 200
 
-            # 응답 상태 확인
-            if response.status_code != 200:
-                logger.error(f"Naver API 응답 에러: {response.status_code}")
-                return []
+        # 응답 상태 확인
+        if response.status_code != 200:
+            logger.error(f"Naver API 응답 에러: {response.status_code}")
+            return []
 
-            data = response.json()
-            items = data.get("items", [])
+        data = response.json()
+        items = data.get("items", [])
 
-            # 뉴스 데이터 가공
-            news_list = []
-            for item in items[:limit]:
-                news_list.append({
-                    "title": _strip_html_tags(item.get("title", "")),
-                    "link": item.get("originallink", item.get("link", "")),
-                    "description": _strip_html_tags(item.get("description", "")),
-                    "published_at": item.get("pubDate", ""),
-                    "source": "Naver",
-                })
+        # 뉴스 데이터 가공
+        news_list = []
+        for item in items[:limit]:
+            news_list.append({
+                "title": _strip_html_tags(item.get("title", "")),
+                "link": item.get("originallink", item.get("link", "")),
+                "description": _strip_html_tags(item.get("description", "")),
+                "published_at": item.get("pubDate", ""),
+                "source": "Naver",
+            })
 
-            logger.info(f"Naver 뉴스 {len(news_list)}건 조회 완료")
-            return news_list
+        logger.info(f"Naver 뉴스 {len(news_list)}건 조회 완료")
+        return news_list
 
     except httpx.TimeoutException:
         logger.warning(f"Naver 뉴스 API 타임아웃: '{stock_name}'")
@@ -118,11 +244,24 @@ async def fetch_news_from_google(stock_name: str, limit: int = 5) -> list[dict]:
     logger.info(f"Google News 대체 검색 요청: '{stock_name}' (최대 {limit}건)")
 
     try:
-        # Google News RSS 피드 URL 생성
-        feed_url = f"https://news.google.com/rss/search?q={stock_name}&hl=ko&gl=KR&ceid=KR:ko"
+        # Google News RSS를 공유 클라이언트로 가져온다 (이벤트 루프를 막지 않음)
+        client = get_http_client()
+        with track_upstream("google", "news_rss") as tracker:
+            response = await client.get(
+                _GOOGLE_NEWS_RSS_URL,
+                params={"q": stock_name, "hl": "ko", "gl": "KR", "ceid": "KR:ko"},
+                timeout=NEWS_PROVIDER_TIMEOUT_SECONDS,
+            )
+            tracker.failed = response.status_code != 200
+        if response.status_code != 200:
+            logger.error(f"Google News RSS 응답 에러: {response.status_code}")
+            return []
 
-        # feedparser로 RSS 피드 파싱
-        feed = feedparser.parse(feed_url)
+        # feedparser는 Google RSS를 쓸 때만 필요하므로 여기서 불러온다 (서버 시작 시간 단축)
+        import feedparser
+
+        # RSS 파싱은 CPU 작업이므로 이벤트 루프 밖의 스레드에서 실행
+        feed = await asyncio.to_thread(feedparser.parse, response.content)
 
         news_list = []
         for entry in feed.entries[:limit]:
@@ -137,35 +276,153 @@ async def fetch_news_from_google(stock_name: str, limit: int = 5) -> list[dict]:
         logger.info(f"Google News {len(news_list)}건 조회 완료")
         return news_list
 
+    except httpx.TimeoutException:
+        logger.warning(f"Google News RSS 타임아웃: '{stock_name}'")
+        return []
     except Exception as e:
         logger.error(f"Google News RSS 파싱 실패: {e}")
         return []
 
 
-async def fetch_stock_news(stock_name: str, limit: int = 5) -> list[dict]:
+def _published_timestamp(news: dict) -> float:
+    """뉴스 발행일(RFC 822 문자열)을 정렬용 타임스탬프로 변환한다 (해석 실패 시 0)"""
+    try:
+        published = parsedate_to_datetime(news.get("published_at", ""))
+        if published.tzinfo is None:
+            published = published.replace(tzinfo=timezone.utc)
+        return published.timestamp()
+    except (TypeError, ValueError, IndexError):
+        return 0.0
+
+
+def _merge_news(*news_lists: list[dict], limit: int) -> list[dict]:
     """
-    종목 뉴스를 가져오는 메인 함수 (Naver 우선, Google 대체)
+    여러 공급자의 뉴스를 합쳐 최신순으로 정렬하는 헬퍼 함수
 
-    먼저 Naver API를 시도하고, 실패하면 Google News RSS로 대체한다.
+    같은 링크 또는 같은 제목의 기사는 먼저 나온 것 하나만 남긴다.
+
+    Args:
+        *news_lists: 공급자별 뉴스 리스트 (앞쪽 공급자 우선)
+        limit: 최대 뉴스 수
+
+    Returns:
+        중복 제거 후 최신순 뉴스 리스트 (최대 limit건)
+    """
+    seen = set()
+    merged = []
+    for news_list in news_lists:
+        for news in news_list:
+            keys = {news.get("link"), news.get("title")} - {"", None}
+            if keys & seen:
+                continue
+            seen.update(keys)
+            merged.append(news)
+    merged.sort(key=_published_timestamp, reverse=True)
+    return merged[:limit]
+
+
+async def _result_within(task: asyncio.Task, deadline: float) -> list[dict]:
+    """마감 시각(monotonic)까지 작업 결과를 기다린다 (시간 초과·실패 시 빈 리스트)"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0 and not task.done():
+        return []
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), max(remaining, 0))
+    except asyncio.TimeoutError:
+        return []
+    except Exception as e:
+        logger.warning(f"뉴스 공급자 호출 실패: {e}")
+        return []
+
+
+async def fetch_stock_news(stock_name: str, limit: int = 5, strategy: str | None = None) -> list[dict]:
+    """
+    종목 뉴스를 가져오는 메인 함수 (캐시 우선)
+
+    캐시에 새 결과가 있으면 바로 반환하고, 오래된 결과만 있으면 그 결과를 반환하면서
+    백그라운드에서 갱신한다. 캐시가 비어 있으면 외부 API를 호출하되,
+    같은 키의 동시 요청은 한 번의 호출로 병합한다.
+
+    Args:
+        stock_name: 종목 이름 (예: "삼성전자")
+        limit: 최대 뉴스 수 (기본값: 5)
+        strategy: 결과 결합 방식 ("prefer" 또는 "merge", 생략 시 NEWS_FETCH_STRATEGY)
+
+    Returns:
+        뉴스 리스트 (최대 limit건)
+    """
+    strategy = strategy or NEWS_FETCH_STRATEGY
+    key = (stock_name, limit, strategy)
+
+    news, needs_refresh = _news_cache.get(key)
+    if news is not None:
+        if needs_refresh:
+            # stale-while-revalidate: 이전 결과로 응답하고 갱신은 백그라운드에서 (진행 중이면 합류)
+            _news_flight.start(key, _refresh_news, key)
+        return news
+
+    return await _news_flight.do(key, _refresh_news, key)
+
+
+async def _refresh_news(key: tuple) -> list[dict]:
+    """외부 API에서 뉴스를 가져와 캐시에 저장한다 (요청 병합기 안에서 실행)"""
+    stock_name, limit, strategy = key
+    news = await fetch_stock_news_uncached(stock_name, limit, strategy)
+    _news_cache.set(key, news)
+    return news
+
+
+def get_news_cache_stats() -> dict:
+    """
+    뉴스 캐시와 요청 병합 지표를 반환하는 함수
+
+    Returns:
+        {"entries", "hits", "misses", "stale", "upstream_calls", "merged"}
+    """
+    flight = _news_flight.stats()
+    return {**_news_cache.stats(), "upstream_calls": flight["calls"], "merged": flight["merged"]}
+
+
+async def fetch_stock_news_uncached(stock_name: str, limit: int = 5, strategy: str | None = None) -> list[dict]:
+    """
+    종목 뉴스를 외부 API에서 직접 가져오는 함수 (Naver 우선, Google 대체)
+
+    Naver와 Google News를 동시에 요청하고 NEWS_DEADLINE_SECONDS 안에 도착한 결과만 사용한다.
+    Naver가 실패해도 Google 요청이 이미 진행 중이므로 순차 대체보다 응답이 빠르다.
 
     Args:
         stock_name: 종목 이름 (예: "삼성전자")
         limit: 최대 뉴스 수 (기본값: 5)
+        strategy: 결과 결합 방식 ("prefer" 또는 "merge", 생략 시 NEWS_FETCH_STRATEGY)
 
     Returns:
         뉴스 리스트 (최대 limit건)
     """
+    strategy = strategy or NEWS_FETCH_STRATEGY
+    deadline = time.monotonic() + NEWS_DEADLINE_SECONDS
+
+    naver_task = asyncio.create_task(fetch_news_from_naver(stock_name, limit))
+    google_task = asyncio.create_task(fetch_news_from_google(stock_name, limit))
+
     try:
+        if strategy == "merge":
+            naver_news = await _result_within(naver_task, deadline)
+            google_news = await _result_within(google_task, deadline)
+            return _merge_news(naver_news, google_news, limit=limit)
+
         # 1순위: Naver 검색 API
-        news = await fetch_news_from_naver(stock_name, limit)
+        news = await _result_within(naver_task, deadline)
         if news:
             return news
-    except Exception as e:
-        logger.warning(f"Naver 뉴스 API 실패, Google News로 대체: {e}")
 
-    try:
-        # 2순위: Google News RSS (대체)
-        return await fetch_news_from_google(stock_name, limit)
-    except Exception as e:
-        logger.error(f"Google News 대체도 실패: {e}")
-        return []
+        # 2순위: Google News RSS (대체, 이미 동시에 요청 중)
+        news = await _result_within(google_task, deadline)
+        if not news:
+            logger.warning(f"뉴스 조회 결과 없음 또는 마감 시간 초과: '{stock_name}'")
+        return news
+
+    finally:
+        # 마감 후에도 남아 있는 요청은 취소한다
+        for task in (naver_task, google_task):
+            if not task.done():
+                task.cancel()
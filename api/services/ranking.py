@@ -0,0 +1,199 @@
+"""
+순위 집계 서비스
+
+테마·종목 순위에서 전체를 정렬한 뒤 앞부분만 자르는 대신,
+크기가 제한된 힙으로 상위 N개만 유지한다.
+
+- MultiRanking: 한 번의 순회로 범주(stock/ETF)×기준(거래량, 등락률 등)별 상위 N개를 모은다
+- IncrementalRanking: 종목 하나의 값이 바뀔 때 전체를 다시 정렬하지 않고 순위를 갱신한다
+
+값이 같으면 먼저 들어온 항목을 앞에 둔다 (안정 정렬 후 자른 결과와 같다).
+"""
+import heapq
+import logging
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def _score(record: dict[str, Any], criterion: str) -> float:
+    """순위 기준 값 (없으면 0)"""
+    value = record.get(criterion)
+    return value if value is not None else 0
+
+
+class MultiRanking:
+    """
+    범주·기준별 상위 N개를 한 번의 순회로 모으는 집계기
+
+    (범주, 기준)마다 크기 limit의 최소 힙을 두고, 힙의 최솟값보다 큰 항목만 교체한다.
+    항목 하나를 넣는 비용은 O(기준 수 × log limit)이다.
+
+    Args:
+        limits: 범주 → 상위 몇 개를 남길지 (예: {"stock": 5, "ETF": 3})
+        criteria: 내림차순 순위 기준 키 리스트 (예: ["trading_volume", "change_rate"])
+        category_of: 항목의 범주를 반환하는 함수 (기본값: "type" 키)
+
+    사용 예시:
+        ranking = MultiRanking({"stock": 5, "ETF": 3}, ["trading_volume"])
+        ranking.extend(stocks)
+        leaders = ranking.top("stock", "trading_volume")
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, int],
+        criteria: list[str],
+        category_of: Callable[[dict], str] = lambda record: record.get("type"),
+    ):
+        self.limits = limits
+        self.criteria = criteria
+        self.category_of = category_of
+        self._heaps: dict[tuple[str, str], list] = {
+            (category, criterion): [] for category in limits for criterion in criteria
+        }
+        self._sequence = 0
+        self.count = 0
+
+    def add(self, record: dict[str, Any]):
+        """항목 하나를 순위에 반영한다 (범주가 limits에 없으면 무시)"""
+        category = self.category_of(record)
+        limit = self.limits.get(category, 0)
+        self.count += 1
+        if limit <= 0:
+            return
+
+        # 먼저 들어온 항목이 이기도록 순번을 음수로 비교한다
+        self._sequence += 1
+        order = -self._sequence
+        for criterion in self.criteria:
+            heap = self._heaps[(category, criterion)]
+            entry = (_score(record, criterion), order, record)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+    def extend(self, records: Iterable[dict[str, Any]]):
+        """여러 항목을 순위에 반영한다"""
+        for record in records:
+            self.add(record)
+
+    def top(self, category: str, criterion: str) -> list[dict[str, Any]]:
+        """
+        범주·기준의 상위 항목을 순위 순서로 반환하는 함수
+
+        Args:
+            category: 범주 (예: "stock")
+            criterion: 기준 키 (예: "trading_volume")
+
+        Returns:
+            상위 항목 리스트 (최대 limits[category]개)
+        """
+        heap = self._heaps.get((category, criterion), [])
+        return [entry[2] for entry in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+def top_n(records: Iterable[dict[str, Any]], limit: int, criterion: str) -> list[dict[str, Any]]:
+    """
+    기준 값 내림차순 상위 limit개를 전체 정렬 없이 고르는 함수
+
+    Args:
+        records: 항목 리스트 또는 이터러블
+        limit: 반환할 항목 수
+        criterion: 기준 키 (예: "trading_volume")
+
+    Returns:
+        상위 항목 리스트
+    """
+    return heapq.nlargest(limit, records, key=lambda record: _score(record, criterion))
+
+
+class IncrementalRanking:
+    """
+    종목별 값이 하나씩 바뀌어도 상위 N개를 유지하는 순위
+
+    전체 종목의 현재 값과 상위 N개 목록을 함께 보관한다.
+    - 상위권 밖 종목의 값이 바뀌면: N번째 값과만 비교 (O(1), 진입 시 O(N))
+    - 상위권 종목의 값이 오르면: 상위 N개만 다시 정렬 (O(N log N))
+    - 상위권 종목의 값이 내리거나 빠지면: 밖의 종목이 올라올 수 있으므로
+      다음 조회 때 전체에서 상위 N개를 다시 고른다 (O(전체 × log N))
+
+    Args:
+        limit: 유지할 상위 항목 수
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._scores: dict[str, float] = {}
+        self._sequence: dict[str, int] = {}
+        self._next_sequence = 0
+        self._top: list[str] = []
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def _key(self, code: str) -> tuple[float, int]:
+        """순위 비교 키 (값이 같으면 먼저 등록된 종목이 앞)"""
+        return self._scores[code], -self._sequence[code]
+
+    def _rebuild(self):
+        """전체 종목에서 상위 N개를 다시 고른다"""
+        self._top = heapq.nlargest(self.limit, self._scores, key=self._key)
+        self._dirty = False
+
+    def update(self, code: str, score: float):
+        """
+        종목 하나의 값을 갱신하는 함수
+
+        Args:
+            code: 종목 코드
+            score: 새 기준 값
+        """
+        if code not in self._sequence:
+            self._next_sequence += 1
+            self._sequence[code] = self._next_sequence
+        previous = self._scores.get(code)
+        self._scores[code] = score
+        if self._dirty or self.limit <= 0:
+            return
+
+        if code in self._top:
+            if previous is not None and score < previous:
+                self._dirty = True
+            else:
+                self._top.sort(key=self._key, reverse=True)
+            return
+
+        if len(self._top) < self.limit:
+            self._top.append(code)
+            self._top.sort(key=self._key, reverse=True)
+        elif self._key(code) > self._key(self._top[-1]):
+            # N번째 종목을 밀어내고 진입
+            self._top[-1] = code
+            self._top.sort(key=self._key, reverse=True)
+
+    def update_many(self, scores: dict[str, float]):
+        """여러 종목의 값을 한 번에 갱신한다"""
+        for code, score in scores.items():
+            self.update(code, score)
+
+    def remove(self, code: str):
+        """종목을 순위에서 뺀다"""
+        if self._scores.pop(code, None) is None:
+            return
+        self._sequence.pop(code, None)
+        if code in self._top:
+            self._dirty = True
+
+    def top(self) -> list[tuple[str, float]]:
+        """
+        상위 N개 (종목 코드, 값)을 순위 순서로 반환하는 함수
+
+        Returns:
+            [(종목 코드, 값)] 리스트
+        """
+        if self._dirty:
+            self._rebuild()
+        return [(code, self._scores[code]) for code in self._top]
@@ -0,0 +1,82 @@
+"""
+외부 데이터 소스 호출 속도 제한기
+
+KRX 등 외부 데이터 소스에 초당 호출 수 제한을 걸어,
+동시 수집 시에도 요청이 몰려 차단(throttling)되지 않도록 한다.
+소스마다 토큰 버킷 하나를 두고 모든 스레드가 공유한다.
+"""
+import os
+import threading
+import time
+
+# 소스별 초당 허용 호출 수 (환경 변수로 조정 가능)
+_DEFAULT_RATES = {
+    "krx": float(os.getenv("KRX_RATE_LIMIT_PER_SECOND", "10")),
+}
+
+# 순간적으로 허용할 최대 연속 호출 수
+_DEFAULT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+
+
+class RateLimiter:
+    """
+    토큰 버킷 방식의 스레드 안전 속도 제한기
+
+    초당 rate개의 토큰이 채워지고, 호출마다 토큰 1개를 소비한다.
+    토큰이 없으면 다음 토큰이 채워질 때까지 호출 스레드를 대기시킨다.
+    """
+
+    def __init__(self, rate: float, burst: int = _DEFAULT_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1):
+        """
+        토큰을 얻을 때까지 대기하는 함수
+
+        Args:
+            tokens: 소비할 토큰 수 (기본값: 1)
+        """
+        if self.rate <= 0:
+            # 0 이하이면 제한하지 않는다
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+# 소스별 속도 제한기 (최초 사용 시 생성)
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(source: str) -> RateLimiter:
+    """
+    데이터 소스의 공유 속도 제한기를 반환하는 함수
+
+    Args:
+        source: 데이터 소스 이름 (예: "krx")
+
+    Returns:
+        해당 소스의 RateLimiter (설정이 없으면 제한 없음)
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(source)
+        if limiter is None:
+            limiter = RateLimiter(_DEFAULT_RATES.get(source, 0))
+            _limiters[source] = limiter
+        return limiter
@@ -0,0 +1,460 @@
+"""
+데이터 갱신 파이프라인 (Agent 4, Skill 4-1)
+
+스케줄러의 장중/장마감 갱신 작업을 단계별로 나누고,
+테마·종목 수집을 크기가 제한된 스레드 풀에 분산하여 동시에 처리한다.
+KRX 호출은 krx_client의 전용 스레드 풀과 속도 제한기를 거치므로 동시 수집 중에도 차단되지 않는다.
+
+단계:
+1. prepare  — 기준 거래일, 전체 테마 목록, 테마 구성 색인, 시장 스냅샷 준비
+2. themes   — 테마별 거래량 수집 (병렬) + 전체 테마 급등주 수 일괄 계산
+3. stocks   — 테마별 대장주/ETF 수집 (병렬)
+4. details  — 대장주 확정 지표 수집 (장마감 후에만, 병렬)
+5. publish  — 데이터 저장소에 게시 + 변경분(delta)을 구독자에게 전달
+
+장중 갱신은 직전 갱신의 스냅샷과 비교해 시세가 바뀐 종목과 그 종목을 포함한 테마만
+다시 수집하고, 나머지 테마의 결과는 재사용한다 (거래일의 첫 갱신만 전체 수집).
+
+여러 워커로 실행하면 스케줄러 리더만 파이프라인을 실행하고,
+나머지 워커는 SharedUpdateRelay로 공유 저장소·스냅샷 파일의 새 게시를 읽어 같은 형식의 변경분을 전달한다.
+
+참조: docs/08_AgentSkillDesign.md — Agent 4 섹션
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from services.data_store import get_data_store
+from services.market_snapshot import MarketSnapshot, diff_snapshots, get_market_snapshot, load_shared_snapshot
+from services.ranking import IncrementalRanking
+from services.stock_service import collect_stocks_by_theme, collect_stock_details
+from services.theme_membership import get_theme_membership
+from services.theme_service import get_theme_universe, collect_theme_volume, collect_all_theme_surge
+from services.trading_calendar import get_recent_trading_date
+
+logger = logging.getLogger(__name__)
+
+# 동시에 실행할 수집 작업 수 (스레드 풀 크기)
+REFRESH_MAX_WORKERS = int(os.getenv("REFRESH_MAX_WORKERS", "8"))
+
+# 장중 갱신에서 종목 목록까지 갱신할 거래량 상위 테마 수
+REFRESH_INTRADAY_THEME_LIMIT = int(os.getenv("REFRESH_INTRADAY_THEME_LIMIT", "5"))
+
+# 장중 갱신에서 게시하는 거래량 순위 테마 수 (API·실시간 스트림은 상위 5개만 사용)
+# 이 개수만 IncrementalRanking으로 유지하므로 매 갱신마다 전체 테마를 다시 정렬하지 않는다
+REFRESH_INTRADAY_RANKING_LIMIT = max(
+    REFRESH_INTRADAY_THEME_LIMIT, int(os.getenv("REFRESH_INTRADAY_RANKING_LIMIT", "20"))
+)
+
+# 장마감 후 확정 지표(투자자별 거래량 등)를 수집할 순위별 상위 테마 수
+REFRESH_DETAIL_THEME_LIMIT = int(os.getenv("REFRESH_DETAIL_THEME_LIMIT", "5"))
+
+# 장중 갱신에서 재사용할 수 있는 스냅샷의 최대 경과 시간(초)
+# 갱신 주기(5분)보다 짧게 두어 매 갱신마다 새 시세를 받되, 직전에 API 요청이 만든 스냅샷은 재사용한다
+REFRESH_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("REFRESH_SNAPSHOT_MAX_AGE_SECONDS", "60"))
+
+
+class IntradayState:
+    """
+    장중 변경분 갱신을 위해 직전 갱신 결과를 보관하는 상태
+
+    거래일이 바뀌면 비우고 다시 전체 수집한다.
+    """
+
+    def __init__(self):
+        self.date: str | None = None
+        self.snapshot: MarketSnapshot | None = None
+        self.theme_volumes: dict[str, dict] = {}   # 테마 티커 → 거래량 테마 딕셔너리
+        self.volume_ranking = IncrementalRanking(REFRESH_INTRADAY_RANKING_LIMIT)   # 테마 티커별 거래량 상위 순위
+        self.theme_stocks: dict[str, dict] = {}    # 테마 티커 → {"stocks", "etfs"}
+        self.ranking: list[tuple[str, int]] = []   # 직전에 게시한 거래량 순위 (티커, 거래량)
+        self.stale_themes: set[str] = set()        # 수집에 실패해 다음 갱신에서 다시 수집할 테마 티커
+
+    def reset(self, date_str: str):
+        self.__init__()
+        self.date = date_str
+
+
+# 장중 갱신 상태 (스케줄러 작업은 한 번에 하나씩 실행된다)
+_intraday_state = IntradayState()
+
+# 변경분 구독자 (SSE 스트림 등) — 게시 후 스케줄러 스레드에서 호출된다
+_delta_listeners: list = []
+_delta_listeners_lock = threading.Lock()
+
+
+def add_delta_listener(listener):
+    """
+    갱신 변경분을 받을 구독자를 등록하는 함수
+
+    Args:
+        listener: delta 딕셔너리 하나를 인자로 받는 함수
+            {"mode", "date", "themes": {정렬 기준: 상위 테마 리스트},
+             "theme_stocks": {테마 티커: {"stocks", "etfs"}}, "quotes": {종목 코드: 시세}}
+    """
+    with _delta_listeners_lock:
+        if listener not in _delta_listeners:
+            _delta_listeners.append(listener)
+
+
+def remove_delta_listener(listener):
+    """등록한 구독자를 해제한다"""
+    with _delta_listeners_lock:
+        if listener in _delta_listeners:
+            _delta_listeners.remove(listener)
+
+
+def _emit_delta(delta: dict):
+    """변경분을 모든 구독자에게 전달한다 (구독자 예외는 기록만 하고 무시)"""
+    if not (delta["themes"] or delta["theme_stocks"] or delta["quotes"]):
+        return
+    with _delta_listeners_lock:
+        listeners = list(_delta_listeners)
+    for listener in listeners:
+        try:
+            listener(delta)
+        except Exception as e:
+            logger.warning(f"갱신 변경분 전달 실패: {e}")
+
+
+def _quote(snapshot: MarketSnapshot, code: str) -> dict:
+    """스냅샷에서 종목 시세 변경분 항목을 만든다"""
+    return {
+        "price": snapshot.value(code, "close", 0),
+        "trading_volume": snapshot.value(code, "volume", 0),
+        "change_rate": snapshot.value(code, "change_rate"),
+    }
+
+
+class RefreshReport:
+    """
+    갱신 파이프라인 실행 결과
+
+    단계별 소요 시간(초)과 처리 건수, 실패 건수를 기록한다.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.stage_seconds: dict[str, float] = {}
+        self.theme_count = 0
+        self.stock_theme_count = 0
+        self.detail_count = 0
+        self.changed_stock_count: int | None = None   # 장중 변경분 갱신에서 시세가 바뀐 종목 수
+        self.reused_theme_count = 0                   # 다시 수집하지 않고 재사용한 테마 수
+        self.failures = 0
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stage_seconds.values())
+
+    def summary(self) -> str:
+        """로그에 남길 한 줄 요약을 만든다"""
+        stages = ", ".join(f"{name} {seconds:.2f}초" for name, seconds in self.stage_seconds.items())
+        delta = ""
+        if self.changed_stock_count is not None:
+            delta = f"변경 종목 {self.changed_stock_count}개, 재사용 테마 {self.reused_theme_count}개, "
+        return (
+            f"[{self.mode}] 총 {self.total_seconds:.2f}초 ({stages}) — "
+            f"테마 {self.theme_count}개, 종목 목록 {self.stock_theme_count}개, "
+            f"상세 지표 {self.detail_count}개, {delta}실패 {self.failures}건"
+        )
+
+
+class RefreshPipeline:
+    """
+    스레드 풀 기반 데이터 갱신 파이프라인
+
+    Args:
+        max_workers: 동시에 실행할 수집 작업 수
+    """
+
+    def __init__(self, max_workers: int = REFRESH_MAX_WORKERS):
+        self.max_workers = max(1, max_workers)
+
+    @contextmanager
+    def _stage(self, report: RefreshReport, name: str):
+        """단계 하나의 소요 시간을 기록한다"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            report.stage_seconds[name] = time.perf_counter() - started
+
+    def _map(self, executor: ThreadPoolExecutor, report: RefreshReport, func, items: list) -> list:
+        """
+        작업들을 스레드 풀에 분산 실행하고 결과를 입력 순서대로 반환하는 함수
+
+        실패하거나 None을 반환한 작업은 결과에서 제외하고 실패 건수에 더한다.
+
+        Args:
+            executor: 사용할 스레드 풀
+            report: 실패 건수를 기록할 실행 결과
+            func: 입력 항목 하나를 받아 결과를 반환하는 함수
+            items: 입력 항목 리스트
+
+        Returns:
+            (입력 항목, 결과) 튜플 리스트
+        """
+        def run(item):
+            try:
+                return func(item)
+            except Exception as e:
+                logger.warning(f"갱신 작업 실패 ({item}): {e}")
+                return None
+
+        results = []
+        for item, result in zip(items, executor.map(run, items)):
+            if result is None:
+                report.failures += 1
+                continue
+            results.append((item, result))
+        return results
+
+    def run_intraday(self) -> RefreshReport:
+        """
+        장중 갱신을 실행하는 함수
+
+        직전 갱신 스냅샷과 비교해 시세가 바뀐 종목을 찾고,
+        그 종목을 포함한 테마의 거래량과 거래량 상위 테마의 종목 목록만 다시 수집한다.
+        거래량 순위는 다시 수집한 테마만 IncrementalRanking에 반영해 상위 REFRESH_INTRADAY_RANKING_LIMIT개를 게시한다.
+        거래일의 첫 갱신은 모든 테마를 수집한다.
+        게시 후에는 바뀐 순위·종목 목록·시세만 구독자에게 전달한다.
+
+        Returns:
+            단계별 소요 시간이 담긴 RefreshReport
+        """
+        report = RefreshReport("intraday")
+        store = get_data_store()
+        state = _intraday_state
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresh") as executor:
+                with self._stage(report, "prepare"):
+                    date_str, theme_tickers = get_theme_universe()
+                    membership = get_theme_membership(date_str)
+                    snapshot = get_market_snapshot(date_str, max_age_seconds=REFRESH_SNAPSHOT_MAX_AGE_SECONDS)
+
+                    changed_codes = None
+                    if state.date == date_str and state.snapshot is not None and len(state.snapshot):
+                        try:
+                            changed_codes = diff_snapshots(state.snapshot, snapshot)
+                        except Exception as e:
+                            logger.warning(f"장중 스냅샷 비교 실패, 전체 수집으로 전환: {e}")
+
+                    if changed_codes is None:
+                        state.reset(date_str)
+                        target_tickers = theme_tickers
+                    else:
+                        affected = set(membership.themes_containing(changed_codes))
+                        # 색인에 없는 테마, 아직 수집하지 못한 테마, 직전 수집에 실패한 테마는 항상 수집한다
+                        target_tickers = [
+                            ticker for ticker in theme_tickers
+                            if ticker in affected
+                            or ticker in state.stale_themes
+                            or ticker not in state.theme_volumes
+                            or not membership.has_theme(ticker)
+                        ]
+                        report.changed_stock_count = len(changed_codes)
+                    report.reused_theme_count = len(theme_tickers) - len(target_tickers)
+
+                    # 비교가 끝나면 바로 기준 스냅샷을 넘긴다 (이후 단계가 실패해도 다음 갱신의 비교를 막지 않는다)
+                    state.snapshot = snapshot
+                    state.stale_themes.difference_update(target_tickers)
+
+                with self._stage(report, "themes"):
+                    collected = self._map(
+                        executor, report, lambda ticker: collect_theme_volume(ticker, date_str), target_tickers
+                    )
+                    for ticker, theme in collected:
+                        state.theme_volumes[ticker] = theme
+                        state.volume_ranking.update(ticker, theme["trading_volume"])
+                    # 수집에 실패한 테마는 이번 변경분을 놓쳤으므로 다음 갱신에서 다시 수집한다
+                    refreshed = {ticker for ticker, _ in collected}
+                    state.stale_themes.update(ticker for ticker in target_tickers if ticker not in refreshed)
+                    # 전체 테마 목록에서 빠진 테마는 순위에서도 뺀다
+                    universe = set(theme_tickers)
+                    for ticker in [ticker for ticker in state.theme_volumes if ticker not in universe]:
+                        del state.theme_volumes[ticker]
+                        state.volume_ranking.remove(ticker)
+                    # 다시 수집한 테마만 순위에 반영했으므로 전체 테마를 정렬하지 않는다
+                    volume_themes = [state.theme_volumes[ticker] for ticker, _ in state.volume_ranking.top()]
+                    report.theme_count = len(collected)
+
+                with self._stage(report, "stocks"):
+                    target_codes = [
+                        theme["code"]
+                        for theme in volume_themes[:REFRESH_INTRADAY_THEME_LIMIT]
+                        if theme["code"] in refreshed or theme["code"] not in state.theme_stocks
+                    ]
+                    theme_stocks = self._map(
+                        executor, report, lambda code: collect_stocks_by_theme(code, date_str=date_str), target_codes
+                    )
+                    collected_codes = {code for code, _ in theme_stocks}
+                    state.stale_themes.update(code for code in target_codes if code not in collected_codes)
+                    report.stock_theme_count = len(theme_stocks)
+
+            with self._stage(report, "publish"):
+                delta = {"mode": "intraday", "date": date_str, "themes": {}, "theme_stocks": {}, "quotes": {}}
+
+                ranking = [(theme["code"], theme["trading_volume"]) for theme in volume_themes]
+                if volume_themes and ranking != state.ranking:
+                    store.publish_themes("volume", volume_themes)
+                    state.ranking = ranking
+                    delta["themes"]["volume"] = volume_themes[:REFRESH_INTRADAY_THEME_LIMIT]
+
+                for theme_code, result in theme_stocks:
+                    if result["stocks"] or result["etfs"]:
+                        store.publish_theme_stocks(theme_code, result)
+                        state.theme_stocks[theme_code] = result
+                        delta["theme_stocks"][theme_code] = result
+
+                if changed_codes is not None:
+                    delta["quotes"] = {code: _quote(snapshot, code) for code in changed_codes}
+                _emit_delta(delta)
+        except Exception:
+            # 이번 변경분을 놓쳤을 수 있으므로 다음 갱신은 전체 수집한다
+            state.snapshot = None
+            raise
+
+        logger.info(f"장중 데이터 갱신 파이프라인 완료: {report.summary()}")
+        return report
+
+    def run_final(self) -> RefreshReport:
+        """
+        장마감 후 최종 갱신을 실행하는 함수
+
+        모든 테마의 거래량·급등주 순위와 모든 테마의 종목 목록을 병렬로 갱신하고,
+        순위 상위 테마 대장주의 확정 지표(PER, PBR, 배당수익률, 투자자별 거래량)를 저장한다.
+
+        Returns:
+            단계별 소요 시간이 담긴 RefreshReport
+        """
+        report = RefreshReport("final")
+        store = get_data_store()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresh") as executor:
+            with self._stage(report, "prepare"):
+                date_str, theme_tickers = get_theme_universe()
+                get_theme_membership(date_str)
+                snapshot = get_market_snapshot(date_str)
+
+            with self._stage(report, "themes"):
+                volume_collected = self._map(
+                    executor, report, lambda ticker: collect_theme_volume(ticker, date_str), theme_tickers
+                )
+                volume_themes = sorted((theme for _, theme in volume_collected), key=lambda x: x["trading_volume"], reverse=True)
+                # 급등주 수는 전 종목을 한 번에 계산해 테마별로 집계한다
+                surge_themes = collect_all_theme_surge(date_str, snapshot)
+                report.theme_count = len(theme_tickers)
+
+            with self._stage(report, "stocks"):
+                theme_stocks = self._map(
+                    executor, report, lambda code: collect_stocks_by_theme(code, date_str=date_str), theme_tickers
+                )
+                report.stock_theme_count = len(theme_stocks)
+
+            with self._stage(report, "details"):
+                # 거래량/급등주 상위 테마의 대장주·ETF만 확정 지표를 수집한다
+                detail_theme_codes = {
+                    theme["code"]
+                    for theme in volume_themes[:REFRESH_DETAIL_THEME_LIMIT] + surge_themes[:REFRESH_DETAIL_THEME_LIMIT]
+                }
+                stock_codes = list(dict.fromkeys(
+                    row["code"]
+                    for theme_code, result in theme_stocks
+                    if theme_code in detail_theme_codes
+                    for row in result["stocks"] + result["etfs"]
+                ))
+                details = [
+                    detail
+                    for _, rows in self._map(
+                        executor, report, lambda code: collect_stock_details([code], date_str), stock_codes
+                    )
+                    for detail in rows
+                ]
+                report.detail_count = len(details)
+
+        with self._stage(report, "publish"):
+            if volume_themes:
+                store.publish_themes("volume", volume_themes)
+            if surge_themes:
+                store.publish_themes("surge", surge_themes)
+            for theme_code, result in theme_stocks:
+                if result["stocks"] or result["etfs"]:
+                    store.publish_theme_stocks(theme_code, result)
+            if details:
+                store.publish_stock_details(details)
+
+            _emit_delta({
+                "mode": "final",
+                "date": date_str,
+                "themes": {
+                    sort: themes[:REFRESH_DETAIL_THEME_LIMIT]
+                    for sort, themes in (("volume", volume_themes), ("surge", surge_themes))
+                    if themes
+                },
+                "theme_stocks": {
+                    theme_code: result for theme_code, result in theme_stocks if result["stocks"] or result["etfs"]
+                },
+                "quotes": {},
+            })
+
+        logger.info(f"장마감 후 최종 데이터 갱신 파이프라인 완료: {report.summary()}")
+        return report
+
+
+class SharedUpdateRelay:
+    """
+    다른 워커(스케줄러 리더)가 공유 저장소에 게시한 갱신을 이 워커의 변경분 구독자에게 전달하는 중계기
+
+    저장소 버전이 바뀌면 새로 게시된 테마 순위·테마별 종목 목록을 읽고,
+    스냅샷 파일이 새로 저장됐으면 직전 스냅샷과 비교해 시세가 바뀐 종목을 찾아
+    파이프라인과 같은 형식의 delta를 만든다. KRX는 호출하지 않는다.
+    """
+
+    def __init__(self):
+        self._version: int | None = None
+        self._snapshot: MarketSnapshot | None = None
+
+    def poll(self):
+        """새 게시가 있으면 변경분을 전달한다 (스케줄러 리더가 아닌 워커에서 주기적으로 호출)"""
+        store = get_data_store()
+        version = store.version
+        date_str = get_recent_trading_date()
+        snapshot = load_shared_snapshot(date_str)
+
+        if self._version is None:
+            # 첫 호출은 기준점만 잡는다 (이미 게시된 데이터는 초기 응답으로 받는다)
+            self._version, self._snapshot = version, snapshot
+            return
+
+        publications = store.get_publications_since(self._version) if version > self._version else {}
+        self._version = version
+        mode = "final" if "stock_details" in publications else "intraday"
+        limit = REFRESH_DETAIL_THEME_LIMIT if mode == "final" else REFRESH_INTRADAY_THEME_LIMIT
+        delta = {"mode": mode, "date": date_str, "themes": {}, "theme_stocks": {}, "quotes": {}}
+
+        for key in publications:
+            if key.startswith("themes:"):
+                sort = key.removeprefix("themes:")
+                stored = store.get_themes(sort)
+                if stored:
+                    delta["themes"][sort] = stored["themes"][:limit]
+            elif key.startswith("theme_stocks:"):
+                theme_code = key.removeprefix("theme_stocks:")
+                stored = store.get_theme_stocks(theme_code)
+                if stored:
+                    delta["theme_stocks"][theme_code] = {"stocks": stored["stocks"], "etfs": stored["etfs"]}
+
+        previous = self._snapshot
+        if snapshot is not None and previous is not None and snapshot is not previous:
+            if snapshot.date == previous.date and snapshot.created_at > previous.created_at:
+                changed_codes = diff_snapshots(previous, snapshot)
+                delta["quotes"] = {code: _quote(snapshot, code) for code in changed_codes}
+        if snapshot is not None:
+            self._snapshot = snapshot
+
+        _emit_delta(delta)
@@ -0,0 +1,149 @@
+"""
+요청 병합(single-flight) 유틸리티
+
+같은 키에 대한 비동기 호출이 동시에 여러 번 들어오면 실제 작업은 한 번만 실행하고,
+나머지 호출은 그 결과를 함께 기다린다.
+(예: 캐시가 비어 있을 때 같은 종목 뉴스 요청 100건 → 외부 API 호출 1회)
+
+사용 예시:
+    flight = SingleFlight()
+    news = await flight.do(("삼성전자", 5), fetch_news, "삼성전자", 5)
+
+    @coalesce
+    async def fetch_themes_by_surge(limit: int = 5) -> list[dict]:
+        ...
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    키 단위로 동시 실행을 하나로 합치는 비동기 호출 관리자
+
+    실제 작업은 별도 Task로 실행되므로, 먼저 호출한 요청이 취소되어도(클라이언트 연결 끊김 등)
+    함께 기다리던 다른 요청에는 영향을 주지 않는다.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+        self.calls = 0     # 실제로 실행한 작업 수
+        self.merged = 0    # 진행 중인 작업에 합류한 호출 수
+
+    def in_flight(self, key) -> bool:
+        """키에 해당하는 작업이 진행 중인지 확인한다"""
+        return key in self._inflight
+
+    def start(self, key, func, *args, **kwargs) -> asyncio.Task:
+        """
+        진행 중인 작업이 없으면 새로 시작하고, 있으면 그 작업을 반환하는 함수
+
+        결과를 기다리지 않는 백그라운드 갱신에 사용한다.
+
+        Args:
+            key: 병합 기준 키
+            func: 실행할 비동기 함수
+            *args, **kwargs: func 인자
+
+        Returns:
+            실제 작업 Task
+        """
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is not None and not task.done():
+                self.merged += 1
+                return task
+
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = task
+            self.calls += 1
+
+        def _finish(done: asyncio.Task):
+            with self._lock:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            # 기다리는 호출이 모두 취소된 경우에도 예외 미확인 경고가 남지 않도록 한다
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(_finish)
+        return task
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        키 단위로 병합된 비동기 호출을 실행하는 함수
+
+        Args:
+            key: 병합 기준 키 (해시 가능한 값)
+            func: 실행할 비동기 함수
+            *args, **kwargs: func 인자
+
+        Returns:
+            func의 반환값 (병합된 호출은 같은 결과를 공유한다)
+        """
+        task = self.start(key, func, *args, **kwargs)
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """실행 수, 병합 수, 진행 중인 작업 수를 반환한다"""
+        return {"calls": self.calls, "merged": self.merged, "in_flight": len(self._inflight)}
+
+
+def _freeze(value):
+    """병합 키에 쓸 수 있도록 리스트·딕셔너리 인자를 해시 가능한 값으로 바꾼다"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(item) for item in value))
+    return value
+
+
+# 함수 이름 → 병합 관리자 (지표 조회용)
+_coalesced_flights: dict[str, SingleFlight] = {}
+
+
+def coalesce(func):
+    """
+    동시에 들어온 같은 인자의 호출을 하나의 실행으로 합치는 데코레이터
+
+    병합 키는 (함수, 기본값을 채운 인자)이므로 fetch(5)와 fetch(limit=5)도 같은 호출로 본다.
+    병합된 호출은 같은 결과 객체를 공유하므로 호출자는 결과를 수정하지 않아야 한다.
+    이미 끝난 호출의 결과는 보관하지 않는다 (캐시가 아니라 동시 실행만 합친다).
+
+    Args:
+        func: 감쌀 비동기 함수
+
+    Returns:
+        병합 호출 래퍼 (wrapper.flight로 병합 관리자에 접근할 수 있다)
+    """
+    signature = inspect.signature(func)
+    flight = SingleFlight()
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = _freeze(bound.arguments)
+        return await flight.do(key, func, *args, **kwargs)
+
+    wrapper.flight = flight
+    _coalesced_flights[f"{func.__module__}.{func.__qualname__}"] = flight
+    return wrapper
+
+
+def get_coalesce_stats() -> dict[str, dict]:
+    """
+    @coalesce 함수별 실행 수, 병합된 대기 호출 수, 진행 중인 작업 수를 반환하는 함수
+
+    Returns:
+        {"모듈.함수": {"calls", "merged", "in_flight"}}
+    """
+    return {name: flight.stats() for name, flight in _coalesced_flights.items()}
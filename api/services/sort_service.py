@@ -2,28 +2,236 @@
 데이터 정렬·필터링 서비스 (Agent 2, Skill 2-4)
 
 종목 데이터를 다중 컬럼으로 정렬하고 타입별로 필터링하는 유틸리티 함수 모음
+
+종목 리스트를 컬럼별 numpy 배열(StockTable)로 바꿔 처리한다.
+- 정렬: np.lexsort 기반 안정 정렬 (숫자·문자열 컬럼, 오름차순/내림차순, 결측값 위치 지정)
+- 필터: 타입 + 컬럼 범위 조건을 불리언 마스크로 결합
+- 상위 k개: np.argpartition으로 전체 정렬 없이 선택
+
+테마별 대장주·ETF 선정(stock_service)과 테마별 종목 목록 API(/api/themes/{theme_code}/stocks)의
+정렬·필터·limit 파라미터가 사용한다.
 """
 import logging
 from typing import Any
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# 결측값 위치
+NULLS_FIRST = "first"
+NULLS_LAST = "last"
+
+
+class StockTable:
+    """
+    종목 리스트를 컬럼별 numpy 배열로 보관하는 표
+
+    숫자 컬럼은 float64 배열(결측값 NaN), 문자열 컬럼은 object 배열(결측값 None)로 변환한다.
+    컬럼은 처음 사용할 때 한 번만 변환해 둔다.
+
+    Args:
+        records: 종목 딕셔너리 리스트 (원본은 변경하지 않는다)
+    """
+
+    def __init__(self, records: list[dict[str, Any]]):
+        self.records = records
+        self._columns: dict[str, np.ndarray] = {}
+        self._nulls: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _load(self, name: str):
+        """컬럼 하나를 배열로 변환해 보관한다"""
+        values = [record.get(name) for record in self.records]
+        nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+
+        if any(isinstance(value, str) for value in values):
+            column = np.array(values, dtype=object)
+        else:
+            column = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            nulls |= np.isnan(column)
+
+        self._columns[name] = column
+        self._nulls[name] = nulls
+
+    def column(self, name: str) -> np.ndarray:
+        """컬럼 배열을 반환한다 (없는 키는 모두 결측값)"""
+        if name not in self._columns:
+            self._load(name)
+        return self._columns[name]
+
+    def nulls(self, name: str) -> np.ndarray:
+        """컬럼의 결측값 마스크를 반환한다"""
+        if name not in self._nulls:
+            self._load(name)
+        return self._nulls[name]
+
+    def is_numeric(self, name: str) -> bool:
+        """숫자 컬럼인지 확인한다"""
+        return self.column(name).dtype != object
+
+    def take(self, indices) -> list[dict[str, Any]]:
+        """행 번호 순서대로 원본 딕셔너리를 꺼낸다"""
+        return [self.records[i] for i in np.asarray(indices, dtype=np.intp).tolist()]
+
+
+def _sort_key(table: StockTable, column: str, descending: bool) -> np.ndarray:
+    """
+    컬럼 하나의 정렬 키 배열을 만드는 헬퍼 함수 (항상 오름차순으로 비교되는 값)
+
+    문자열 컬럼은 사전순 순위 번호로 바꾼 뒤 방향을 적용하고,
+    결측값 자리는 0으로 채운다 (결측값 위치는 별도 키로 정한다).
+    """
+    values = table.column(column)
+    nulls = table.nulls(column)
+
+    if table.is_numeric(column):
+        key = np.where(nulls, 0.0, values)
+    else:
+        key = np.zeros(len(values), dtype=np.int64)
+        present = ~nulls
+        if present.any():
+            _, ranks = np.unique(values[present].astype(str), return_inverse=True)
+            key[present] = ranks
+    return -key if descending else key
+
+
+def sort_indices(
+    table: StockTable,
+    sort_by: list[str],
+    order: list[str] | None = None,
+    nulls: str = NULLS_LAST,
+) -> np.ndarray:
+    """
+    다중 컬럼 안정 정렬 결과의 행 번호를 반환하는 함수
+
+    값이 같은 행은 입력 순서를 유지한다.
+
+    Args:
+        table: 정렬할 표
+        sort_by: 정렬 기준 컬럼 리스트 (앞쪽이 우선)
+        order: 컬럼별 방향 리스트 ("asc"/"desc", 모자라면 "desc")
+        nulls: 결측값 위치 ("first" 또는 "last", 방향과 무관)
+
+    Returns:
+        정렬된 행 번호 배열
+    """
+    if not sort_by or len(table) == 0:
+        return np.arange(len(table))
+
+    order = list(order or [])
+    order += ["desc"] * (len(sort_by) - len(order))
+
+    # np.lexsort는 마지막 키를 가장 우선하므로 우선순위 역순으로 쌓는다
+    keys = []
+    for column, direction in reversed(list(zip(sort_by, order))):
+        keys.append(_sort_key(table, column, direction == "desc"))
+        null_mask = table.nulls(column)
+        keys.append(~null_mask if nulls == NULLS_FIRST else null_mask)
+    return np.lexsort(keys)
+
+
+def build_filter_mask(
+    table: StockTable,
+    stock_type: str | None = None,
+    ranges: dict[str, tuple[float | None, float | None]] | None = None,
+) -> np.ndarray:
+    """
+    필터 조건을 모두 만족하는 행의 불리언 마스크를 만드는 함수
+
+    Args:
+        table: 필터링할 표
+        stock_type: 종목 타입 ('stock' 또는 'ETF', None이면 조건 없음)
+        ranges: 컬럼 → (최솟값, 최댓값) 범위 조건 (None인 경계는 제한 없음, 경계 포함)
+            예: {"price": (1000, None), "market_cap": (None, 10**12)}
+
+    Returns:
+        행별 통과 여부 배열 (결측값은 범위 조건을 통과하지 못한다)
+    """
+    mask = np.ones(len(table), dtype=bool)
+    if stock_type is not None:
+        mask &= table.column("type") == stock_type
+
+    for column, (low, high) in (ranges or {}).items():
+        if low is None and high is None:
+            continue
+        values = table.column(column)
+        if not table.is_numeric(column):
+            logger.warning(f"숫자가 아닌 컬럼에는 범위 조건을 적용할 수 없습니다: {column}")
+            continue
+        mask &= ~table.nulls(column)
+        with np.errstate(invalid="ignore"):
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+    return mask
+
+
+def top_k_indices(
+    table: StockTable,
+    column: str,
+    k: int,
+    descending: bool = True,
+    mask: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    숫자 컬럼 기준 상위 k개 행 번호를 전체 정렬 없이 구하는 함수
+
+    np.argpartition으로 k번째 값을 찾은 뒤 k개만 정렬한다.
+    값이 같으면 입력 순서가 앞선 행을 고르므로 전체 안정 정렬 후 자른 결과와 같다.
+    결측값 행은 제외한다.
+
+    Args:
+        table: 대상 표
+        column: 기준 숫자 컬럼
+        k: 선택할 행 수
+        descending: True면 큰 값부터
+        mask: 후보로 삼을 행 마스크 (build_filter_mask 결과 등)
+
+    Returns:
+        순위 순서의 행 번호 배열 (최대 k개)
+    """
+    candidates = np.flatnonzero(~table.nulls(column) if mask is None else mask & ~table.nulls(column))
+    if k <= 0 or len(candidates) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    values = table.column(column)[candidates]
+    key = -values if descending else values
+
+    if k < len(candidates):
+        threshold = key[np.argpartition(key, k - 1)[k - 1]]
+        better = np.flatnonzero(key < threshold)
+        ties = np.flatnonzero(key == threshold)[: k - len(better)]
+        selected = np.concatenate([better, ties])
+    else:
+        selected = np.arange(len(candidates))
+
+    # 선택된 k개만 (값, 입력 순서)로 정렬
+    ranked = selected[np.lexsort((selected, key[selected]))]
+    return candidates[ranked]
+
 
 def sort_stocks(
     stocks: list[dict[str, Any]],
     sort_by: list[str],
-    order: list[str]
+    order: list[str],
+    nulls: str = NULLS_LAST,
 ) -> list[dict[str, Any]]:
     """
     종목 리스트를 다중 컬럼으로 정렬하는 함수
 
     여러 컬럼을 기준으로 동시에 정렬할 수 있다.
     sort_by와 order 리스트의 순서대로 우선순위가 결정된다.
+    숫자·문자열 컬럼 모두 오름차순/내림차순을 지원하며, 입력 리스트는 변경하지 않는다.
 
     Args:
         stocks: 정렬할 종목 리스트
         sort_by: 정렬 기준 컬럼 이름 리스트 (예: ["volume", "price"])
-        order: 각 컬럼의 정렬 방향 리스트 (예: ["desc", "asc"])
+        order: 각 컬럼의 정렬 방향 리스트 (예: ["desc", "asc"], 모자라면 "desc")
+        nulls: 값이 없는(None 또는 키 없음) 종목의 위치 ("first" 또는 "last")
 
     Returns:
         정렬된 종목 리스트
@@ -35,22 +243,65 @@ def sort_stocks(
             order=["desc", "asc"]
         )
     """
-    # sort_by와 order 길이가 다르면 기본값(desc)으로 채운다
-    while len(order) < len(sort_by):
-        order.append("desc")
+    table = StockTable(stocks)
+    return table.take(sort_indices(table, sort_by, order, nulls))
 
-    def sort_key(stock: dict[str, Any]) -> tuple:
-        """정렬 키를 생성하는 내부 함수"""
-        keys = []
-        for column, direction in zip(sort_by, order):
-            value = stock.get(column, 0)
-            # 내림차순이면 음수로 변환 (숫자 데이터 기준)
-            if direction == "desc" and isinstance(value, (int, float)):
-                value = -value
-            keys.append(value)
-        return tuple(keys)
 
-    return sorted(stocks, key=sort_key)
+def filter_stocks(
+    stocks: list[dict[str, Any]],
+    stock_type: str | None = None,
+    price: tuple[float | None, float | None] | None = None,
+    trading_volume: tuple[float | None, float | None] | None = None,
+    market_cap: tuple[float | None, float | None] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    타입과 가격·거래량·시가총액 범위로 종목을 필터링하는 함수 (모든 조건 AND)
+
+    Args:
+        stocks: 필터링할 종목 리스트
+        stock_type: 종목 타입 ('stock' 또는 'ETF')
+        price: (최소, 최대) 가격 범위
+        trading_volume: (최소, 최대) 거래량 범위
+        market_cap: (최소, 최대) 시가총액 범위
+
+    Returns:
+        조건을 만족하는 종목 리스트 (입력 순서 유지)
+    """
+    table = StockTable(stocks)
+    ranges = {
+        column: bounds
+        for column, bounds in (("price", price), ("trading_volume", trading_volume), ("market_cap", market_cap))
+        if bounds is not None
+    }
+    return table.take(np.flatnonzero(build_filter_mask(table, stock_type, ranges)))
+
+
+def top_k_stocks(
+    stocks: list[dict[str, Any]],
+    column: str,
+    k: int,
+    descending: bool = True,
+    stock_type: str | None = None,
+) -> list[dict[str, Any]]:
+    """
+    숫자 컬럼 기준 상위 k개 종목을 반환하는 함수 (전체 정렬 없음)
+
+    Args:
+        stocks: 종목 리스트
+        column: 기준 컬럼 (예: "trading_volume")
+        k: 반환할 종목 수
+        descending: True면 큰 값부터
+        stock_type: 종목 타입으로 먼저 거를 때 지정 ('stock' 또는 'ETF')
+
+    Returns:
+        상위 k개 종목 리스트
+
+    사용 예시:
+        leaders = top_k_stocks(stocks, "trading_volume", 5, stock_type="stock")
+    """
+    table = StockTable(stocks)
+    mask = build_filter_mask(table, stock_type) if stock_type is not None else None
+    return table.take(top_k_indices(table, column, k, descending, mask))
 
 
 def filter_stocks_by_type(
@@ -68,3 +319,53 @@ def filter_stocks_by_type(
         필터링된 종목 리스트
     """
     return [stock for stock in stocks if stock.get("type") == stock_type]
+
+
+def select_stocks(
+    stocks: list[dict[str, Any]],
+    sort_by: list[str] | None = None,
+    order: list[str] | None = None,
+    nulls: str = NULLS_LAST,
+    stock_type: str | None = None,
+    ranges: dict[str, tuple[float | None, float | None]] | None = None,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    필터·정렬·개수 제한을 한 번에 적용하는 함수 (표는 한 번만 만든다)
+
+    숫자 컬럼 하나로 정렬하면서 limit을 주면 전체 정렬 대신 np.argpartition으로 상위 limit개만 고른다.
+    (결과는 전체 안정 정렬 후 자른 것과 같다)
+
+    Args:
+        stocks: 종목 리스트
+        sort_by: 정렬 기준 컬럼 리스트 (없으면 입력 순서 유지)
+        order: 컬럼별 정렬 방향 리스트 ("asc"/"desc", 모자라면 "desc")
+        nulls: 결측값 위치 ("first" 또는 "last")
+        stock_type: 종목 타입 ('stock' 또는 'ETF', None이면 조건 없음)
+        ranges: 컬럼 → (최솟값, 최댓값) 범위 조건 (build_filter_mask 참고)
+        limit: 최대 반환 개수 (None이면 제한 없음)
+
+    Returns:
+        조건을 만족하는 종목 리스트
+    """
+    table = StockTable(stocks)
+    mask = build_filter_mask(table, stock_type, ranges)
+    sort_by = sort_by or []
+    order = list(order or [])
+
+    if limit is not None and len(sort_by) == 1 and nulls == NULLS_LAST and table.is_numeric(sort_by[0]):
+        column = sort_by[0]
+        selected = top_k_indices(table, column, limit, descending=(order or ["desc"])[0] == "desc", mask=mask)
+        if len(selected) < limit:
+            # 값이 없는 행은 뒤에 입력 순서대로 붙인다
+            missing = np.flatnonzero(mask & table.nulls(column))[: limit - len(selected)]
+            selected = np.concatenate([selected, missing])
+        return table.take(selected)
+
+    rows = np.flatnonzero(mask)
+    if sort_by:
+        filtered = StockTable(table.take(rows))
+        rows = rows[sort_indices(filtered, sort_by, order, nulls)]
+    if limit is not None:
+        rows = rows[:limit]
+    return table.take(rows)
@@ -6,33 +6,45 @@ pykrx를 사용하여 테마별 종목 데이터를 수집하고,
 
 참조: docs/08_AgentSkillDesign.md — Skill 2-2
 """
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from pykrx import stock
+import os
+from datetime import datetime
+
+from services import krx_client
+from services.history_store import empty_history, get_history_store, history_to_columns, history_to_records
+from services.market_snapshot import MarketSnapshot, get_market_snapshot
+from services.singleflight import coalesce
+from services.sort_service import StockTable, build_filter_mask, top_k_indices
+from services.theme_membership import get_theme_members
+from services.trading_calendar import get_recent_trading_date, trading_days_back
 
 logger = logging.getLogger(__name__)
 
+# 차트 기간별 거래일 수 (1주 = 5거래일, 1개월 ≈ 21거래일, 1년 ≈ 250거래일)
+PERIOD_TRADING_DAYS = {
+    "1d": 1,
+    "1w": 5,
+    "1m": 21,
+    "3m": 63,
+    "6m": 126,
+    "1y": 250,
+    "3y": 750,
+    "5y": 1250,
+}
 
-def _get_recent_trading_date() -> str:
-    """
-    가장 최근 거래일을 가져오는 헬퍼 함수
+# 히스토리 응답 형식 (봉별 객체 리스트 / 컬럼별 병렬 배열)
+HISTORY_FORMAT_RECORDS = "records"
+HISTORY_FORMAT_COLUMNAR = "columnar"
 
-    Returns:
-        거래일 문자열 (형식: "YYYYMMDD")
-    """
-    today = datetime.today()
-    for offset in range(7):
-        target_date = today - timedelta(days=offset)
-        date_str = target_date.strftime("%Y%m%d")
-        try:
-            tickers = stock.get_market_ohlcv_by_date(date_str, date_str, "005930")
-            if not tickers.empty:
-                return date_str
-        except Exception:
-            continue
-    return today.strftime("%Y%m%d")
+# 배치 상세 조회에서 동시에 수집할 종목 수
+STOCK_BATCH_CONCURRENCY = int(os.getenv("STOCK_BATCH_CONCURRENCY", "8"))
+
+# 배치 상세 조회에서 수집에 실패한 종목에 담는 오류 메시지
+STOCK_DETAIL_ERROR = "종목 상세 정보를 불러오는 데 실패했습니다."
 
 
+@coalesce
 async def fetch_stocks_by_theme(theme_code: str, stock_limit: int = 5, etf_limit: int = 3) -> dict:
     """
     테마별 대장주와 ETF를 조회하는 함수
@@ -45,41 +57,66 @@ async def fetch_stocks_by_theme(theme_code: str, stock_limit: int = 5, etf_limit
         stock_limit: 대장주 수 (기본값: 5)
         etf_limit: ETF 수 (기본값: 3)
 
+    Returns:
+        {"stocks": [...], "etfs": [...]}
+    """
+    return await krx_client.run_blocking(collect_stocks_by_theme, theme_code, stock_limit, etf_limit)
+
+
+def collect_stocks_by_theme(
+    theme_code: str,
+    stock_limit: int = 5,
+    etf_limit: int = 3,
+    date_str: str | None = None,
+) -> dict:
+    """
+    테마별 대장주와 ETF를 수집하는 동기 함수
+
+    fetch_stocks_by_theme의 실제 구현으로, 스케줄러의 갱신 파이프라인이
+    작업 스레드에서 직접 호출할 수 있도록 동기 함수로 분리했다.
+
+    Args:
+        theme_code: 테마 코드 (pykrx 티커)
+        stock_limit: 대장주 수 (기본값: 5)
+        etf_limit: ETF 수 (기본값: 3)
+        date_str: 기준 거래일 (YYYYMMDD, 생략 시 최근 거래일)
+
     Returns:
         {"stocks": [...], "etfs": [...]}
     """
     logger.info(f"테마 {theme_code}의 종목 조회 시작 (대장주 {stock_limit}개, ETF {etf_limit}개)")
 
     try:
-        date_str = _get_recent_trading_date()
+        date_str = date_str or get_recent_trading_date()
 
-        # 테마에 속한 종목 코드 리스트 가져오기
-        theme_stock_codes = stock.get_index_portfolio_deposit_file(theme_code)
+        # 테마에 속한 종목 코드 리스트 가져오기 (거래일마다 한 번 만드는 구성 색인)
+        theme_stock_codes = get_theme_members(theme_code, date_str)
 
-        if theme_stock_codes is None or len(theme_stock_codes) == 0:
+        if not theme_stock_codes:
             logger.warning(f"테마 {theme_code}에 속한 종목이 없습니다.")
             return {"stocks": [], "etfs": []}
 
-        all_stocks = []
+        # 전 종목 시세를 한 번에 가져온 스냅샷 (종목별 KRX 호출 대신 사용)
+        snapshot = get_market_snapshot(date_str)
+
+        infos = []
         for stock_code in theme_stock_codes:
             try:
-                stock_info = _fetch_single_stock_info(stock_code, date_str)
+                stock_info = _snapshot_stock_info(snapshot, stock_code)
+                if stock_info is None:
+                    # 스냅샷에 없는 종목(ETF/ETN 등)만 개별 조회
+                    stock_info = _fetch_single_stock_info(stock_code, date_str)
                 if stock_info:
-                    all_stocks.append(stock_info)
+                    infos.append(stock_info)
             except Exception as e:
                 logger.warning(f"종목 {stock_code} 데이터 수집 실패: {e}")
                 continue
 
-        # 거래량 기준 내림차순 정렬
-        all_stocks.sort(key=lambda x: x.get("trading_volume", 0), reverse=True)
-
-        # 일반 종목과 ETF 분리
-        regular_stocks = [s for s in all_stocks if s.get("type") == "stock"]
-        etf_stocks = [s for s in all_stocks if s.get("type") == "ETF"]
-
+        # 일반 종목과 ETF별 거래량 상위 N개를 전체 정렬 없이 고른다 (같은 표를 공유)
+        table = StockTable(infos)
         result = {
-            "stocks": regular_stocks[:stock_limit],
-            "etfs": etf_stocks[:etf_limit],
+            "stocks": table.take(top_k_indices(table, "trading_volume", stock_limit, mask=build_filter_mask(table, "stock"))),
+            "etfs": table.take(top_k_indices(table, "trading_volume", etf_limit, mask=build_filter_mask(table, "ETF"))),
         }
 
         logger.info(
@@ -93,10 +130,43 @@ async def fetch_stocks_by_theme(theme_code: str, stock_limit: int = 5, etf_limit
         return {"stocks": [], "etfs": []}
 
 
+def _detect_stock_type(stock_name: str) -> str:
+    """종목명으로 종목 유형을 판별한다 (ETF/ETN 포함 여부)"""
+    return "ETF" if ("ETF" in stock_name or "ETN" in stock_name) else "stock"
+
+
+def _snapshot_stock_info(snapshot: MarketSnapshot, stock_code: str) -> dict | None:
+    """
+    시장 스냅샷에서 종목의 기본 정보를 만드는 내부 함수 (네트워크 호출 없음)
+
+    Args:
+        snapshot: 기준 거래일의 시장 스냅샷
+        stock_code: 종목 코드
+
+    Returns:
+        종목 정보 딕셔너리 또는 None (스냅샷에 없는 종목)
+    """
+    row = snapshot.row(stock_code)
+    if row is None:
+        return None
+
+    return {
+        "code": stock_code,
+        "name": row["name"],
+        "price": row["close"],
+        "trading_volume": row["volume"],
+        "market_cap": row["market_cap"],
+        "type": _detect_stock_type(row["name"]),
+        "updated_at": datetime.now().isoformat(),
+    }
+
+
 def _fetch_single_stock_info(stock_code: str, date_str: str) -> dict | None:
     """
     개별 종목의 기본 정보를 가져오는 내부 함수
 
+    시장 스냅샷에 포함되지 않는 종목(ETF/ETN 등)에만 사용한다.
+
     Args:
         stock_code: 종목 코드
         date_str: 기준 날짜 (YYYYMMDD)
@@ -106,10 +176,10 @@ def _fetch_single_stock_info(stock_code: str, date_str: str) -> dict | None:
     """
     try:
         # 종목명 가져오기
-        stock_name = stock.get_market_ticker_name(stock_code)
+        stock_name = krx_client.call("get_market_ticker_name", stock_code)
 
         # OHLCV 데이터 가져오기
-        ohlcv = stock.get_market_ohlcv_by_date(date_str, date_str, stock_code)
+        ohlcv = krx_client.call("get_market_ohlcv_by_date", date_str, date_str, stock_code)
         if ohlcv.empty:
             return None
 
@@ -118,13 +188,13 @@ def _fetch_single_stock_info(stock_code: str, date_str: str) -> dict | None:
         volume = int(ohlcv["거래량"].iloc[-1]) if "거래량" in ohlcv.columns else 0
 
         # 시가총액 가져오기
-        market_cap_data = stock.get_market_cap_by_date(date_str, date_str, stock_code)
+        market_cap_data = krx_client.call("get_market_cap_by_date", date_str, date_str, stock_code)
         market_cap = 0
         if not market_cap_data.empty and "시가총액" in market_cap_data.columns:
             market_cap = int(market_cap_data["시가총액"].iloc[-1])
 
         # ETF 여부 판별 (종목명에 ETF 또는 ETN 포함 여부)
-        stock_type = "ETF" if ("ETF" in stock_name or "ETN" in stock_name) else "stock"
+        stock_type = _detect_stock_type(stock_name)
 
         return {
             "code": stock_code,
@@ -140,7 +210,73 @@ def _fetch_single_stock_info(stock_code: str, date_str: str) -> dict | None:
         return None
 
 
-async def fetch_stock_detail(stock_code: str, period: str = "3m") -> dict:
+def _fetch_investor_trading(stock_code: str, date_str: str) -> tuple[int, int, int]:
+    """
+    투자자별 순매수 거래량(외국인, 기관, 개인)을 가져오는 내부 함수
+
+    Args:
+        stock_code: 종목 코드
+        date_str: 기준 날짜 (YYYYMMDD)
+
+    Returns:
+        (외국인, 기관합계, 개인) 순매수 거래량, 실패 시 0
+    """
+    foreign_trading = 0
+    institution_trading = 0
+    individual_trading = 0
+
+    try:
+        investor_data = krx_client.call("get_market_trading_volume_by_investor", date_str, date_str, stock_code)
+        if not investor_data.empty:
+            if "외국인" in investor_data.index:
+                foreign_trading = int(investor_data.loc["외국인", "순매수"] if "순매수" in investor_data.columns else 0)
+            if "기관합계" in investor_data.index:
+                institution_trading = int(investor_data.loc["기관합계", "순매수"] if "순매수" in investor_data.columns else 0)
+            if "개인" in investor_data.index:
+                individual_trading = int(investor_data.loc["개인", "순매수"] if "순매수" in investor_data.columns else 0)
+    except Exception as e:
+        logger.warning(f"종목 {stock_code} 투자자별 거래량 조회 실패: {e}")
+
+    return foreign_trading, institution_trading, individual_trading
+
+
+def collect_stock_details(stock_codes: list[str], date_str: str | None = None) -> list[dict]:
+    """
+    종목들의 상세 지표를 stock_details 테이블 형식으로 모으는 함수
+
+    장마감 후 최종 갱신에서 사용한다.
+    PER/PBR/배당수익률은 시장 스냅샷에서, 투자자별 거래량은 종목별로 조회한다.
+
+    Args:
+        stock_codes: 종목 코드 리스트
+        date_str: 기준 거래일 (YYYYMMDD, 생략 시 최근 거래일)
+
+    Returns:
+        stock_details 행 리스트
+    """
+    date_str = date_str or get_recent_trading_date()
+    snapshot = get_market_snapshot(date_str)
+
+    details = []
+    for stock_code in stock_codes:
+        foreign_trading, institution_trading, individual_trading = _fetch_investor_trading(stock_code, date_str)
+        details.append({
+            "stock_code": stock_code,
+            "foreign_trading": foreign_trading,
+            "institution_trading": institution_trading,
+            "individual_trading": individual_trading,
+            # 0은 "값 없음"을 뜻하므로 None으로 변환
+            "per": snapshot.value(stock_code, "per") or None,
+            "pbr": snapshot.value(stock_code, "pbr") or None,
+            "industry_per": None,  # 동일업종 PER은 별도 API 필요
+            "dividend_yield": snapshot.value(stock_code, "dividend_yield") or None,
+            "updated_at": datetime.now().isoformat(),
+        })
+    return details
+
+
+@coalesce
+async def fetch_stock_detail(stock_code: str, period: str = "3m", history_format: str = HISTORY_FORMAT_RECORDS) -> dict:
     """
     개별 종목의 상세 정보를 조회하는 함수
 
@@ -148,72 +284,72 @@ async def fetch_stock_detail(stock_code: str, period: str = "3m") -> dict:
 
     Args:
         stock_code: 종목 코드 (예: "005930")
-        period: 차트 기간 ('1d', '1w', '1m', '3m')
+        period: 차트 기간 ('1d', '1w', '1m', '3m', '6m', '1y', '3y', '5y')
+        history_format: 히스토리 형식 ('records' = 봉별 객체 리스트, 'columnar' = 컬럼별 병렬 배열)
 
     Returns:
-        {"detail": {...}, "history": [...]}
+        {"detail": {...}, "history": [...] 또는 {"date": [...], "open": [...], ...}}
+    """
+    return await krx_client.run_blocking(
+        _collect_stock_detail, stock_code, period, history_format=history_format
+    )
+
+
+def _prepare_detail_context() -> tuple[str, MarketSnapshot]:
+    """상세 조회에 공통으로 쓰는 기준 거래일과 시장 스냅샷을 준비한다"""
+    date_str = get_recent_trading_date()
+    return date_str, get_market_snapshot(date_str)
+
+
+def _collect_stock_detail(
+    stock_code: str,
+    period: str,
+    date_str: str | None = None,
+    snapshot: MarketSnapshot | None = None,
+    history_format: str = HISTORY_FORMAT_RECORDS,
+) -> dict:
+    """
+    fetch_stock_detail의 동기 구현 (이벤트 루프 밖의 스레드에서 실행)
+
+    배치 조회에서는 기준 거래일과 시장 스냅샷을 한 번만 준비해 모든 종목에 넘긴다.
     """
     logger.info(f"종목 {stock_code} 상세 정보 조회 시작 (기간: {period})")
 
     try:
-        date_str = _get_recent_trading_date()
+        if date_str is None or snapshot is None:
+            date_str, snapshot = _prepare_detail_context()
 
-        # 종목명 가져오기
-        stock_name = stock.get_market_ticker_name(stock_code)
-
-        # 기간에 따른 시작일 계산
-        end_date = datetime.strptime(date_str, "%Y%m%d")
-        period_map = {
-            "1d": 1,
-            "1w": 7,
-            "1m": 30,
-            "3m": 90,
-        }
-        days_back = period_map.get(period, 90)
-        start_date = end_date - timedelta(days=days_back)
-        start_str = start_date.strftime("%Y%m%d")
-
-        # OHLCV 히스토리 가져오기 (차트용)
-        ohlcv_history = stock.get_market_ohlcv_by_date(start_str, date_str, stock_code)
-
-        history = []
-        if not ohlcv_history.empty:
-            for idx, row in ohlcv_history.iterrows():
-                history.append({
-                    "date": idx.strftime("%Y-%m-%d"),
-                    "open": int(row.get("시가", 0)),
-                    "high": int(row.get("고가", 0)),
-                    "low": int(row.get("저가", 0)),
-                    "close": int(row.get("종가", 0)),
-                    "volume": int(row.get("거래량", 0)),
-                })
+        # 종목명 가져오기 (스냅샷에 없으면 개별 조회)
+        stock_name = snapshot.name(stock_code) or krx_client.call("get_market_ticker_name", stock_code)
 
-        # 현재 시세 (최신 데이터)
-        current_price = history[-1]["close"] if history else 0
-        current_volume = history[-1]["volume"] if history else 0
+        # 기간에 따른 시작일 계산 (달력일이 아닌 실제 거래일 기준)
+        trading_days = PERIOD_TRADING_DAYS.get(period, PERIOD_TRADING_DAYS["3m"])
+        start_str = trading_days_back(trading_days, date_str)
 
-        # 시가총액
-        market_cap_data = stock.get_market_cap_by_date(date_str, date_str, stock_code)
-        market_cap = 0
-        if not market_cap_data.empty and "시가총액" in market_cap_data.columns:
-            market_cap = int(market_cap_data["시가총액"].iloc[-1])
+        # OHLCV 히스토리 가져오기 (차트용, 로컬 저장소에 없는 구간만 pykrx에서 받는다)
+        ohlcv_history = get_history_store().get_history(stock_code, start_str, date_str)
+        if history_format == HISTORY_FORMAT_COLUMNAR:
+            history = history_to_columns(ohlcv_history)
+        else:
+            history = history_to_records(ohlcv_history)
 
-        # 투자자별 거래량 (외국인, 기관, 개인)
-        foreign_trading = 0
-        institution_trading = 0
-        individual_trading = 0
+        # 현재 시세 (최신 데이터)
+        candle_count = len(ohlcv_history["date"])
+        current_price = int(ohlcv_history["close"][-1]) if candle_count else 0
+        current_volume = int(ohlcv_history["volume"][-1]) if candle_count else 0
+
+        # 시가총액 (시장 스냅샷에서 조회, 없으면 개별 조회)
+        in_snapshot = stock_code in snapshot
+        if in_snapshot:
+            market_cap = snapshot.value(stock_code, "market_cap", 0)
+        else:
+            market_cap_data = krx_client.call("get_market_cap_by_date", date_str, date_str, stock_code)
+            market_cap = 0
+            if not market_cap_data.empty and "시가총액" in market_cap_data.columns:
+                market_cap = int(market_cap_data["시가총액"].iloc[-1])
 
-        try:
-            investor_data = stock.get_market_trading_volume_by_investor(date_str, date_str, stock_code)
-            if not investor_data.empty:
-                if "외국인" in investor_data.index:
-                    foreign_trading = int(investor_data.loc["외국인", "순매수"] if "순매수" in investor_data.columns else 0)
-                if "기관합계" in investor_data.index:
-                    institution_trading = int(investor_data.loc["기관합계", "순매수"] if "순매수" in investor_data.columns else 0)
-                if "개인" in investor_data.index:
-                    individual_trading = int(investor_data.loc["개인", "순매수"] if "순매수" in investor_data.columns else 0)
-        except Exception as e:
-            logger.warning(f"종목 {stock_code} 투자자별 거래량 조회 실패: {e}")
+        # 투자자별 거래량 (외국인, 기관, 개인)
+        foreign_trading, institution_trading, individual_trading = _fetch_investor_trading(stock_code, date_str)
 
         # 기본적 지표 (PER, PBR, 배당수익률)
         per = None
@@ -221,22 +357,28 @@ async def fetch_stock_detail(stock_code: str, period: str = "3m") -> dict:
         dividend_yield = None
 
         try:
-            fundamental = stock.get_market_fundamental_by_date(date_str, date_str, stock_code)
-            if not fundamental.empty:
-                if "PER" in fundamental.columns:
-                    per_val = float(fundamental["PER"].iloc[-1])
-                    per = per_val if per_val != 0 else None
-                if "PBR" in fundamental.columns:
-                    pbr_val = float(fundamental["PBR"].iloc[-1])
-                    pbr = pbr_val if pbr_val != 0 else None
-                if "DIV" in fundamental.columns:
-                    div_val = float(fundamental["DIV"].iloc[-1])
-                    dividend_yield = div_val if div_val != 0 else None
+            if in_snapshot:
+                # 0은 "값 없음"을 뜻하므로 None으로 변환
+                per = snapshot.value(stock_code, "per") or None
+                pbr = snapshot.value(stock_code, "pbr") or None
+                dividend_yield = snapshot.value(stock_code, "dividend_yield") or None
+            else:
+                fundamental = krx_client.call("get_market_fundamental_by_date", date_str, date_str, stock_code)
+                if not fundamental.empty:
+                    if "PER" in fundamental.columns:
+                        per_val = float(fundamental["PER"].iloc[-1])
+                        per = per_val if per_val != 0 else None
+                    if "PBR" in fundamental.columns:
+                        pbr_val = float(fundamental["PBR"].iloc[-1])
+                        pbr = pbr_val if pbr_val != 0 else None
+                    if "DIV" in fundamental.columns:
+                        div_val = float(fundamental["DIV"].iloc[-1])
+                        dividend_yield = div_val if div_val != 0 else None
         except Exception as e:
             logger.warning(f"종목 {stock_code} 펀더멘탈 조회 실패: {e}")
 
         # ETF 여부 판별
-        stock_type = "ETF" if ("ETF" in stock_name or "ETN" in stock_name) else "stock"
+        stock_type = _detect_stock_type(stock_name)
 
         detail = {
             "code": stock_code,
@@ -252,12 +394,72 @@ async def fetch_stock_detail(stock_code: str, period: str = "3m") -> dict:
             "pbr": pbr,
             "industry_per": None,  # 동일업종 PER은 별도 API 필요
             "dividend_yield": dividend_yield,
-            "updated_at": datetime.now().isoformat(),
+            # 데이터 기준 시각 (시장 스냅샷 수집 시각, 같은 데이터면 응답 본문과 ETag가 같다)
+            "updated_at": snapshot.created_at.isoformat(),
         }
 
-        logger.info(f"종목 {stock_code} 상세 정보 조회 완료 (히스토리 {len(history)}건)")
+        logger.info(f"종목 {stock_code} 상세 정보 조회 완료 (히스토리 {candle_count}건)")
         return {"detail": detail, "history": history}
 
     except Exception as e:
         logger.error(f"종목 상세 조회 실패: {e}")
-        return {"detail": None, "history": []}
+        empty = history_to_columns(empty_history()) if history_format == HISTORY_FORMAT_COLUMNAR else []
+        return {"detail": None, "history": empty}
+
+
+async def fetch_stock_details_batch(stock_codes: list[str], period: str = "3m") -> list[dict]:
+    """
+    여러 종목의 상세 정보를 한 번에 조회하는 함수
+
+    기준 거래일과 시장 스냅샷(시가총액, PER/PBR 등)은 한 번만 준비해 모든 종목이 공유하고,
+    종목별 히스토리·투자자 데이터는 STOCK_BATCH_CONCURRENCY개씩 동시에 수집한다.
+
+    Args:
+        stock_codes: 종목 코드 리스트 (중복은 하나로 합친다)
+        period: 차트 기간 ('1d', '1w', '1m', '3m', '6m', '1y', '3y', '5y')
+
+    Returns:
+        입력 순서대로 [{"code", "detail", "history"}] 리스트 (실패한 종목은 {"code", "error"})
+    """
+    return [result async for result in iter_stock_details(stock_codes, period, ordered=True)]
+
+
+async def iter_stock_details(stock_codes: list[str], period: str = "3m", ordered: bool = False):
+    """
+    여러 종목의 상세 정보를 수집되는 대로 하나씩 내보내는 비동기 제너레이터
+
+    NDJSON 스트리밍 응답에서 먼저 끝난 종목부터 보내는 데 사용한다.
+
+    Args:
+        stock_codes: 종목 코드 리스트 (중복은 하나로 합친다)
+        period: 차트 기간 ('1d', '1w', '1m', '3m', '6m', '1y', '3y', '5y')
+        ordered: True면 입력 순서대로, False면 완료 순서대로 내보낸다
+
+    Yields:
+        {"code", "detail", "history"} 딕셔너리 (수집에 실패한 종목은 {"code", "error"})
+    """
+    codes = list(dict.fromkeys(stock_codes))
+    if not codes:
+        return
+
+    date_str, snapshot = await krx_client.run_blocking(_prepare_detail_context)
+    semaphore = asyncio.Semaphore(max(1, STOCK_BATCH_CONCURRENCY))
+
+    async def collect(code: str) -> dict:
+        try:
+            async with semaphore:
+                result = await krx_client.run_blocking(_collect_stock_detail, code, period, date_str, snapshot)
+        except Exception as e:
+            # 한 종목의 실패가 나머지 종목의 결과까지 막지 않도록 종목별 오류로 돌려준다
+            logger.warning(f"종목 {code} 상세 수집 실패: {e}")
+            return {"code": code, "error": STOCK_DETAIL_ERROR}
+        return {"code": code, **result}
+
+    tasks = [asyncio.ensure_future(collect(code)) for code in codes]
+    try:
+        for next_result in (tasks if ordered else asyncio.as_completed(tasks)):
+            yield await next_result
+    finally:
+        # 클라이언트 연결이 끊겨 중단되면 남은 수집 작업을 취소한다
+        for task in tasks:
+            task.cancel()
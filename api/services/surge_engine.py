@@ -0,0 +1,146 @@
+"""
+급등주 계산 엔진
+
+전 종목 등락률을 시장 스냅샷에서 한 번에 계산하고,
+테마 구성 색인(CSR 배열)을 따라 테마별 급등주 수·거래량을 np.bincount로 한 번에 집계한다.
+여러 테마에 속한 종목도 등락률은 한 번만 계산된다.
+
+조건:
+- threshold: 등락률(%) 기준 (이 값 이상이면 급등주)
+- min_volume: 최소 거래량 (거래가 거의 없는 종목의 급등은 제외)
+- lookback: 비교 기간(거래일) — 1이면 전일 대비 등락률, N이면 N거래일 전 종가 대비 수익률
+"""
+import logging
+import threading
+
+import numpy as np
+
+from services.market_snapshot import MarketSnapshot, get_market_snapshot
+from services.theme_membership import ThemeMembership
+from services.trading_calendar import trading_days_back
+
+logger = logging.getLogger(__name__)
+
+# 급등주 기준 등락률(%) 기본값 — 전일 대비 이 값 이상 오른 종목을 급등주로 센다
+SURGE_CHANGE_RATE_THRESHOLD = 2.0
+
+# 최소 거래량 기본값 (0이면 제한 없음)
+SURGE_MIN_VOLUME = 0
+
+# 비교 기간(거래일) 기본값
+SURGE_LOOKBACK_DAYS = 1
+
+# (색인, 스냅샷) 쌍별 종목 행 번호 매핑 캐시 — 스냅샷이 바뀔 때만 다시 만든다
+_row_cache: dict[tuple, np.ndarray] = {}
+_row_cache_lock = threading.Lock()
+_ROW_CACHE_SIZE = 4
+
+
+def _aligned_rows(codes: list[str], snapshot: MarketSnapshot, cache_key: tuple) -> np.ndarray:
+    """
+    종목 코드 리스트를 스냅샷 행 번호 배열로 바꾸는 헬퍼 함수 (스냅샷에 없으면 -1)
+
+    같은 (색인, 스냅샷) 조합은 캐시해 두고 재사용한다.
+    """
+    key = cache_key + (snapshot.date, snapshot.created_at)
+    rows = _row_cache.get(key)
+    if rows is not None:
+        return rows
+
+    rows = np.fromiter((snapshot.index.get(code, -1) for code in codes), dtype=np.int64, count=len(codes))
+    with _row_cache_lock:
+        _row_cache[key] = rows
+        while len(_row_cache) > _ROW_CACHE_SIZE:
+            del _row_cache[next(iter(_row_cache))]
+    return rows
+
+
+def compute_change_rates(snapshot: MarketSnapshot, lookback: int = SURGE_LOOKBACK_DAYS) -> np.ndarray:
+    """
+    전 종목 등락률(%)을 스냅샷 행 순서대로 계산하는 함수
+
+    Args:
+        snapshot: 기준 거래일 시장 스냅샷
+        lookback: 비교 기간(거래일), 1이면 KRX 등락률을 그대로 사용
+
+    Returns:
+        등락률 배열 (계산할 수 없는 종목은 NaN)
+    """
+    if lookback <= 1:
+        return snapshot.column("change_rate")
+
+    base_date = trading_days_back(lookback, snapshot.date)
+    base = get_market_snapshot(base_date)
+    # 행 정렬은 현재 스냅샷의 종목 목록에도 달려 있으므로 현재 스냅샷도 키에 넣는다
+    base_rows = _aligned_rows(snapshot.codes, base, ("lookback", base_date, snapshot.date, snapshot.created_at))
+
+    present = base_rows >= 0
+    if len(base):
+        base_close = np.where(present, base.column("close")[np.where(present, base_rows, 0)], 0).astype(np.float64)
+    else:
+        base_close = np.zeros(len(snapshot), dtype=np.float64)
+    close = snapshot.column("close").astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(base_close > 0, (close / base_close - 1.0) * 100.0, np.nan)
+    return rates
+
+
+def compute_theme_surge(
+    membership: ThemeMembership,
+    snapshot: MarketSnapshot,
+    threshold: float = SURGE_CHANGE_RATE_THRESHOLD,
+    min_volume: int = SURGE_MIN_VOLUME,
+    lookback: int = SURGE_LOOKBACK_DAYS,
+) -> dict[str, np.ndarray]:
+    """
+    모든 테마의 급등주 수와 거래량 합계를 한 번에 계산하는 함수
+
+    Args:
+        membership: 테마 구성 색인
+        snapshot: 기준 거래일 시장 스냅샷
+        threshold: 급등주 기준 등락률(%)
+        min_volume: 급등주로 셀 최소 거래량
+        lookback: 비교 기간(거래일)
+
+    Returns:
+        {"surge_stock_count": 테마별 급등주 수, "trading_volume": 테마별 거래량 합계}
+        (배열 순서 = membership.theme_codes 순서)
+    """
+    theme_count = membership.theme_count
+    rows = _aligned_rows(membership.stock_codes, snapshot, ("membership", membership.trading_date, id(membership)))
+
+    # 종목 단위 계산 (전 종목 1회)
+    rates = compute_change_rates(snapshot, lookback)
+    volumes = snapshot.column("volume")
+    present = rows >= 0
+    safe_rows = np.where(present, rows, 0)
+    stock_volume = np.where(present, volumes[safe_rows], 0)
+    stock_rate = np.where(present, rates[safe_rows], np.nan)
+    with np.errstate(invalid="ignore"):
+        is_surge = present & (stock_rate >= threshold) & (stock_volume >= min_volume)
+
+    # 테마 단위 집계 (구성 항목 → 테마 번호로 group-by)
+    entry_stocks = membership.indices
+    surge_count = np.bincount(
+        membership.entry_themes, weights=is_surge[entry_stocks], minlength=theme_count
+    ).astype(np.int64)
+    trading_volume = np.bincount(
+        membership.entry_themes, weights=stock_volume[entry_stocks], minlength=theme_count
+    ).astype(np.int64)
+
+    return {"surge_stock_count": surge_count, "trading_volume": trading_volume}
+
+
+def rank_theme_positions(values: np.ndarray, limit: int | None = None) -> np.ndarray:
+    """
+    값 내림차순 테마 번호를 반환하는 함수 (값이 같으면 테마 번호 순, 안정 정렬)
+
+    Args:
+        values: 테마별 값 배열
+        limit: 상위 몇 개만 반환할지 (None이면 전체)
+
+    Returns:
+        테마 번호 배열
+    """
+    order = np.argsort(-values, kind="stable")
+    return order if limit is None else order[:limit]
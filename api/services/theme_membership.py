@@ -0,0 +1,380 @@
+"""
+테마 구성 종목 색인 서비스
+
+테마 → 구성 종목(정방향)과 종목 → 소속 테마(역방향) 관계를 거래일마다 한 번만 만들고,
+CSR(압축 희소 행) 형식의 정수 배열로 보관한다.
+테마 구성은 하루 중에는 바뀌지 않으므로 테마마다 get_index_portfolio_deposit_file을
+요청 때마다 호출할 필요가 없다.
+
+만든 색인은 THEME_MEMBERSHIP_PATH(npz 파일)에 저장해 두고,
+서버를 다시 시작하면 같은 거래일의 파일을 바로 불러온다.
+일부 테마 조회가 실패한 색인은 파일로 저장하지 않고 메모리에서만 쓰며,
+_RETRY_SECONDS마다 실패한 테마만 다시 조회해 채운다.
+
+배열 구조:
+- indptr[t]:indptr[t+1] 구간의 indices = 테마 t에 속한 종목 번호
+- reverse_indptr[s]:reverse_indptr[s+1] 구간의 reverse_indices = 종목 s가 속한 테마 번호
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services import krx_client
+from services.trading_calendar import get_recent_trading_date
+
+logger = logging.getLogger(__name__)
+
+# 색인 저장 파일 경로
+THEME_MEMBERSHIP_PATH = os.getenv("THEME_MEMBERSHIP_PATH", "tap_theme_membership.npz")
+
+# 색인 생성 시 구성 종목을 동시에 조회할 테마 수
+THEME_MEMBERSHIP_WORKERS = int(os.getenv("THEME_MEMBERSHIP_WORKERS", "8"))
+
+# 색인 생성이 실패하거나 일부 테마만 조회됐을 때 다시 시도하기까지의 간격(초)
+_RETRY_SECONDS = 60
+
+
+class ThemeMembership:
+    """
+    특정 거래일의 테마 ↔ 종목 소속 관계
+
+    Args:
+        trading_date: 기준 거래일 (YYYYMMDD)
+        theme_codes: 테마 티커 리스트 (테마 번호 순서)
+        theme_names: 테마 이름 리스트
+        stock_codes: 종목 코드 리스트 (종목 번호 순서)
+        indptr: 테마별 구성 종목 구간 (길이 = 테마 수 + 1)
+        indices: 구성 종목 번호
+        missing_themes: 구성 종목 조회에 실패해 색인에 빠진 테마 티커 리스트
+    """
+
+    def __init__(
+        self,
+        trading_date: str,
+        theme_codes: list[str],
+        theme_names: list[str],
+        stock_codes: list[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        missing_themes: list[str] | None = None,
+    ):
+        self.trading_date = trading_date
+        self.theme_codes = theme_codes
+        self.theme_names = theme_names
+        self.stock_codes = stock_codes
+        self.indptr = indptr.astype(np.int32, copy=False)
+        self.indices = indices.astype(np.int32, copy=False)
+        self.missing_themes = list(missing_themes or [])
+        self.theme_index = {code: position for position, code in enumerate(theme_codes)}
+        self.stock_index = {code: position for position, code in enumerate(stock_codes)}
+
+        # 구성 항목별 테마 번호 (정방향 CSR을 펼친 배열, 테마별 집계에 사용)
+        self.entry_themes = np.repeat(np.arange(len(theme_codes), dtype=np.int32), np.diff(self.indptr))
+
+        # 역방향 CSR: 종목 번호로 정렬한 구성 항목의 테마 번호
+        order = np.argsort(self.indices, kind="stable")
+        self.reverse_indices = self.entry_themes[order]
+        counts = np.bincount(self.indices, minlength=len(stock_codes))
+        self.reverse_indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int32)
+
+    @property
+    def theme_count(self) -> int:
+        return len(self.theme_codes)
+
+    @property
+    def stock_count(self) -> int:
+        return len(self.stock_codes)
+
+    @property
+    def is_complete(self) -> bool:
+        """모든 테마의 구성 종목을 조회했는지 여부"""
+        return not self.missing_themes
+
+    def has_theme(self, theme_code: str) -> bool:
+        return theme_code in self.theme_index
+
+    def stocks_of(self, theme_code: str) -> list[str]:
+        """
+        테마에 속한 종목 코드 리스트를 반환하는 함수
+
+        Args:
+            theme_code: 테마 티커
+
+        Returns:
+            종목 코드 리스트 (KRX 구성 종목 순서, 테마가 없으면 빈 리스트)
+        """
+        position = self.theme_index.get(theme_code)
+        if position is None:
+            return []
+        members = self.indices[self.indptr[position]:self.indptr[position + 1]]
+        return [self.stock_codes[i] for i in members.tolist()]
+
+    def themes_of(self, stock_code: str) -> list[str]:
+        """
+        종목이 속한 테마 티커 리스트를 반환하는 함수
+
+        Args:
+            stock_code: 종목 코드
+
+        Returns:
+            테마 티커 리스트 (테마 번호 순서, 소속 테마가 없으면 빈 리스트)
+        """
+        position = self.stock_index.get(stock_code)
+        if position is None:
+            return []
+        themes = self.reverse_indices[self.reverse_indptr[position]:self.reverse_indptr[position + 1]]
+        return [self.theme_codes[i] for i in themes.tolist()]
+
+    def themes_containing(self, stock_codes: list[str]) -> list[str]:
+        """
+        종목 중 하나라도 포함한 테마 티커 리스트를 반환하는 함수
+
+        Args:
+            stock_codes: 종목 코드 리스트
+
+        Returns:
+            테마 티커 리스트 (테마 번호 순서, 중복 없음)
+        """
+        positions = [self.stock_index[code] for code in stock_codes if code in self.stock_index]
+        if not positions:
+            return []
+        mask = np.isin(self.indices, np.array(positions, dtype=np.int32))
+        return [self.theme_codes[i] for i in np.unique(self.entry_themes[mask]).tolist()]
+
+    def theme_name(self, theme_code: str) -> str | None:
+        position = self.theme_index.get(theme_code)
+        return self.theme_names[position] if position is not None else None
+
+    @classmethod
+    def from_members(
+        cls,
+        trading_date: str,
+        themes: list[tuple[str, str, list[str]]],
+        missing_themes: list[str] | None = None,
+    ) -> "ThemeMembership":
+        """
+        (테마 티커, 테마 이름, 구성 종목 코드 리스트) 목록으로 색인을 만드는 함수
+
+        Args:
+            trading_date: 기준 거래일
+            themes: 테마별 구성 정보
+            missing_themes: 조회에 실패한 테마 티커 리스트
+
+        Returns:
+            ThemeMembership
+        """
+        stock_index: dict[str, int] = {}
+        indptr = [0]
+        indices = []
+        for _, _, members in themes:
+            for code in dict.fromkeys(members):
+                indices.append(stock_index.setdefault(code, len(stock_index)))
+            indptr.append(len(indices))
+
+        return cls(
+            trading_date,
+            [code for code, _, _ in themes],
+            [name for _, name, _ in themes],
+            list(stock_index),
+            np.array(indptr, dtype=np.int32),
+            np.array(indices, dtype=np.int32),
+            missing_themes,
+        )
+
+    def save(self, path: str):
+        """색인을 npz 파일로 저장한다 (임시 파일에 쓴 뒤 교체)"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez_compressed(
+                file,
+                trading_date=np.array(self.trading_date),
+                theme_codes=np.array(self.theme_codes, dtype=str),
+                theme_names=np.array(self.theme_names, dtype=str),
+                stock_codes=np.array(self.stock_codes, dtype=str),
+                indptr=self.indptr,
+                indices=self.indices,
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ThemeMembership":
+        """npz 파일에서 색인을 불러온다"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                str(data["trading_date"]),
+                data["theme_codes"].tolist(),
+                data["theme_names"].tolist(),
+                data["stock_codes"].tolist(),
+                data["indptr"],
+                data["indices"],
+            )
+
+
+def _collect_theme(ticker: str) -> tuple[str, str, list[str]]:
+    """테마 하나의 이름과 구성 종목을 조회한다"""
+    name = krx_client.call("get_index_ticker_name", ticker)
+    members = krx_client.call("get_index_portfolio_deposit_file", ticker)
+    return ticker, name, [str(code) for code in (members if members is not None else [])]
+
+
+def _build_theme_membership(date_str: str, previous: ThemeMembership | None = None) -> ThemeMembership:
+    """
+    기준 거래일의 전체 테마 구성 종목을 조회해 색인을 만드는 함수
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD)
+        previous: 같은 거래일의 일부 색인 (주면 빠진 테마만 다시 조회해 합친다)
+
+    Returns:
+        ThemeMembership (조회에 실패한 테마는 missing_themes에 남는다)
+    """
+    started = time.perf_counter()
+    if previous is not None:
+        theme_tickers = previous.missing_themes
+        collected = [(code, previous.theme_name(code), previous.stocks_of(code)) for code in previous.theme_codes]
+    else:
+        theme_tickers = list(krx_client.call("get_index_ticker_list", date_str, market="테마") or [])
+        collected = []
+
+    def collect(ticker: str):
+        try:
+            return _collect_theme(ticker)
+        except Exception as e:
+            logger.warning(f"테마 {ticker} 구성 종목 조회 실패: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, THEME_MEMBERSHIP_WORKERS), thread_name_prefix="membership") as executor:
+        results = list(executor.map(collect, theme_tickers))
+
+    themes = collected + [theme for theme in results if theme is not None]
+    missing = [ticker for ticker, theme in zip(theme_tickers, results) if theme is None]
+    membership = ThemeMembership.from_members(date_str, themes, missing)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"{date_str} 테마 구성 색인 생성 완료 "
+        f"(테마 {membership.theme_count}개, 종목 {membership.stock_count}개, 실패 {len(missing)}개, {elapsed:.2f}초)"
+    )
+    return membership
+
+
+# 현재 테마 구성 색인 (거래일이 바뀌면 다시 만든다)
+_membership: ThemeMembership | None = None
+_membership_lock = threading.Lock()
+
+# 마지막 색인 생성 시도 (재시도 간격 계산용, 시각은 monotonic)
+_attempted_date: str | None = None
+_attempted_at = 0.0
+
+
+def _retry_pending(date_str: str) -> bool:
+    """같은 거래일의 직전 생성 시도 후 재시도 간격이 아직 지나지 않았는지 확인한다"""
+    return _attempted_date == date_str and time.monotonic() - _attempted_at < _RETRY_SECONDS
+
+
+def _load_from_disk(date_str: str | None = None) -> ThemeMembership | None:
+    """저장된 색인 파일을 불러온다 (거래일이 다르거나 파일이 없으면 None)"""
+    if not os.path.exists(THEME_MEMBERSHIP_PATH):
+        return None
+    try:
+        membership = ThemeMembership.load(THEME_MEMBERSHIP_PATH)
+    except Exception as e:
+        logger.warning(f"테마 구성 색인 파일 불러오기 실패: {e}")
+        return None
+    if date_str is not None and membership.trading_date != date_str:
+        return None
+    return membership
+
+
+def load_theme_membership() -> bool:
+    """
+    서버 시작 시 저장된 색인 파일을 메모리로 불러오는 함수 (네트워크 호출 없음)
+
+    Returns:
+        불러오기 성공 여부
+    """
+    global _membership
+    membership = _load_from_disk()
+    if membership is None:
+        return False
+    with _membership_lock:
+        if _membership is None or _membership.trading_date < membership.trading_date:
+            _membership = membership
+    logger.info(f"테마 구성 색인 파일 불러오기 완료 (기준 거래일 {membership.trading_date})")
+    return True
+
+
+def get_theme_membership(date_str: str | None = None) -> ThemeMembership:
+    """
+    기준 거래일의 테마 구성 색인을 반환하는 함수 (거래일마다 1회 생성)
+
+    메모리 → 색인 파일 → KRX 조회 순으로 찾고, 새로 만든 색인은 파일로 저장한다.
+    생성이 실패했거나(빈 색인) 일부 테마가 빠진 경우 _RETRY_SECONDS 동안은 다시 만들지 않고
+    기존 색인을 반환하며, 일부 색인은 간격이 지나면 빠진 테마만 다시 조회한다.
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD, 생략 시 최근 거래일)
+
+    Returns:
+        ThemeMembership
+    """
+    global _membership, _attempted_date, _attempted_at
+    date_str = date_str or get_recent_trading_date()
+    current = _membership
+    if current is not None and current.trading_date == date_str and (current.is_complete or _retry_pending(date_str)):
+        return current
+
+    with _membership_lock:
+        current = _membership
+        same_day = current is not None and current.trading_date == date_str
+        if same_day and current.is_complete:
+            return current
+        if _retry_pending(date_str):
+            # 직전 생성이 실패했거나 일부만 조회됐다면 재시도 간격 동안 기존 색인을 그대로 쓴다
+            return current if current is not None else ThemeMembership.from_members(date_str, [])
+
+        # 일부 색인이라도 다른 워커가 완성해 저장한 파일이 있으면 그것을 쓴다
+        membership = _load_from_disk(date_str)
+        if membership is None:
+            _attempted_date, _attempted_at = date_str, time.monotonic()
+            membership = _build_theme_membership(date_str, current if same_day else None)
+            if membership.theme_count == 0:
+                # KRX 조회가 모두 실패한 경우: 빈 색인을 하루 동안 쓰지 않도록 보관하지 않는다
+                logger.warning(f"{date_str} 테마 구성 색인이 비어 있어 이전 색인을 유지합니다 ({_RETRY_SECONDS}초 후 재시도).")
+                return current or membership
+            if not membership.is_complete:
+                # 일부 테마가 빠진 색인은 파일로 남기지 않고, 재시도 간격이 지나면 빠진 테마만 다시 조회한다
+                logger.warning(
+                    f"{date_str} 테마 구성 색인에서 {len(membership.missing_themes)}개 테마가 빠져 "
+                    f"{_RETRY_SECONDS}초 후 다시 조회합니다."
+                )
+            else:
+                try:
+                    membership.save(THEME_MEMBERSHIP_PATH)
+                except Exception as e:
+                    logger.warning(f"테마 구성 색인 저장 실패: {e}")
+        _membership = membership
+        return membership
+
+
+def get_theme_members(theme_code: str, date_str: str | None = None) -> list[str]:
+    """
+    테마에 속한 종목 코드 리스트를 반환하는 함수
+
+    색인에 없는 테마(당일 신규 테마 등)만 KRX에 직접 조회한다.
+
+    Args:
+        theme_code: 테마 티커
+        date_str: 기준 거래일 (YYYYMMDD, 생략 시 최근 거래일)
+
+    Returns:
+        종목 코드 리스트
+    """
+    membership = get_theme_membership(date_str)
+    if membership.has_theme(theme_code):
+        return membership.stocks_of(theme_code)
+    members = krx_client.call("get_index_portfolio_deposit_file", theme_code)
+    return [str(code) for code in (members if members is not None else [])]
@@ -7,38 +7,124 @@ pykrx를 사용하여 한국 증시 테마 데이터를 수집하고,
 참조: docs/08_AgentSkillDesign.md — Skill 2-1
 """
 import logging
-from datetime import datetime, timedelta
-from pykrx import stock
+from datetime import datetime
+
+import numpy as np
+
+from services import krx_client
+from services.market_snapshot import MarketSnapshot, get_market_snapshot
+from services.metadata_index import get_metadata_index
+from services.ranking import top_n
+from services.singleflight import coalesce
+from services.surge_engine import (
+    SURGE_CHANGE_RATE_THRESHOLD,
+    SURGE_LOOKBACK_DAYS,
+    SURGE_MIN_VOLUME,
+    compute_theme_surge,
+    rank_theme_positions,
+)
+from services.theme_membership import get_theme_membership
+from services.trading_calendar import get_recent_trading_date
 
 logger = logging.getLogger(__name__)
 
 
-def _get_recent_trading_date() -> str:
+def _theme_id(ticker: str) -> int:
+    """테마 티커로 themes.id 값을 만든다"""
+    return int(ticker) if ticker.isdigit() else hash(ticker) % 100000
+
+
+def get_theme_universe() -> tuple[str, list[str]]:
     """
-    가장 최근 거래일을 가져오는 헬퍼 함수
+    기준 거래일과 전체 테마 티커 목록을 반환하는 함수
 
-    주말이나 공휴일일 경우 최근 영업일을 반환한다.
-    pykrx가 데이터를 가져올 수 있는 날짜를 보장한다.
+    Returns:
+        (거래일 "YYYYMMDD", 테마 티커 리스트)
+    """
+    date_str = get_recent_trading_date()
+    theme_tickers = krx_client.call("get_index_ticker_list", date_str, market="테마")
+    return date_str, list(theme_tickers or [])
+
+
+def collect_theme_volume(ticker: str, date_str: str) -> dict | None:
+    """
+    테마 하나의 이름과 거래량을 수집하는 함수
+
+    Args:
+        ticker: 테마 티커
+        date_str: 기준 거래일 (YYYYMMDD)
 
     Returns:
-        거래일 문자열 (형식: "YYYYMMDD")
-    """
-    today = datetime.today()
-    # 최대 7일 전까지 탐색하여 유효한 거래일 찾기
-    for offset in range(7):
-        target_date = today - timedelta(days=offset)
-        date_str = target_date.strftime("%Y%m%d")
-        try:
-            # 테마 시장에서 티커 목록을 가져올 수 있는지 확인
-            tickers = stock.get_index_ticker_list(date_str, market="테마")
-            if tickers is not None and len(tickers) > 0:
-                return date_str
-        except Exception:
-            continue
-    # 탐색 실패 시 오늘 날짜 반환
-    return today.strftime("%Y%m%d")
+        테마 딕셔너리 또는 None (수집 실패)
+    """
+    try:
+        # 테마 이름 가져오기
+        theme_name = krx_client.call("get_index_ticker_name", ticker)
+
+        # 해당 테마의 OHLCV 데이터 가져오기 (거래량 포함)
+        ohlcv = krx_client.call("get_index_ohlcv_by_date", date_str, date_str, ticker)
+
+        # 거래량 데이터 추출
+        total_volume = 0
+        if not ohlcv.empty and "거래량" in ohlcv.columns:
+            total_volume = int(ohlcv["거래량"].iloc[-1])
+
+        return {
+            "id": _theme_id(ticker),
+            "code": ticker,
+            "name": theme_name,
+            "trading_volume": total_volume,
+            "surge_stock_count": 0,
+            "updated_at": datetime.now().isoformat(),
+        }
+    except Exception as e:
+        logger.warning(f"테마 {ticker} 데이터 수집 실패: {e}")
+        return None
 
 
+def collect_all_theme_surge(
+    date_str: str,
+    snapshot: MarketSnapshot,
+    threshold: float = SURGE_CHANGE_RATE_THRESHOLD,
+    min_volume: int = SURGE_MIN_VOLUME,
+    lookback: int = SURGE_LOOKBACK_DAYS,
+) -> list[dict]:
+    """
+    모든 테마의 급등주 수를 한 번에 계산해 급등주 순으로 반환하는 함수
+
+    전 종목 등락률은 스냅샷에서 한 번만 계산하고, 테마별 집계는 구성 색인을 따라
+    배열 연산으로 처리하므로 테마·종목마다 반복하지 않는다.
+
+    Args:
+        date_str: 기준 거래일 (YYYYMMDD)
+        snapshot: 기준 거래일의 시장 스냅샷
+        threshold: 급등주 기준 등락률(%)
+        min_volume: 급등주로 셀 최소 거래량
+        lookback: 비교 기간(거래일)
+
+    Returns:
+        급등주 수 내림차순 테마 딕셔너리 리스트 (같으면 KRX 테마 순서)
+    """
+    membership = get_theme_membership(date_str)
+    surge = compute_theme_surge(membership, snapshot, threshold, min_volume, lookback)
+    updated_at = datetime.now().isoformat()
+
+    surge_counts = surge["surge_stock_count"].tolist()
+    volumes = surge["trading_volume"].tolist()
+    return [
+        {
+            "id": _theme_id(membership.theme_codes[position]),
+            "code": membership.theme_codes[position],
+            "name": membership.theme_names[position],
+            "trading_volume": volumes[position],
+            "surge_stock_count": surge_counts[position],
+            "updated_at": updated_at,
+        }
+        for position in rank_theme_positions(surge["surge_stock_count"]).tolist()
+    ]
+
+
+@coalesce
 async def fetch_themes_by_volume(limit: int = 5) -> list[dict]:
     """
     거래량 기준으로 상위 테마를 조회하는 함수
@@ -52,42 +138,24 @@ async def fetch_themes_by_volume(limit: int = 5) -> list[dict]:
     Returns:
         거래량 상위 테마 리스트
     """
+    return await krx_client.run_blocking(_rank_themes_by_volume, limit)
+
+
+def _rank_themes_by_volume(limit: int) -> list[dict]:
+    """fetch_themes_by_volume의 동기 구현 (이벤트 루프 밖의 스레드에서 실행)"""
     logger.info(f"거래량 기준 상위 {limit}개 테마 조회 시작")
 
     try:
-        date_str = _get_recent_trading_date()
-        # pykrx에서 전체 테마 티커 목록 가져오기
-        theme_tickers = stock.get_index_ticker_list(date_str, market="테마")
+        date_str, theme_tickers = get_theme_universe()
 
         themes = []
         for ticker in theme_tickers:
-            try:
-                # 테마 이름 가져오기
-                theme_name = stock.get_index_ticker_name(ticker)
-
-                # 해당 테마의 OHLCV 데이터 가져오기 (거래량 포함)
-                ohlcv = stock.get_index_ohlcv_by_date(date_str, date_str, ticker)
-
-                # 거래량 데이터 추출
-                total_volume = 0
-                if not ohlcv.empty and "거래량" in ohlcv.columns:
-                    total_volume = int(ohlcv["거래량"].iloc[-1])
-
-                themes.append({
-                    "id": int(ticker) if ticker.isdigit() else hash(ticker) % 100000,
-                    "code": ticker,
-                    "name": theme_name,
-                    "trading_volume": total_volume,
-                    "surge_stock_count": 0,
-                    "updated_at": datetime.now().isoformat(),
-                })
-            except Exception as e:
-                logger.warning(f"테마 {ticker} 데이터 수집 실패: {e}")
-                continue
-
-        # 거래량 기준 내림차순 정렬 후 상위 N개 반환
-        themes.sort(key=lambda x: x["trading_volume"], reverse=True)
-        result = themes[:limit]
+            theme = collect_theme_volume(ticker, date_str)
+            if theme:
+                themes.append(theme)
+
+        # 거래량 기준 상위 N개만 선택 (전체 정렬 없음)
+        result = top_n(themes, limit, "trading_volume")
 
         logger.info(f"거래량 기준 상위 {limit}개 테마 조회 완료 (총 {len(themes)}개 중)")
         return result
@@ -97,65 +165,45 @@ async def fetch_themes_by_volume(limit: int = 5) -> list[dict]:
         return []
 
 
-async def fetch_themes_by_surge(limit: int = 5) -> list[dict]:
+@coalesce
+async def fetch_themes_by_surge(
+    limit: int = 5,
+    threshold: float = SURGE_CHANGE_RATE_THRESHOLD,
+    min_volume: int = SURGE_MIN_VOLUME,
+    lookback: int = SURGE_LOOKBACK_DAYS,
+) -> list[dict]:
     """
     급등주 기준으로 상위 테마를 조회하는 함수
 
-    각 테마에 속한 종목 중 전일 대비 상승률이 높은 종목 수를 세어,
+    각 테마에 속한 종목 중 기준 이상 상승한 종목 수를 세어,
     급등주가 많은 순서대로 상위 N개 테마를 반환한다.
 
     Args:
         limit: 반환할 테마 수 (기본값: 5)
+        threshold: 급등주 기준 등락률(%) (기본값: 2.0)
+        min_volume: 급등주로 셀 최소 거래량 (기본값: 0)
+        lookback: 비교 기간(거래일) (기본값: 1 = 전일 대비)
 
     Returns:
         급등주 많은 상위 테마 리스트
     """
-    logger.info(f"급등주 기준 상위 {limit}개 테마 조회 시작")
+    return await krx_client.run_blocking(_rank_themes_by_surge, limit, threshold, min_volume, lookback)
+
+
+def _rank_themes_by_surge(limit: int, threshold: float, min_volume: int, lookback: int) -> list[dict]:
+    """fetch_themes_by_surge의 동기 구현 (이벤트 루프 밖의 스레드에서 실행)"""
+    logger.info(
+        f"급등주 기준 상위 {limit}개 테마 조회 시작 "
+        f"(기준 {threshold}%, 최소 거래량 {min_volume}, 비교 기간 {lookback}거래일)"
+    )
 
     try:
-        date_str = _get_recent_trading_date()
-        theme_tickers = stock.get_index_ticker_list(date_str, market="테마")
+        date_str = get_recent_trading_date()
 
-        themes = []
-        for ticker in theme_tickers:
-            try:
-                theme_name = stock.get_index_ticker_name(ticker)
-
-                # 테마에 속한 종목 목록 가져오기
-                theme_stocks = stock.get_index_portfolio_deposit_file(ticker)
-
-                # 급등주 수 계산 (전일 대비 2% 이상 상승한 종목)
-                surge_count = 0
-                total_volume = 0
-
-                if theme_stocks is not None and len(theme_stocks) > 0:
-                    for stock_code in theme_stocks:
-                        try:
-                            ohlcv = stock.get_market_ohlcv_by_date(date_str, date_str, stock_code)
-                            if not ohlcv.empty:
-                                if "등락률" in ohlcv.columns:
-                                    change_rate = float(ohlcv["등락률"].iloc[-1])
-                                    if change_rate >= 2.0:
-                                        surge_count += 1
-                                if "거래량" in ohlcv.columns:
-                                    total_volume += int(ohlcv["거래량"].iloc[-1])
-                        except Exception:
-                            continue
-
-                themes.append({
-                    "id": int(ticker) if ticker.isdigit() else hash(ticker) % 100000,
-                    "code": ticker,
-                    "name": theme_name,
-                    "trading_volume": total_volume,
-                    "surge_stock_count": surge_count,
-                    "updated_at": datetime.now().isoformat(),
-                })
-            except Exception as e:
-                logger.warning(f"테마 {ticker} 급등주 계산 실패: {e}")
-                continue
-
-        # 급등주 수 기준 내림차순 정렬 후 상위 N개 반환
-        themes.sort(key=lambda x: x["surge_stock_count"], reverse=True)
+        # 전 종목 시세를 한 번에 가져온 스냅샷 (종목별 KRX 호출 대신 사용)
+        snapshot = get_market_snapshot(date_str)
+
+        themes = collect_all_theme_surge(date_str, snapshot, threshold, min_volume, lookback)
         result = themes[:limit]
 
         logger.info(f"급등주 기준 상위 {limit}개 테마 조회 완료 (총 {len(themes)}개 중)")
@@ -166,41 +214,44 @@ async def fetch_themes_by_surge(limit: int = 5) -> list[dict]:
         return []
 
 
-async def search_themes(query: str) -> list[dict]:
+async def search_themes(query: str, limit: int = 20) -> list[dict]:
     """
     테마 이름으로 검색하는 함수
 
     사용자가 입력한 키워드로 테마를 검색하여 일치하는 테마 목록을 반환한다.
+    거래일마다 한 번 만든 이름 색인에서 찾으므로 검색마다 pykrx를 호출하지 않는다.
+    (접두어·부분 문자열·초성 검색 지원, 정확도 순 정렬)
 
     Args:
-        query: 검색할 테마 이름 키워드
+        query: 검색할 테마 이름 키워드 (초성 가능, 예: "ㅂㄷㅊ")
+        limit: 최대 결과 수
 
     Returns:
         검색 결과 테마 리스트
     """
+    return await krx_client.run_blocking(_find_themes, query, limit)
+
+
+def _find_themes(query: str, limit: int) -> list[dict]:
+    """search_themes의 동기 구현 (이벤트 루프 밖의 스레드에서 실행)"""
     logger.info(f"테마 검색 요청: '{query}'")
 
     try:
-        date_str = _get_recent_trading_date()
-        theme_tickers = stock.get_index_ticker_list(date_str, market="테마")
-
-        results = []
-        for ticker in theme_tickers:
-            try:
-                theme_name = stock.get_index_ticker_name(ticker)
-
-                # 검색 키워드가 테마 이름에 포함되어 있는지 확인 (대소문자 무시)
-                if query.lower() in theme_name.lower():
-                    results.append({
-                        "id": int(ticker) if ticker.isdigit() else hash(ticker) % 100000,
-                        "code": ticker,
-                        "name": theme_name,
-                        "trading_volume": 0,
-                        "surge_stock_count": 0,
-                        "updated_at": datetime.now().isoformat(),
-                    })
-            except Exception:
-                continue
+        # 색인이 없거나 거래일이 바뀌었을 때만 pykrx에서 이름을 불러온다
+        index = get_metadata_index()
+        updated_at = index.created_at.isoformat()
+
+        results = [
+            {
+                "id": _theme_id(ticker),
+                "code": ticker,
+                "name": theme_name,
+                "trading_volume": 0,
+                "surge_stock_count": 0,
+                "updated_at": updated_at,
+            }
+            for ticker, theme_name in index.themes.search(query, limit)
+        ]
 
         logger.info(f"테마 검색 완료: '{query}' → {len(results)}건")
         return results
@@ -208,3 +259,82 @@ async def search_themes(query: str) -> list[dict]:
     except Exception as e:
         logger.error(f"테마 검색 실패: {e}")
         return []
+
+
+@coalesce
+async def fetch_themes_of_stock(stock_code: str) -> dict:
+    """
+    종목이 속한 테마 목록과 테마별 실시간 지표를 조회하는 함수
+
+    테마 구성 색인의 역방향 조회로 소속 테마를 찾고,
+    테마별 거래량·급등주 수는 시장 스냅샷에서 계산하므로 KRX를 테마마다 호출하지 않는다.
+
+    Args:
+        stock_code: 종목 코드 (예: "005930")
+
+    Returns:
+        {"name", "date", "themes": [...]} (테마는 거래량 내림차순)
+    """
+    return await krx_client.run_blocking(_collect_themes_of_stock, stock_code)
+
+
+def _theme_stats(
+    theme_code: str,
+    theme_name: str,
+    members: list[str],
+    snapshot: MarketSnapshot,
+    surge_stock_count: int,
+) -> dict:
+    """
+    테마 구성 종목의 스냅샷 지표를 한 번에 집계하는 헬퍼 함수
+
+    Args:
+        theme_code: 테마 티커
+        theme_name: 테마 이름
+        members: 구성 종목 코드 리스트
+        snapshot: 기준 거래일의 시장 스냅샷
+        surge_stock_count: compute_theme_surge로 계산한 테마 급등주 수 (급등주 순위와 같은 기준)
+
+    Returns:
+        테마 딕셔너리 (themes 테이블 컬럼 + stock_count, average_change_rate)
+    """
+    positions = [position for position in map(snapshot.position, members) if position is not None]
+    volumes = snapshot.column("volume")[positions]
+    change_rates = snapshot.column("change_rate")[positions]
+    valid_rates = change_rates[~np.isnan(change_rates)]
+
+    return {
+        "id": _theme_id(theme_code),
+        "code": theme_code,
+        "name": theme_name,
+        "trading_volume": int(volumes.sum()),
+        "surge_stock_count": surge_stock_count,
+        "stock_count": len(members),
+        "average_change_rate": round(float(valid_rates.mean()), 2) if len(valid_rates) else None,
+        "updated_at": snapshot.created_at.isoformat(),
+    }
+
+
+def _collect_themes_of_stock(stock_code: str) -> dict:
+    """fetch_themes_of_stock의 동기 구현 (이벤트 루프 밖의 스레드에서 실행)"""
+    date_str = get_recent_trading_date()
+    membership = get_theme_membership(date_str)
+    snapshot = get_market_snapshot(date_str)
+
+    # 급등주 수는 급등주 순위와 같은 조건(등락률 기준, 최소 거래량, 비교 기간)으로 전체 테마를 한 번에 계산한다
+    surge_counts = compute_theme_surge(membership, snapshot)["surge_stock_count"]
+
+    themes = [
+        _theme_stats(
+            theme_code,
+            membership.theme_name(theme_code),
+            membership.stocks_of(theme_code),
+            snapshot,
+            int(surge_counts[membership.theme_index[theme_code]]),
+        )
+        for theme_code in membership.themes_of(stock_code)
+    ]
+    themes.sort(key=lambda theme: theme["trading_volume"], reverse=True)
+
+    logger.info(f"종목 {stock_code} 소속 테마 조회 완료: {len(themes)}개")
+    return {"name": snapshot.name(stock_code), "date": date_str, "themes": themes}
@@ -0,0 +1,201 @@
+"""
+거래일 달력 서비스
+
+KRX 영업일 목록을 한 번 불러와 메모리에 보관하고,
+"가장 최근 거래일", "N 거래일 전" 같은 질문에 네트워크 호출 없이 답한다.
+날짜가 바뀌면(자정 이후) 달력을 다시 불러온다.
+
+장 시작 전에 불러온 달력에는 당일이 아직 없으므로,
+평일 장중에 당일이 빠져 있으면 일정 간격으로 한 번씩 다시 확인한다.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services import krx_client
+
+logger = logging.getLogger(__name__)
+
+# 달력에 보관할 과거 기간(일) — 5년 차트(1250거래일)를 덮을 수 있게 잡는다
+TRADING_CALENDAR_LOOKBACK_DAYS = int(os.getenv("TRADING_CALENDAR_LOOKBACK_DAYS", "1900"))
+
+# 장중에 당일이 달력에 없을 때 다시 불러오는 최소 간격(초)
+_INTRADAY_RELOAD_SECONDS = 600
+
+# 불러오기 실패 후 다시 시도하기까지의 간격(초)
+_RETRY_SECONDS = 60
+
+# 정규장 시작 시각 (이 시각 이후에야 당일 데이터가 생긴다)
+_MARKET_OPEN_HOUR = 9
+
+
+class TradingCalendar:
+    """
+    KRX 영업일 달력
+
+    영업일은 "YYYYMMDD" 문자열의 정렬된 리스트로 보관하고,
+    모든 조회는 이진 탐색으로 처리한다.
+    """
+
+    def __init__(self, lookback_days: int = TRADING_CALENDAR_LOOKBACK_DAYS):
+        self.lookback_days = lookback_days
+        self._days: list[str] = []
+        self._loaded_on: str | None = None   # 달력을 불러온 날짜 (YYYYMMDD)
+        self._loaded_from: str | None = None # 달력이 덮는 첫 날짜 (YYYYMMDD)
+        self._loaded_at = 0.0                # 마지막 불러오기 시도 시각 (monotonic)
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """KRX 영업일 목록을 불러왔는지 여부 (False면 평일 기준으로 대체 중)"""
+        return bool(self._days)
+
+    def _needs_reload(self, now: datetime) -> bool:
+        """달력을 다시 불러와야 하는지 판단한다"""
+        today = now.strftime("%Y%m%d")
+        elapsed = time.monotonic() - self._loaded_at
+
+        if not self._days:
+            # 불러오기 실패 상태라면 재시도 간격을 지킨다
+            return self._loaded_on != today or elapsed >= _RETRY_SECONDS
+        if self._loaded_on != today:
+            return True
+        # 평일 장중인데 당일이 아직 달력에 없으면 주기적으로 다시 확인
+        if now.weekday() < 5 and now.hour >= _MARKET_OPEN_HOUR and self._days[-1] != today:
+            return elapsed >= _INTRADAY_RELOAD_SECONDS
+        return False
+
+    def _load(self, now: datetime):
+        """KRX에서 영업일 목록을 불러온다 (잠금 안에서 호출)"""
+        today = now.strftime("%Y%m%d")
+        start = (now - timedelta(days=self.lookback_days)).strftime("%Y%m%d")
+        self._loaded_on = today
+        self._loaded_at = time.monotonic()
+
+        try:
+            days = krx_client.call("get_previous_business_days", fromdate=start, todate=today)
+            self._days = sorted(day.strftime("%Y%m%d") for day in days)
+            self._loaded_from = start
+            logger.info(f"거래일 달력 불러오기 완료 ({start}~{today}, {len(self._days)}일)")
+        except Exception as e:
+            logger.warning(f"거래일 달력 불러오기 실패, 평일 기준으로 대체합니다: {e}")
+            self._days = []
+
+    def _ensure_loaded(self) -> list[str]:
+        """필요하면 달력을 다시 불러오고 영업일 리스트를 반환한다"""
+        now = datetime.now()
+        if self._needs_reload(now):
+            with self._lock:
+                if self._needs_reload(now):
+                    self._load(now)
+        return self._days
+
+    def get_recent_trading_date(self) -> str:
+        """
+        가장 최근 거래일을 반환하는 함수 (네트워크 호출 없음)
+
+        Returns:
+            거래일 문자열 (형식: "YYYYMMDD")
+        """
+        days = self._ensure_loaded()
+        if days:
+            return days[-1]
+        return _latest_weekday(datetime.today())
+
+    def trading_days_back(self, count: int, from_date: str | None = None) -> str:
+        """
+        기준일로부터 count 거래일 전의 날짜를 반환하는 함수
+
+        Args:
+            count: 거슬러 올라갈 거래일 수 (0이면 기준일 자체)
+            from_date: 기준 거래일 (YYYYMMDD, 생략 시 최근 거래일)
+
+        Returns:
+            거래일 문자열 (형식: "YYYYMMDD")
+        """
+        days = self._ensure_loaded()
+        from_date = from_date or self.get_recent_trading_date()
+
+        position = bisect.bisect_right(days, from_date) - 1
+        if position - count >= 0:
+            return days[position - count]
+
+        # 달력 범위를 벗어나면 평일 기준으로 계산한다
+        date = datetime.strptime(from_date, "%Y%m%d")
+        remaining = count
+        while remaining > 0:
+            date -= timedelta(days=1)
+            if date.weekday() < 5:
+                remaining -= 1
+        return date.strftime("%Y%m%d")
+
+    def has_no_trading_days(self, start: str, end: str) -> bool:
+        """
+        구간에 영업일이 하나도 없다고 달력으로 확인되는지 검사하는 함수
+
+        달력을 쓸 수 없거나 구간이 달력 범위를 벗어나면 확인할 수 없으므로 False를 반환한다.
+
+        Args:
+            start: 시작일 (YYYYMMDD)
+            end: 종료일 (YYYYMMDD)
+
+        Returns:
+            영업일이 없음이 확인되면 True
+        """
+        days = self._ensure_loaded()
+        if not days or self._loaded_from is None or start < self._loaded_from or end > self._loaded_on:
+            return False
+        position = bisect.bisect_left(days, start)
+        return position >= len(days) or days[position] > end
+
+    def is_trading_day(self, date_str: str) -> bool:
+        """날짜가 KRX 영업일인지 확인한다"""
+        days = self._ensure_loaded()
+        if not days:
+            return datetime.strptime(date_str, "%Y%m%d").weekday() < 5
+        position = bisect.bisect_left(days, date_str)
+        return position < len(days) and days[position] == date_str
+
+
+def _latest_weekday(now: datetime) -> str:
+    """달력을 쓸 수 없을 때의 대체값: 오늘 또는 그 이전의 가장 가까운 평일"""
+    date = now
+    while date.weekday() >= 5:
+        date -= timedelta(days=1)
+    return date.strftime("%Y%m%d")
+
+
+# 앱 전체가 공유하는 거래일 달력
+_calendar = TradingCalendar()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """공유 거래일 달력 인스턴스를 반환한다"""
+    return _calendar
+
+
+def get_recent_trading_date() -> str:
+    """
+    가장 최근 거래일을 반환하는 함수
+
+    Returns:
+        거래일 문자열 (형식: "YYYYMMDD")
+    """
+    return _calendar.get_recent_trading_date()
+
+
+def trading_days_back(count: int, from_date: str | None = None) -> str:
+    """
+    기준일로부터 count 거래일 전의 날짜를 반환하는 함수
+
+    Args:
+        count: 거슬러 올라갈 거래일 수
+        from_date: 기준 거래일 (YYYYMMDD, 생략 시 최근 거래일)
+
+    Returns:
+        거래일 문자열 (형식: "YYYYMMDD")
+    """
+    return _calendar.trading_days_back(count, from_date)
@@ -0,0 +1,226 @@
+"""
+서버 워밍업 서비스
+
+서버 시작은 두 단계로 나눈다.
+1. 바인드: 무거운 모듈(pykrx, feedparser)을 불러오지 않고 바로 요청을 받는다 (/api/health는 즉시 응답)
+2. 워밍업: lifespan에서 백그라운드 작업으로 pykrx, 거래일 달력, 이름 색인, 시장 스냅샷, 테마 구성 색인을 미리 준비한다
+
+워밍업 중에도 요청은 처리되며(필요한 데이터는 요청이 직접 준비), 진행 상황은 /api/ready로 확인한다.
+단계가 실패해도 워밍업은 계속 진행하고, 실패한 데이터는 첫 요청 때 다시 준비된다.
+다만 필수 단계(거래일 달력, 시장 스냅샷)가 실패하면 "degraded" 상태로 두고
+WARMUP_RETRY_SECONDS마다 그 단계만 다시 시도해, 성공할 때까지 /api/ready는 503을 반환한다.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from services import krx_client, metrics
+from services.market_snapshot import get_market_snapshot
+from services.metadata_index import get_metadata_index
+from services.theme_membership import get_theme_membership, load_theme_membership
+from services.trading_calendar import get_recent_trading_date, get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+# 서버 시작 시 워밍업 실행 여부
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+# 필수 단계가 실패했을 때 다시 시도하는 간격(초)
+WARMUP_RETRY_SECONDS = int(os.getenv("WARMUP_RETRY_SECONDS", "60"))
+
+
+def _load_trading_calendar():
+    calendar = get_trading_calendar()
+    calendar.get_recent_trading_date()
+    if not calendar.is_loaded:
+        # 달력 조회가 실패하면 평일 기준으로 대체되므로 예외가 나지 않는다
+        raise RuntimeError("거래일 달력을 불러오지 못해 평일 기준으로 대체 중")
+
+
+def _load_market_snapshot():
+    get_market_snapshot(get_recent_trading_date())
+
+
+def _load_theme_membership():
+    get_theme_membership(get_recent_trading_date())
+
+
+# 워밍업 단계 (같은 단계의 작업은 동시에 실행하고, 단계는 순서대로 실행한다)
+_STAGES = (
+    (("membership_file", load_theme_membership), ("pykrx", krx_client.load_backend)),
+    (("trading_calendar", _load_trading_calendar),),
+    (
+        ("metadata_index", get_metadata_index),
+        ("market_snapshot", _load_market_snapshot),
+        ("theme_membership", _load_theme_membership),
+    ),
+)
+
+# 실패하면 준비 완료로 보지 않는 단계
+_REQUIRED_STEPS = ("trading_calendar", "market_snapshot")
+
+
+class Warmup:
+    """
+    단계별 워밍업 작업과 진행 상황
+
+    Args:
+        stages: ((작업 이름, 동기 함수), ...) 튜플의 튜플
+        required: 실패하면 준비 완료로 보지 않고 다시 시도할 작업 이름
+        retry_seconds: 필수 작업 재시도 간격(초)
+    """
+
+    def __init__(
+        self,
+        stages: tuple = _STAGES,
+        required: tuple[str, ...] = _REQUIRED_STEPS,
+        retry_seconds: float = WARMUP_RETRY_SECONDS,
+    ):
+        self.stages = stages
+        self.required = required
+        self.retry_seconds = retry_seconds
+        self.steps = {
+            name: {"name": name, "status": "pending", "required": name in required, "seconds": None, "error": None}
+            for stage in stages
+            for name, _ in stage
+        }
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.cancelled = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        """모든 단계를 한 번씩 실행했는지 여부 (취소되면 False)"""
+        return self.finished_at is not None
+
+    @property
+    def failed_required(self) -> list[str]:
+        """실패한 필수 단계 이름"""
+        return [name for name in self.required if name in self.steps and self.steps[name]["status"] == "failed"]
+
+    @property
+    def status(self) -> str:
+        """"pending", "running", "ready", "degraded"(필수 단계 실패, 재시도 중), "cancelled" 중 하나"""
+        if self.cancelled:
+            return "cancelled"
+        if self.started_at is None:
+            return "pending"
+        if not self.finished:
+            return "running"
+        return "degraded" if self.failed_required else "ready"
+
+    async def _run_step(self, name: str, func):
+        step = self.steps[name]
+        step["status"] = "running"
+        step["error"] = None
+        started = time.perf_counter()
+        try:
+            await krx_client.run_blocking(func)
+            step["status"] = "done"
+        except asyncio.CancelledError:
+            step["status"] = "cancelled"
+            raise
+        except Exception as e:
+            step["status"] = "failed"
+            step["error"] = str(e)
+            logger.warning(f"워밍업 단계 실패 ({name}): {e}")
+        finally:
+            step["seconds"] = round(time.perf_counter() - started, 3)
+
+    async def _retry_required(self):
+        """실패한 필수 단계를 성공할 때까지 일정 간격으로 다시 실행한다"""
+        functions = {name: func for stage in self.stages for name, func in stage}
+        while self.failed_required:
+            await asyncio.sleep(self.retry_seconds)
+            for name in self.failed_required:
+                await self._run_step(name, functions[name])
+        logger.info("워밍업 필수 단계 재시도 성공, 준비 완료")
+
+    async def run(self):
+        """모든 단계를 실행한다 (외부 호출은 "warmup" 엔드포인트로 기록)"""
+        token = metrics.set_endpoint("warmup")
+        self.started_at = datetime.now()
+        try:
+            for stage in self.stages:
+                await asyncio.gather(*(self._run_step(name, func) for name, func in stage))
+            self.finished_at = datetime.now()
+
+            failed = [name for name, step in self.steps.items() if step["status"] == "failed"]
+            elapsed = (self.finished_at - self.started_at).total_seconds()
+            logger.info(f"워밍업 완료 ({elapsed:.2f}초, 실패 {len(failed)}건{': ' + ', '.join(failed) if failed else ''})")
+            if self.failed_required:
+                logger.warning(f"워밍업 필수 단계 실패, {self.retry_seconds}초마다 다시 시도합니다: {', '.join(self.failed_required)}")
+                await self._retry_required()
+        except asyncio.CancelledError:
+            # 취소된 워밍업은 끝난 것으로 보지 않는다
+            self.cancelled = True
+            for step in self.steps.values():
+                if step["status"] in ("pending", "running"):
+                    step["status"] = "cancelled"
+            raise
+        finally:
+            metrics.reset_endpoint(token)
+
+    def start(self):
+        """워밍업을 현재 이벤트 루프의 백그라운드 작업으로 시작한다"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """진행 중인 워밍업을 기다리지 않고 취소한다 (이미 실행 중인 pykrx 호출은 끝까지 실행됨)"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def progress(self) -> dict:
+        """
+        진행 상황을 반환하는 함수
+
+        Returns:
+            {"ready", "status", "completed", "total", "started_at", "finished_at", "elapsed_seconds", "steps"}
+        """
+        completed = sum(1 for step in self.steps.values() if step["status"] in ("done", "failed", "skipped"))
+        elapsed = None
+        if self.started_at is not None and (self.finished or not self.cancelled):
+            elapsed = round(((self.finished_at or datetime.now()) - self.started_at).total_seconds(), 3)
+        status = self.status
+        return {
+            "ready": status == "ready",
+            "status": status,
+            "completed": completed,
+            "total": len(self.steps),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed_seconds": elapsed,
+            "steps": [dict(step) for step in self.steps.values()],
+        }
+
+
+# 서버 워밍업 전역 인스턴스
+_warmup = Warmup()
+
+
+def start_warmup():
+    """서버 시작 시 워밍업을 백그라운드로 시작한다 (WARMUP_ENABLED가 false면 바로 준비 완료)"""
+    if not WARMUP_ENABLED:
+        _warmup.started_at = _warmup.finished_at = datetime.now()
+        for step in _warmup.steps.values():
+            step["status"] = "skipped"
+        return
+    _warmup.start()
+
+
+async def stop_warmup():
+    """서버 종료 시 진행 중인 워밍업을 취소한다"""
+    await _warmup.stop()
+
+
+def get_warmup_progress() -> dict:
+    """워밍업 진행 상황 (/api/ready 응답)"""
+    return _warmup.progress()
@@ -0,0 +1,9 @@
+"""
+pytest 공통 설정
+
+api/ 디렉터리를 import 경로에 넣어 `from services.x import y` 형식을 그대로 쓴다.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
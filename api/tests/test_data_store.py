@@ -0,0 +1,69 @@
+"""사전 계산 데이터 저장소 테스트"""
+from datetime import datetime
+
+import pytest
+
+from services.data_store import InMemoryDataStore, SQLiteDataStore, is_fresh
+
+
+def _theme(code: str, trading_volume: int, surge_stock_count: int) -> dict:
+    return {
+        "id": int(code),
+        "name": f"테마{code}",
+        "code": code,
+        "trading_volume": trading_volume,
+        "surge_stock_count": surge_stock_count,
+        "updated_at": "2026-10-16T15:40:00",
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryDataStore()
+    return SQLiteDataStore(str(tmp_path / "store.sqlite3"))
+
+
+def test_volume_and_surge_rankings_do_not_overwrite_each_other(store):
+    store.publish_themes("surge", [_theme("5001", 999, 7)])
+    store.publish_themes("volume", [_theme("5001", 5, 0), _theme("5002", 3, 0)])
+
+    surge = store.get_themes("surge")["themes"]
+    volume = store.get_themes("volume")["themes"]
+
+    assert [(t["code"], t["trading_volume"], t["surge_stock_count"]) for t in surge] == [("5001", 999, 7)]
+    assert [(t["code"], t["trading_volume"], t["surge_stock_count"]) for t in volume] == [("5001", 5, 0), ("5002", 3, 0)]
+
+
+def test_republish_replaces_ranking_order(store):
+    store.publish_themes("volume", [_theme("5001", 5, 0), _theme("5002", 3, 0)])
+    store.publish_themes("volume", [_theme("5002", 9, 0)])
+
+    assert [t["code"] for t in store.get_themes("volume")["themes"]] == ["5002"]
+
+
+def test_publications_since_version(store):
+    first = store.publish_themes("volume", [_theme("5001", 5, 0)])
+    store.publish_theme_stocks("5001", {"stocks": [], "etfs": []})
+
+    assert set(store.get_publications_since(first)) == {"theme_stocks:5001"}
+
+
+@pytest.mark.parametrize(
+    ("published_at", "now", "fresh"),
+    [
+        # 장중에는 게시 후 DATA_STORE_MAX_AGE_SECONDS(600초) 동안만 유효
+        ("2026-10-16T10:00:00", "2026-10-16T10:05:00", True),
+        ("2026-10-16T10:00:00", "2026-10-16T10:15:00", False),
+        # 마지막 갱신(15:55) 이후 게시된 데이터는 밤사이·주말에도 다시 계산하지 않는다
+        ("2026-10-16T15:56:00", "2026-10-16T22:00:00", True),
+        ("2026-10-16T15:56:00", "2026-10-18T12:00:00", True),
+        ("2026-10-16T15:56:00", "2026-10-19T09:05:00", False),
+        # 마지막 갱신 전에 게시된 데이터는 장 마감 후 한 번 다시 계산한다
+        ("2026-10-16T15:41:00", "2026-10-16T16:30:00", False),
+    ],
+)
+def test_is_fresh_follows_refresh_schedule(published_at, now, fresh):
+    entry = {"updated_at": published_at}
+
+    assert is_fresh(entry, now=datetime.fromisoformat(now)) is fresh
@@ -0,0 +1,82 @@
+"""히스토리 저장소 테스트"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from services import history_store, trading_calendar
+from services.history_store import HistoryStore
+
+
+_BUSINESS_DAYS = list(pd.bdate_range("2026-08-01", "2026-10-16"))
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    calendar = trading_calendar.TradingCalendar(lookback_days=3650)
+    monkeypatch.setattr(history_store, "get_trading_calendar", lambda: calendar)
+    return calendar
+
+
+def _frame(dates: list[str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {column: [100] * len(dates) for column in ["시가", "고가", "저가", "종가", "거래량"]},
+        index=pd.to_datetime(dates),
+    )
+
+
+def _store(monkeypatch, frame) -> tuple[HistoryStore, list]:
+    calls = []
+
+    def call(func_name, *args, **kwargs):
+        if func_name == "get_previous_business_days":
+            return _BUSINESS_DAYS
+        calls.append(args[:2])
+        return frame
+
+    monkeypatch.setattr(history_store.krx_client, "call", call)
+    return HistoryStore(":memory:"), calls
+
+
+def test_empty_result_on_trading_days_is_fetched_again(calendar, monkeypatch):
+    store, calls = _store(monkeypatch, pd.DataFrame())
+
+    store.sync("005930", "20261005", "20261016")
+    store.sync("005930", "20261005", "20261016")
+
+    assert calls == [("20261005", "20261016")] * 2
+    assert store._coverage("005930") is None
+
+
+def test_empty_result_without_trading_days_is_recorded(calendar, monkeypatch):
+    store, calls = _store(monkeypatch, pd.DataFrame())
+
+    store.sync("005930", "20261010", "20261011")  # 토·일
+
+    assert store._coverage("005930")[:2] == ("20261010", "20261011")
+
+
+def test_rows_record_coverage(calendar, monkeypatch):
+    store, calls = _store(monkeypatch, _frame(["2026-10-15", "2026-10-16"]))
+
+    history = store.get_history("005930", "20261015", "20261016")
+
+    assert history["date"] == ["2026-10-15", "2026-10-16"]
+    assert store._coverage("005930")[:2] == ("20261015", "20261016")
+
+
+def _set_synced_at(store: HistoryStore, code: str, synced_at: datetime):
+    store._conn.execute("UPDATE history_coverage SET synced_at = ? WHERE code = ?", (synced_at.timestamp(), code))
+
+
+def test_last_day_synced_before_close_is_refetched(calendar, monkeypatch):
+    store, calls = _store(monkeypatch, _frame(["2026-10-15", "2026-10-16"]))
+    store.sync("005930", "20261015", "20261016")
+
+    # 마지막 일봉을 장중(14:00)에 받았다면 다음 날에도 확정값으로 다시 받는다
+    _set_synced_at(store, "005930", datetime(2026, 10, 16, 14, 0))
+    assert store._missing_ranges("005930", "20261015", "20261016") == [("20261016", "20261016")]
+
+    # 장 마감 후에 받은 일봉은 확정값이므로 다시 받지 않는다
+    _set_synced_at(store, "005930", datetime(2026, 10, 16, 16, 0))
+    assert store._missing_ranges("005930", "20261015", "20261016") == []
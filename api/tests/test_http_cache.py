@@ -0,0 +1,75 @@
+"""HTTP 캐시 미들웨어 테스트"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from middleware import http_cache
+from routers import stocks
+from services.data_store import InMemoryDataStore, SQLiteDataStore
+
+_ORIGIN = "http://localhost:3000"
+
+
+class _Store:
+    epoch = "test"
+
+    def get_publication(self, key):
+        return {"version": 7, "updated_at": datetime.now().isoformat()}
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_short_circuit_304_keeps_cors_headers(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "get_data_store", lambda: _Store())
+
+    response = client.get(
+        "/api/themes/1234/stocks",
+        headers={"Origin": _ORIGIN, "If-None-Match": http_cache.version_etag(7, "test")},
+    )
+
+    assert response.status_code == 304
+    assert response.headers["access-control-allow-origin"] == _ORIGIN
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_failed_stock_detail_is_not_cached(client, monkeypatch):
+    async def fetch_stock_detail(code, period, history_format):
+        return {"detail": None, "history": []}
+
+    monkeypatch.setattr(stocks, "fetch_stock_detail", fetch_stock_detail)
+
+    response = client.get("/api/stocks/005930")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+
+
+def test_fresh_store_does_not_match_old_etag(client, monkeypatch):
+    old_store = InMemoryDataStore()
+    old_store.publish_theme_stocks("1234", {"stocks": [], "etfs": []})
+    old_etag = http_cache.version_etag(old_store.get_publication("theme_stocks:1234")["version"], old_store.epoch)
+
+    # 재시작한 프로세스의 저장소는 같은 버전 번호를 다시 발급한다
+    new_store = InMemoryDataStore()
+    new_store.publish_theme_stocks("1234", {"stocks": [], "etfs": []})
+    monkeypatch.setattr(http_cache, "get_data_store", lambda: new_store)
+    monkeypatch.setattr(stocks, "get_data_store", lambda: new_store)
+
+    assert new_store.get_publication("theme_stocks:1234")["version"] == 1
+    assert http_cache.version_etag(1, new_store.epoch) != old_etag
+    response = client.get("/api/themes/1234/stocks", headers={"If-None-Match": old_etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == http_cache.version_etag(1, new_store.epoch)
+
+
+def test_sqlite_workers_share_epoch(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+
+    assert SQLiteDataStore(path).epoch == SQLiteDataStore(path).epoch
+    assert SQLiteDataStore(str(tmp_path / "other.sqlite3")).epoch != SQLiteDataStore(path).epoch
@@ -0,0 +1,48 @@
+"""시장 스냅샷 테스트"""
+import os
+
+import pandas as pd
+import pytest
+
+from services import market_snapshot
+from services.metadata_index import MetadataIndex, NameIndex
+
+
+def test_empty_ohlcv_is_not_cached_or_saved(monkeypatch, tmp_path):
+    monkeypatch.setattr(market_snapshot, "MARKET_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(market_snapshot, "_snapshots", {})
+    monkeypatch.setattr(market_snapshot.krx_client, "call", lambda func_name, *args, **kwargs: pd.DataFrame())
+
+    with pytest.raises(RuntimeError):
+        market_snapshot.get_market_snapshot("20261016")
+
+    assert "20261016" not in market_snapshot._snapshots
+    assert os.listdir(tmp_path) == []
+
+
+def test_names_come_from_metadata_index(monkeypatch):
+    index = MetadataIndex("20261016", NameIndex([]), NameIndex([("005930", "삼성전자")]))
+    monkeypatch.setattr(market_snapshot, "get_metadata_index", lambda: index)
+    calls = []
+
+    def call(func_name, *args, **kwargs):
+        calls.append((func_name, *args))
+        return "신규종목"
+
+    monkeypatch.setattr(market_snapshot.krx_client, "call", call)
+
+    assert market_snapshot._load_names(["005930", "999999"]) == ["삼성전자", "신규종목"]
+    # 색인에 없는 종목만 개별 조회한다
+    assert calls == [("get_market_ticker_name", "999999")]
+
+
+def test_invalidate_ignores_files_removed_by_other_workers(monkeypatch, tmp_path):
+    monkeypatch.setattr(market_snapshot, "MARKET_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(market_snapshot, "_snapshots", {})
+    (tmp_path / "market_20261015.npz").write_bytes(b"")
+    # 목록을 읽은 뒤 다른 워커가 지운 파일
+    monkeypatch.setattr(market_snapshot.os, "listdir", lambda path: ["market_20261014.npz", "market_20261015.npz"])
+
+    market_snapshot.invalidate_snapshot()
+
+    assert not (tmp_path / "market_20261015.npz").exists()
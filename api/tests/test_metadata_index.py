@@ -0,0 +1,75 @@
+"""테마·종목 이름 색인 테스트"""
+import pytest
+
+from services import krx_client, metadata_index
+
+_DATE = "20261016"
+
+
+@pytest.fixture
+def krx(monkeypatch):
+    """목록·이름 조회를 흉내 내는 가짜 KRX (lists에 없는 목록은 빈 결과)"""
+    state = {"lists": {}, "calls": []}
+
+    def call(func_name, *args, **kwargs):
+        state["calls"].append(func_name)
+        if func_name.endswith("_list"):
+            return state["lists"].get(func_name, [])
+        return f"이름 {args[0]}"
+
+    monkeypatch.setattr(krx_client, "call", call)
+    monkeypatch.setattr(metadata_index, "get_recent_trading_date", lambda: _DATE)
+    monkeypatch.setattr(metadata_index, "_index", None)
+    monkeypatch.setattr(metadata_index, "_attempted_date", None)
+    monkeypatch.setattr(metadata_index, "_attempted_at", 0.0)
+    return state
+
+
+def _builds(state) -> int:
+    return state["calls"].count("get_index_ticker_list")
+
+
+def test_empty_index_is_not_cached_and_retried_after_backoff(krx, monkeypatch):
+    first = metadata_index.get_metadata_index()
+    metadata_index.get_metadata_index()
+
+    assert first.is_empty
+    assert metadata_index._index is None
+    assert _builds(krx) == 1
+
+    krx["lists"] = {
+        "get_index_ticker_list": ["T1"],
+        "get_market_ticker_list": ["005930"],
+        "get_etf_ticker_list": ["069500"],
+    }
+    monkeypatch.setattr(metadata_index, "_RETRY_SECONDS", 0)
+    index = metadata_index.get_metadata_index()
+
+    assert _builds(krx) == 2
+    assert index.complete
+    assert index.stocks.name_of("005930") == "이름 005930"
+    assert metadata_index.get_metadata_index() is index
+    assert _builds(krx) == 2
+
+
+def test_partial_index_is_rebuilt_after_backoff(krx, monkeypatch):
+    krx["lists"] = {"get_index_ticker_list": ["T1"], "get_market_ticker_list": ["005930"]}
+
+    def etf_fails(func_name, *args, **kwargs):
+        if func_name == "get_etf_ticker_list":
+            raise RuntimeError("조회 실패")
+        return call(func_name, *args, **kwargs)
+
+    call = krx_client.call
+    monkeypatch.setattr(krx_client, "call", etf_fails)
+
+    partial = metadata_index.get_metadata_index()
+
+    assert not partial.complete
+    assert metadata_index.get_metadata_index() is partial
+    assert _builds(krx) == 1
+
+    monkeypatch.setattr(metadata_index, "_RETRY_SECONDS", 0)
+    metadata_index.get_metadata_index()
+
+    assert _builds(krx) == 2
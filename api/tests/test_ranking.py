@@ -0,0 +1,55 @@
+"""순위 집계 서비스 테스트"""
+import random
+
+import pytest
+
+from services.ranking import IncrementalRanking, MultiRanking, top_n
+
+
+def _expected_top(scores: dict[str, float], limit: int) -> list[tuple[str, float]]:
+    # 값이 같으면 먼저 등록된 종목이 앞 (안정 정렬 후 자른 결과)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_ranking_matches_full_sort_after_each_update(seed):
+    rng = random.Random(seed)
+    codes = [f"{index:03d}" for index in range(40)]
+    ranking = IncrementalRanking(5)
+    scores: dict[str, float] = {}
+
+    for _ in range(500):
+        code = rng.choice(codes)
+        if scores and rng.random() < 0.05:
+            removed = rng.choice(list(scores))
+            del scores[removed]
+            ranking.remove(removed)
+            continue
+        score = rng.choice([0, 10, 20, 30, 40, 50])
+        scores[code] = score
+        ranking.update(code, score)
+        assert ranking.top() == _expected_top(scores, 5)
+
+    assert len(ranking) == len(scores)
+
+
+def test_incremental_ranking_refills_after_top_entry_drops():
+    ranking = IncrementalRanking(2)
+    ranking.update_many({"A": 30, "B": 20, "C": 10})
+    ranking.update("A", 5)
+    assert ranking.top() == [("B", 20), ("C", 10)]
+
+
+def test_multi_ranking_and_top_n_match_sorted():
+    rng = random.Random(3)
+    records = [
+        {"code": str(index), "type": rng.choice(["stock", "ETF"]), "trading_volume": rng.choice([1, 2, 3])}
+        for index in range(100)
+    ]
+    ranking = MultiRanking({"stock": 5, "ETF": 3}, ["trading_volume"])
+    ranking.extend(records)
+
+    by_volume = sorted(records, key=lambda record: record["trading_volume"], reverse=True)
+    assert ranking.top("stock", "trading_volume") == [r for r in by_volume if r["type"] == "stock"][:5]
+    assert ranking.top("ETF", "trading_volume") == [r for r in by_volume if r["type"] == "ETF"][:3]
+    assert top_n(records, 7, "trading_volume") == by_volume[:7]
@@ -0,0 +1,134 @@
+"""데이터 갱신 파이프라인 테스트"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from services import refresh_pipeline
+from services.market_snapshot import MarketSnapshot, diff_snapshots
+
+
+def _snapshot(closes: dict[str, int]) -> MarketSnapshot:
+    codes = list(closes)
+    return MarketSnapshot(
+        "20261016",
+        codes,
+        codes,
+        {
+            "close": np.array(list(closes.values()), dtype=np.int64),
+            "volume": np.zeros(len(codes), dtype=np.int64),
+        },
+        created_at=datetime(2026, 10, 16, 10, 0),
+    )
+
+
+class _Membership:
+    def themes_containing(self, codes):
+        return ["T1"] if "A" in codes else []
+
+    def has_theme(self, ticker):
+        return True
+
+
+class _Store:
+    def publish_themes(self, sort, themes):
+        pass
+
+    def publish_theme_stocks(self, theme_code, result):
+        pass
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    state = refresh_pipeline.IntradayState()
+    collected = []
+    current = {"snapshot": _snapshot({"A": 100, "B": 200})}
+
+    def collect_theme_volume(ticker, date_str):
+        collected.append(ticker)
+        return {"code": ticker, "name": ticker, "trading_volume": 1}
+
+    monkeypatch.setattr(refresh_pipeline, "_intraday_state", state)
+    monkeypatch.setattr(refresh_pipeline, "get_data_store", lambda: _Store())
+    monkeypatch.setattr(refresh_pipeline, "get_theme_universe", lambda: ("20261016", ["T1", "T2"]))
+    monkeypatch.setattr(refresh_pipeline, "get_theme_membership", lambda date_str: _Membership())
+    monkeypatch.setattr(refresh_pipeline, "get_market_snapshot", lambda date_str, max_age_seconds: current["snapshot"])
+    monkeypatch.setattr(refresh_pipeline, "collect_theme_volume", collect_theme_volume)
+    monkeypatch.setattr(
+        refresh_pipeline, "collect_stocks_by_theme", lambda code, date_str: {"stocks": [], "etfs": []}
+    )
+    return refresh_pipeline.RefreshPipeline(max_workers=2), state, collected, current
+
+
+def test_diff_against_empty_snapshot_marks_every_code_changed():
+    assert diff_snapshots(_snapshot({}), _snapshot({"A": 1, "B": 2})) == ["A", "B"]
+
+
+def test_intraday_falls_back_to_full_collection_when_diff_fails(pipeline, monkeypatch):
+    runner, state, collected, current = pipeline
+    runner.run_intraday()
+    assert sorted(collected) == ["T1", "T2"]
+
+    # 열이 맞지 않는 이전 스냅샷 → 비교 실패 → 전체 수집, 기준 스냅샷은 새 것으로 교체
+    state.snapshot = MarketSnapshot("20261016", ["A"], ["A"], {}, created_at=datetime(2026, 10, 16, 9, 0))
+    collected.clear()
+    report = runner.run_intraday()
+    assert sorted(collected) == ["T1", "T2"]
+    assert report.changed_stock_count is None
+    assert state.snapshot is current["snapshot"]
+
+    # 다음 갱신은 다시 변경분만 수집한다
+    current["snapshot"] = _snapshot({"A": 110, "B": 200})
+    collected.clear()
+    report = runner.run_intraday()
+    assert collected == ["T1"]
+    assert report.changed_stock_count == 1
+
+
+def test_intraday_recollects_themes_that_failed(pipeline, monkeypatch):
+    runner, state, collected, current = pipeline
+    runner.run_intraday()
+
+    def failing(ticker, date_str):
+        raise ConnectionError("KRX")
+
+    working = refresh_pipeline.collect_theme_volume
+    monkeypatch.setattr(refresh_pipeline, "collect_theme_volume", failing)
+    current["snapshot"] = _snapshot({"A": 110, "B": 200})
+    runner.run_intraday()
+    assert "T1" in state.stale_themes
+
+    # 시세가 그대로여도 실패한 테마는 다시 수집한다
+    monkeypatch.setattr(refresh_pipeline, "collect_theme_volume", working)
+    collected.clear()
+    runner.run_intraday()
+    assert collected == ["T1"]
+    assert not state.stale_themes
+
+
+def test_intraday_ranking_updates_only_recollected_themes(pipeline, monkeypatch):
+    runner, state, collected, current = pipeline
+    volumes = {"T1": 10, "T2": 20}
+    published = []
+
+    def collect_theme_volume(ticker, date_str):
+        collected.append(ticker)
+        return {"code": ticker, "name": ticker, "trading_volume": volumes[ticker]}
+
+    class _RecordingStore(_Store):
+        def publish_themes(self, sort, themes):
+            published.append([theme["code"] for theme in themes])
+
+    monkeypatch.setattr(refresh_pipeline, "collect_theme_volume", collect_theme_volume)
+    monkeypatch.setattr(refresh_pipeline, "get_data_store", lambda: _RecordingStore())
+
+    runner.run_intraday()
+    assert published[-1] == ["T2", "T1"]
+
+    # A가 바뀌어 T1만 다시 수집 → T2는 재사용한 값으로 순위 유지
+    volumes["T1"] = 30
+    current["snapshot"] = _snapshot({"A": 110, "B": 200})
+    collected.clear()
+    runner.run_intraday()
+    assert collected == ["T1"]
+    assert published[-1] == ["T1", "T2"]
@@ -0,0 +1,102 @@
+"""정렬·필터링 서비스 테스트"""
+import random
+
+import pytest
+
+from services.sort_service import (
+    NULLS_FIRST,
+    NULLS_LAST,
+    filter_stocks,
+    filter_stocks_by_type,
+    select_stocks,
+    sort_stocks,
+    top_k_stocks,
+)
+
+
+def _codes(stocks):
+    return [stock["code"] for stock in stocks]
+
+
+STOCKS = [
+    {"code": "A", "name": "나", "price": 300, "type": "stock"},
+    {"code": "B", "name": None, "price": None, "type": "stock"},
+    {"code": "C", "name": "가", "price": 100, "type": "ETF"},
+    {"code": "D", "name": "다", "type": "stock"},
+    {"code": "E", "name": "가", "price": 200, "type": "stock"},
+]
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_nulls_stay_last_in_either_direction(direction):
+    result = _codes(sort_stocks(STOCKS, ["price"], [direction]))
+    assert result[-2:] == ["B", "D"]
+    assert result[:3] == (["C", "E", "A"] if direction == "asc" else ["A", "E", "C"])
+
+
+def test_nulls_first():
+    assert _codes(sort_stocks(STOCKS, ["price"], ["desc"], nulls=NULLS_FIRST)) == ["B", "D", "A", "E", "C"]
+
+
+def test_descending_string_sort_with_secondary_key():
+    result = sort_stocks(STOCKS, ["name", "price"], ["desc", "asc"], nulls=NULLS_LAST)
+    assert _codes(result) == ["D", "A", "C", "E", "B"]
+
+
+def test_input_is_not_modified():
+    order = ["asc"]
+    before = list(STOCKS)
+    sort_stocks(STOCKS, ["price", "name"], order)
+    assert STOCKS == before and order == ["asc"]
+
+
+def test_ties_match_python_stable_sort():
+    rng = random.Random(7)
+    stocks = [
+        {"code": f"{index:03d}", "trading_volume": rng.choice([10, 20, 30]), "price": rng.choice([1, 2])}
+        for index in range(200)
+    ]
+    expected = sorted(stocks, key=lambda stock: (-stock["trading_volume"], stock["price"]))
+    assert sort_stocks(stocks, ["trading_volume", "price"], ["desc", "asc"]) == expected
+
+
+def test_filter_by_type():
+    assert _codes(filter_stocks_by_type(STOCKS, "ETF")) == ["C"]
+
+
+def test_range_bounds_are_inclusive_and_skip_missing_values():
+    result = filter_stocks(STOCKS, stock_type="stock", price=(200, 300))
+    assert _codes(result) == ["A", "E"]
+    assert _codes(filter_stocks(STOCKS, price=(None, 150))) == ["C"]
+    assert _codes(filter_stocks(STOCKS, price=(250, None))) == ["A"]
+
+
+def _tied_stocks(count: int) -> list[dict]:
+    rng = random.Random(11)
+    return [
+        {"code": f"{index:03d}", "trading_volume": rng.choice([5, 10, 15, 20]), "type": rng.choice(["stock", "ETF"])}
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize("k", [1, 3, 7, 50, 500])
+@pytest.mark.parametrize("descending", [True, False])
+def test_top_k_matches_stable_sort(k, descending):
+    stocks = _tied_stocks(200)
+    expected = sorted(stocks, key=lambda stock: stock["trading_volume"], reverse=descending)[:k]
+    assert top_k_stocks(stocks, "trading_volume", k, descending) == expected
+
+    expected_stocks = [stock for stock in sorted(stocks, key=lambda s: -s["trading_volume"]) if stock["type"] == "stock"][:k]
+    assert top_k_stocks(stocks, "trading_volume", k, stock_type="stock") == expected_stocks
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 10])
+def test_select_with_limit_matches_sort_then_slice(limit):
+    ranges = {"price": (None, 250)}
+    # 범위 조건이 있으면 값이 없는 종목은 제외된다
+    in_range = [stock for stock in STOCKS if stock.get("price") is not None and stock["price"] <= 250]
+    expected = sort_stocks(in_range, ["price"], ["asc"])[:limit]
+    assert select_stocks(STOCKS, ["price"], ["asc"], ranges=ranges, limit=limit) == expected
+
+    # 범위 조건 없이 limit만 주면 값이 없는 종목이 뒤에 붙는다
+    assert select_stocks(STOCKS, ["price"], ["desc"], limit=limit) == sort_stocks(STOCKS, ["price"], ["desc"])[:limit]
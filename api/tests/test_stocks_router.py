@@ -0,0 +1,131 @@
+"""종목 라우터 테스트"""
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from routers import stocks
+from services import stock_service
+
+_STORED = {
+    "stocks": [
+        {"code": "A", "name": "가", "price": 100, "trading_volume": 30, "type": "stock"},
+        {"code": "B", "name": "나", "price": 300, "trading_volume": 20, "type": "stock"},
+        {"code": "C", "name": "다", "price": 200, "trading_volume": 10, "type": "stock"},
+    ],
+    "etfs": [{"code": "E", "name": "KODEX", "price": 50, "trading_volume": 5, "type": "ETF"}],
+    "version": 3,
+}
+
+
+class _Store:
+    epoch = "test"
+
+    def get_theme_stocks(self, theme_code):
+        return {**_STORED, "updated_at": datetime.now().isoformat()}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(stocks, "get_data_store", lambda: _Store())
+    return TestClient(main.app)
+
+
+def test_theme_stocks_sort_and_type_filter(client):
+    response = client.get("/api/themes/1234/stocks", params={"sort_by": "price", "order": "asc", "type": "stock"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [stock["code"] for stock in body["stocks"]] == ["A", "C", "B"]
+    assert body["etfs"] == []
+
+
+def test_theme_stocks_range_filter_and_limit(client):
+    response = client.get(
+        "/api/themes/1234/stocks",
+        params={"min_price": 150, "max_volume": 25, "sort_by": "price", "order": "desc", "limit": 1},
+    )
+
+    body = response.json()
+    assert [stock["code"] for stock in body["stocks"]] == ["B"]
+    assert body["etfs"] == []
+
+
+def test_theme_stocks_rejects_unknown_sort_column(client):
+    assert client.get("/api/themes/1234/stocks", params={"sort_by": "updated_at"}).status_code == 422
+    assert client.get("/api/themes/1234/stocks", params={"sort_by": "price", "order": "up"}).status_code == 422
+
+
+def test_batch_ndjson_serializes_numpy_values(client, monkeypatch):
+    async def iter_stock_details(codes, period):
+        for code in codes:
+            yield {"code": code, "detail": {"price": np.int64(100)}, "history": {"close": np.array([1, 2])}}
+
+    monkeypatch.setattr(stocks, "iter_stock_details", iter_stock_details)
+
+    response = client.post(
+        "/api/stocks/batch",
+        json={"codes": ["005930", "000660"], "period": "1m"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["code"] for line in lines] == ["005930", "000660"]
+    assert lines[0]["history"]["close"] == [1, 2]
+
+
+def test_unknown_period_is_rejected_by_batch_only(client, monkeypatch):
+    periods = []
+
+    async def fetch_stock_detail(code, period, history_format):
+        periods.append(period)
+        return {"detail": None, "history": []}
+
+    monkeypatch.setattr(stocks, "fetch_stock_detail", fetch_stock_detail)
+
+    response = client.post("/api/stocks/batch", json={"codes": ["005930"], "period": "2w"})
+    assert response.status_code == 422
+    # 단건 조회는 알 수 없는 기간을 서비스의 기본 기간(3m)으로 처리한다
+    assert client.get("/api/stocks/005930", params={"period": "10y"}).status_code == 200
+    assert periods == ["10y"]
+
+
+def test_batch_ndjson_reports_failed_codes(client, monkeypatch):
+    def collect_stock_detail(code, period, date_str, snapshot):
+        if code == "000000":
+            raise RuntimeError("조회 실패")
+        return {"detail": {"price": 100}, "history": []}
+
+    monkeypatch.setattr(stock_service, "_prepare_detail_context", lambda: ("20261016", None))
+    monkeypatch.setattr(stock_service, "_collect_stock_detail", collect_stock_detail)
+
+    response = client.post(
+        "/api/stocks/batch",
+        json={"codes": ["005930", "000000"]},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    lines = {line["code"]: line for line in map(json.loads, response.text.splitlines())}
+    assert lines["005930"]["detail"] == {"price": 100}
+    assert lines["000000"] == {"code": "000000", "error": stock_service.STOCK_DETAIL_ERROR}
+
+
+def test_batch_ndjson_ends_with_error_line_when_stream_fails(client, monkeypatch):
+    async def iter_stock_details(codes, period):
+        yield {"code": codes[0], "detail": None, "history": []}
+        raise RuntimeError("스냅샷 조회 실패")
+
+    monkeypatch.setattr(stocks, "iter_stock_details", iter_stock_details)
+
+    response = client.post(
+        "/api/stocks/batch",
+        json={"codes": ["005930", "000660"]},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["code"] == "005930"
+    assert lines[-1] == {"error": stock_service.STOCK_DETAIL_ERROR}
@@ -0,0 +1,31 @@
+"""급등주 계산 엔진 테스트"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services import surge_engine
+from services.market_snapshot import MarketSnapshot
+
+
+def _snapshot(date: str, closes: dict[str, int], created_at: datetime) -> MarketSnapshot:
+    codes = list(closes)
+    return MarketSnapshot(
+        date,
+        codes,
+        codes,
+        {"close": np.array(list(closes.values()), dtype=np.int64)},
+        created_at=created_at,
+    )
+
+
+def test_change_rates_realign_when_current_ticker_list_changes(monkeypatch):
+    now = datetime(2026, 10, 16, 10, 0)
+    base = _snapshot("20261014", {"A": 100, "B": 200, "C": 400}, now - timedelta(days=2))
+    monkeypatch.setattr(surge_engine, "trading_days_back", lambda lookback, date: "20261014")
+    monkeypatch.setattr(surge_engine, "get_market_snapshot", lambda date: base)
+
+    first = _snapshot("20261016", {"A": 110, "B": 220}, now)
+    second = _snapshot("20261016", {"C": 440, "A": 120, "B": 180}, now + timedelta(minutes=5))
+
+    assert np.allclose(surge_engine.compute_change_rates(first, 2), [10.0, 10.0])
+    assert np.allclose(surge_engine.compute_change_rates(second, 2), [10.0, 20.0, -10.0])
@@ -0,0 +1,73 @@
+"""테마 구성 종목 색인 테스트"""
+import os
+
+import pytest
+
+from services import krx_client, theme_membership
+
+_DATE = "20261016"
+_MEMBERS = {"T1": ["A", "B"], "T2": ["B", "C"]}
+
+
+@pytest.fixture
+def krx(monkeypatch, tmp_path):
+    """테마 목록·구성 종목 조회를 흉내 내는 가짜 KRX (failing에 든 테마는 조회 실패)"""
+    state = {"failing": set(), "themes": list(_MEMBERS), "calls": []}
+
+    def call(func_name, *args, **kwargs):
+        state["calls"].append((func_name, *args))
+        if func_name == "get_index_ticker_list":
+            return state["themes"]
+        if func_name == "get_index_ticker_name":
+            return f"테마 {args[0]}"
+        if args[0] in state["failing"]:
+            raise RuntimeError("조회 실패")
+        return _MEMBERS[args[0]]
+
+    monkeypatch.setattr(krx_client, "call", call)
+    monkeypatch.setattr(theme_membership, "THEME_MEMBERSHIP_PATH", str(tmp_path / "membership.npz"))
+    monkeypatch.setattr(theme_membership, "_membership", None)
+    monkeypatch.setattr(theme_membership, "_attempted_date", None)
+    monkeypatch.setattr(theme_membership, "_attempted_at", 0.0)
+    return state
+
+
+def _member_calls(state) -> list[str]:
+    return [args[0] for func_name, *args in state["calls"] if func_name == "get_index_portfolio_deposit_file"]
+
+
+def test_partial_membership_is_not_saved_and_retries_missing_themes(krx, monkeypatch):
+    krx["failing"] = {"T2"}
+
+    membership = theme_membership.get_theme_membership(_DATE)
+
+    assert membership.theme_codes == ["T1"]
+    assert membership.missing_themes == ["T2"]
+    assert not os.path.exists(theme_membership.THEME_MEMBERSHIP_PATH)
+
+    # 재시도 간격 안에는 다시 조회하지 않는다
+    assert theme_membership.get_theme_membership(_DATE) is membership
+    assert _member_calls(krx) == ["T1", "T2"]
+
+    # 간격이 지나면 빠진 테마만 다시 조회하고, 완성된 색인을 저장한다
+    krx["failing"] = set()
+    monkeypatch.setattr(theme_membership, "_RETRY_SECONDS", 0)
+    completed = theme_membership.get_theme_membership(_DATE)
+
+    assert _member_calls(krx) == ["T1", "T2", "T2"]
+    assert completed.is_complete
+    assert completed.stocks_of("T2") == ["B", "C"]
+    assert completed.themes_of("B") == ["T1", "T2"]
+    assert theme_membership.ThemeMembership.load(theme_membership.THEME_MEMBERSHIP_PATH).theme_codes == ["T1", "T2"]
+
+
+def test_empty_membership_waits_before_rebuilding(krx):
+    krx["themes"] = []
+
+    assert theme_membership.get_theme_membership(_DATE).theme_count == 0
+    assert theme_membership.get_theme_membership(_DATE).theme_count == 0
+
+    assert [call for call in krx["calls"] if call[0] == "get_index_ticker_list"] == [
+        ("get_index_ticker_list", _DATE)
+    ]
+    assert not os.path.exists(theme_membership.THEME_MEMBERSHIP_PATH)
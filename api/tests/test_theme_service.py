@@ -0,0 +1,34 @@
+"""테마 서비스 테스트"""
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+
+from services import surge_engine, theme_service
+from services.market_snapshot import MarketSnapshot
+from services.theme_membership import ThemeMembership
+
+
+def test_stock_themes_count_surges_like_the_surge_ranking(monkeypatch):
+    membership = ThemeMembership.from_members("20261016", [("T1", "반도체", ["A", "B", "C"]), ("T2", "2차전지", ["A"])])
+    snapshot = MarketSnapshot(
+        "20261016",
+        ["A", "B", "C"],
+        ["가", "나", "다"],
+        {
+            "close": np.array([105, 105, 100], dtype=np.int64),
+            "volume": np.array([5000, 10, 5000], dtype=np.int64),
+            "change_rate": np.array([5.0, 5.0, 0.0]),
+        },
+        created_at=datetime(2026, 10, 16, 10, 0),
+    )
+    monkeypatch.setattr(theme_service, "get_recent_trading_date", lambda: "20261016")
+    monkeypatch.setattr(theme_service, "get_theme_membership", lambda date_str: membership)
+    monkeypatch.setattr(theme_service, "get_market_snapshot", lambda date_str: snapshot)
+    # 최소 거래량 조건이 있는 급등주 기준 (B는 거래량이 모자라 급등주가 아니다)
+    monkeypatch.setattr(theme_service, "compute_theme_surge", partial(surge_engine.compute_theme_surge, min_volume=1000))
+
+    result = theme_service._collect_themes_of_stock("A")
+
+    counts = {theme["code"]: theme["surge_stock_count"] for theme in result["themes"]}
+    assert counts == {"T1": 1, "T2": 1}
@@ -0,0 +1,75 @@
+"""서버 워밍업 테스트"""
+import asyncio
+import threading
+
+from services.warmup import Warmup
+
+
+def _ok():
+    pass
+
+
+def test_required_failure_is_degraded_until_retry_succeeds():
+    krx_recovered = threading.Event()
+
+    def flaky_snapshot():
+        if not krx_recovered.is_set():
+            raise ConnectionError("KRX")
+
+    warmup = Warmup(
+        stages=((("calendar", _ok),), (("snapshot", flaky_snapshot), ("names", _ok))),
+        required=("calendar", "snapshot"),
+        retry_seconds=0.01,
+    )
+
+    async def scenario():
+        warmup.start()
+        while not warmup.finished:
+            await asyncio.sleep(0.01)
+        degraded = warmup.progress()
+
+        krx_recovered.set()
+        await asyncio.wait_for(warmup._task, timeout=5)
+        return degraded, warmup.progress()
+
+    degraded, recovered = asyncio.run(scenario())
+
+    assert degraded["status"] == "degraded" and not degraded["ready"]
+    assert recovered["status"] == "ready" and recovered["ready"]
+
+
+def test_optional_failure_is_still_ready():
+    def failing():
+        raise ConnectionError("KRX")
+
+    warmup = Warmup(stages=((("names", failing),),), required=())
+    asyncio.run(warmup.run())
+
+    assert warmup.progress()["ready"]
+
+
+def test_cancelled_warmup_is_not_finished():
+    started = asyncio.Event()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        blocker = loop.create_future()
+
+        async def slow_step(name, func):
+            warmup.steps[name]["status"] = "running"
+            started.set()
+            await blocker
+
+        warmup._run_step = slow_step
+        warmup.start()
+        await started.wait()
+        await warmup.stop()
+
+    warmup = Warmup(stages=((("snapshot", _ok),),), required=("snapshot",))
+    asyncio.run(scenario())
+    progress = warmup.progress()
+
+    assert not warmup.finished
+    assert progress["status"] == "cancelled" and not progress["ready"]
+    assert progress["finished_at"] is None
+    assert progress["steps"][0]["status"] == "cancelled"